@@ -68,12 +68,27 @@ const DashboardComponent = () => {
 
     const fetchMeals = async (date) => {
         try {
-            const response = await apiClient.get("/meals/", {
-                headers: {
-                    Authorization: `Bearer ${localStorage.getItem("accessToken")}`,
-                },
-            });
-            setMeals(response.data);
+            // Only fetch the selected day, following the cursor pages.
+            const nextDay = new Date(`${date}T00:00:00Z`);
+            nextDay.setUTCDate(nextDay.getUTCDate() + 1);
+            let url = "/meals/";
+            let params = {
+                since: `${date}T00:00:00Z`,
+                until: nextDay.toISOString(),
+            };
+            const dayMeals = [];
+            while (url) {
+                const response = await apiClient.get(url, {
+                    params,
+                    headers: {
+                        Authorization: `Bearer ${localStorage.getItem("accessToken")}`,
+                    },
+                });
+                dayMeals.push(...response.data.results);
+                url = response.data.next;
+                params = undefined; // The next link already carries the query.
+            }
+            setMeals(dayMeals);
         } catch (err) {
             console.error("Failed to fetch meals:", err);
             setError("Failed to fetch meals.");
@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for the See Food API.
+
+Each module is a standalone script, run from the directory containing
+manage.py, e.g. ``python -m benchmarks.bench_bulk_components``. Benchmarks run
+against a throwaway test database and never touch db.sqlite3.
+"""
@@ -0,0 +1,97 @@
+"""
+Nutrition analytics on a synthetic five-year history, ten meals a day.
+
+Usage: python -m benchmarks.bench_analytics [YEARS]
+
+Times the NumPy report (core.analytics.nutrition_report) against the same
+daily totals and moving averages computed by looping over Meal objects,
+for a 90-day and a full-history range.
+"""
+
+import random
+import sys
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+
+from benchmarks.harness import benchmark_database, create_user, measure
+from core.analytics import DEFAULT_WINDOWS, TOTALS, nutrition_report
+from core.models import Meal
+
+MEALS_PER_DAY = 10
+MEAL_NAMES = ["Breakfast", "Snack", "Lunch", "Snack", "Dinner"]
+
+
+def seed(user, days, end):
+    rng = random.Random(42)
+    start = datetime.combine(end - timedelta(days=days - 1), time(7), timezone.utc)
+    meals = (
+        Meal(
+            user=user,
+            meal_name=MEAL_NAMES[index % len(MEAL_NAMES)],
+            time_of_consumption=start + timedelta(days=day, minutes=80 * index),
+            total_calories=rng.uniform(50, 800),
+            total_fat=rng.uniform(0, 40),
+            total_protein=rng.uniform(0, 50),
+            total_carbs=rng.uniform(0, 100),
+            total_sugar=rng.uniform(0, 30),
+        )
+        for day in range(days)
+        for index in range(MEALS_PER_DAY)
+    )
+    Meal.objects.bulk_create(meals, batch_size=2000)
+
+
+def python_report(user, start, end, windows=DEFAULT_WINDOWS):
+    """Daily totals and logged-day moving averages, one Meal at a time."""
+    history = max(windows) - 1
+    first = start - timedelta(days=history)
+    daily = defaultdict(lambda: dict.fromkeys(TOTALS, 0.0))
+    meals = Meal.objects.filter(
+        user=user,
+        time_of_consumption__gte=datetime.combine(first, time.min, timezone.utc),
+        time_of_consumption__lt=datetime.combine(end, time.max, timezone.utc),
+    )
+    for meal in meals:
+        day = meal.consumption_date()
+        for total in TOTALS:
+            daily[day][total] += getattr(meal, total)
+    averages = {}
+    day = start
+    while day <= end:
+        for window in windows:
+            logged = [
+                daily[day - timedelta(days=offset)]
+                for offset in range(window)
+                if day - timedelta(days=offset) in daily
+            ]
+            averages[(day, window)] = {
+                total: (
+                    sum(row[total] for row in logged) / len(logged) if logged else None
+                )
+                for total in TOTALS
+            }
+        day += timedelta(days=1)
+    return averages
+
+
+def run(years):
+    user = create_user()
+    end = datetime(2024, 12, 31).date()
+    days = round(365.25 * years)
+    seed(user, days, end)
+    print(f"{Meal.objects.count()} meals over {days} days")
+    print(f"{'range':>8} {'mode':>7} {'queries':>8} {'ms':>10}")
+    for label, range_days in (("90d", 90), ("full", days - max(DEFAULT_WINDOWS))):
+        start = end - timedelta(days=range_days - 1)
+        for mode, report in (("numpy", nutrition_report), ("python", python_report)):
+            with measure() as result:
+                report(user, start, end)
+            print(
+                f"{label:>8} {mode:>7} {result['queries']:>8} "
+                f"{result['seconds'] * 1000:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        run(float(sys.argv[1]) if len(sys.argv) > 1 else 5)
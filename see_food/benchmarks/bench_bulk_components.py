@@ -0,0 +1,65 @@
+"""
+Compare N single food component POSTs against one bulk POST.
+
+Usage: python -m benchmarks.bench_bulk_components [N ...]
+"""
+
+import sys
+
+from django.urls import reverse
+
+from benchmarks.harness import api_client, benchmark_database, create_user, measure
+from core.models import Meal
+
+
+def component_payload(meal_id, index):
+    return {
+        "meal": str(meal_id),
+        "food_name": f"Ingredient {index}",
+        "brand": "Bench",
+        "weight": 100,
+        "fat": 1.5,
+        "protein": 2.0,
+        "carbs": 10.0,
+        "sugar": 0.5,
+        "micronutrients": {},
+        "total_calories": 60,
+    }
+
+
+def new_meal(user, name):
+    return Meal.objects.create(
+        user=user, meal_name=name, time_of_consumption="2024-07-29T13:00:00Z"
+    )
+
+
+def run(sizes):
+    user = create_user()
+    client = api_client(user)
+    list_url = reverse("foodcomponent-list")
+    bulk_url = reverse("foodcomponent-bulk-add-food-components")
+
+    print(f"{'N':>6} {'mode':>7} {'requests':>9} {'queries':>8} {'ms':>10}")
+    for n in sizes:
+        meal = new_meal(user, f"single-{n}")
+        with measure() as single:
+            for index in range(n):
+                client.post(list_url, component_payload(meal.pk, index), format="json")
+        print(
+            f"{n:>6} {'single':>7} {n:>9} {single['queries']:>8} "
+            f"{single['seconds'] * 1000:>10.1f}"
+        )
+
+        meal = new_meal(user, f"bulk-{n}")
+        payload = [component_payload(meal.pk, index) for index in range(n)]
+        with measure() as bulk:
+            client.post(bulk_url, payload, format="json")
+        print(
+            f"{n:>6} {'bulk':>7} {1:>9} {bulk['queries']:>8} "
+            f"{bulk['seconds'] * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        run([int(arg) for arg in sys.argv[1:]] or [1, 20, 100])
@@ -0,0 +1,76 @@
+"""
+Per-request logging overhead: synchronous handlers versus the queue.
+
+Usage: python -m benchmarks.bench_logging [REQUESTS]
+
+Each profile reconfigures LOGGING with its level and handlers pointed at a
+temporary directory, then times meal creation requests. Console output goes
+to /dev/null so the terminal does not dominate the numbers.
+"""
+
+import contextlib
+import copy
+import os
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+
+from benchmarks.harness import api_client, benchmark_database, create_user
+from see_food.log_setup import configure_logging, stop_listeners
+
+PROFILES = [
+    # (name, level, queued)
+    ("off", "CRITICAL", False),
+    ("sync DEBUG", "DEBUG", False),
+    ("queued DEBUG", "DEBUG", True),
+    ("queued INFO", "INFO", True),
+]
+
+
+def logging_settings(directory, level):
+    config = copy.deepcopy(settings.LOGGING)
+    for handler in config["handlers"].values():
+        handler["level"] = level
+        if "filename" in handler:
+            handler["filename"] = os.path.join(
+                directory, os.path.basename(handler["filename"])
+            )
+    for logger in config["loggers"].values():
+        logger["level"] = level
+    return config
+
+
+def time_requests(client, count):
+    url = reverse("meal-list")
+    payload = {"meal_name": "Bench", "time_of_consumption": "2024-07-29T12:00:00Z"}
+    start = time.perf_counter()
+    for _ in range(count):
+        client.post(url, payload, format="json")
+    return (time.perf_counter() - start) / count
+
+
+def run(count):
+    client = api_client(create_user())
+    time_requests(client, 20)  # Warm up.
+    baseline = None
+    print(f"{'profile':>14} {'us/request':>11} {'overhead us':>12}")
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as null:
+        for name, level, queued in PROFILES:
+            with contextlib.redirect_stderr(null), override_settings(LOG_ASYNC=queued):
+                configure_logging(logging_settings(directory, level))
+                per_request = time_requests(client, count)
+                stop_listeners()
+            baseline = per_request if baseline is None else baseline
+            print(
+                f"{name:>14} {per_request * 1e6:>11.0f} "
+                f"{(per_request - baseline) * 1e6:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
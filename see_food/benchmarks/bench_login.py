@@ -0,0 +1,62 @@
+"""
+Logins per second on one core for each password hasher profile.
+
+Usage: python -m benchmarks.bench_login [SECONDS]
+
+For every hasher in see_food/settings.py (Argon2 only when argon2-cffi is
+installed), stores a user's password with it and posts correct credentials
+to /api/login/ in a loop for SECONDS (default 3). The run is one process
+and one thread, so the rate is per core; a server's login capacity is
+roughly this times its worker count, before throttling.
+"""
+
+import importlib.util
+import sys
+import time
+
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+
+from benchmarks.harness import api_client, benchmark_database, create_user
+
+PROFILES = {
+    "pbkdf2": "core.hashers.PBKDF2PasswordHasher",
+    "argon2": "core.hashers.Argon2PasswordHasher",
+    "fast": "django.contrib.auth.hashers.MD5PasswordHasher",
+}
+
+
+def logins_per_second(client, seconds):
+    url = reverse("login")
+    payload = {"username": "bench", "password": "benchpassword"}
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        response = client.post(url, payload, format="json")
+        assert response.status_code == 200, response.status_code
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def run(seconds):
+    user = create_user()
+    client = api_client(user)
+    print(f"{'hasher':>8} {'logins/s':>10} {'ms/login':>10}")
+    no_throttle = {scope: None for scope in settings.LOGIN_THROTTLE_RATES}
+    for name, hasher in PROFILES.items():
+        if name == "argon2" and importlib.util.find_spec("argon2") is None:
+            print(f"{name:>8} skipped, argon2-cffi is not installed")
+            continue
+        with override_settings(
+            PASSWORD_HASHERS=[hasher], LOGIN_THROTTLE_RATES=no_throttle
+        ):
+            user.set_password("benchpassword")
+            user.save()
+            rate = logins_per_second(client, seconds)
+        print(f"{name:>8} {rate:>10.1f} {1000 / rate:>10.2f}")
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        run(float(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,120 @@
+"""
+Serialize time per 1,000 meals: MealSerializer against the .values() path.
+
+Usage: python -m benchmarks.bench_serializers [COMPONENTS_PER_MEAL]
+
+Seeds 1,000 meals with COMPONENTS_PER_MEAL (default 5) food components each
+and times turning them into a JSON body, split into fetching the rows,
+building the response data and rendering it:
+
+  serializer+drf     - prefetched Meal instances, MealSerializer and DRF's
+                       JSONRenderer (the meal list before core/readers.py).
+  serializer+orjson  - the same data rendered by FastJSONRenderer.
+  values+orjson      - core.readers rows rendered by FastJSONRenderer (the
+                       meal list now).
+
+Also prints the body size and its gzip and, when installed, Brotli sizes.
+Each figure is the best of five runs.
+"""
+
+import gzip
+import sys
+
+from benchmarks.harness import benchmark_database, create_user, measure
+from core.compression import brotli
+from core.models import FoodComponent, Meal
+from core.readers import meal_reader, meals_with_components
+from core.renderers import FastJSONRenderer
+from core.serializers import MealSerializer
+
+# Imported after the harness, which configures Django.
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+MEALS = 1000
+RUNS = 5
+
+
+def seed(user, components):
+    meals = Meal.objects.bulk_create(
+        Meal(
+            user=user,
+            meal_name=f"Meal {index}",
+            time_of_consumption=f"2024-07-{index % 28 + 1:02d}T12:00:00Z",
+        )
+        for index in range(MEALS)
+    )
+    FoodComponent.objects.bulk_create(
+        (
+            FoodComponent(
+                meal=meal,
+                food_name=f"Food {index}",
+                brand="Bench",
+                weight=100,
+                fat=1.5,
+                protein=2.0,
+                carbs=10.0,
+                sugar=0.5,
+                total_calories=60,
+                micronutrients={"sodium": 120, "iron": 2.1},
+            )
+            for meal in meals
+            for index in range(components)
+        ),
+        batch_size=2000,
+    )
+
+
+def instances(queryset):
+    return list(queryset.prefetch_related("foodcomponent_set"))
+
+
+def values(queryset):
+    return list(meal_reader.values(queryset))
+
+
+def serialize(meals):
+    return MealSerializer(meals, many=True).data
+
+
+MODES = [
+    ("serializer+drf", instances, serialize, JSONRenderer),
+    ("serializer+orjson", instances, serialize, FastJSONRenderer),
+    ("values+orjson", values, meals_with_components, FastJSONRenderer),
+]
+
+
+def best_of(runs, function, *args):
+    best, value = None, None
+    for _ in range(runs):
+        with measure() as result:
+            value = function(*args)
+        best = min(best or result["seconds"], result["seconds"])
+    return best * 1000, value
+
+
+def run(components):
+    user = create_user()
+    seed(user, components)
+    queryset = Meal.objects.filter(user=user).order_by("-time_of_consumption")
+    print(f"{MEALS} meals x {components} components, ms per 1,000 meals")
+    print(
+        f"{'mode':>18} {'fetch':>8} {'build':>8} {'render':>8} {'total':>8} "
+        f"{'bytes':>9} {'gzip':>8} {'brotli':>8}"
+    )
+    for name, fetch, build, renderer in MODES:
+        fetch_ms, rows = best_of(RUNS, fetch, queryset)
+        # Serializers read the prefetched components; the values path runs
+        # its component query here.
+        build_ms, data = best_of(RUNS, build, rows)
+        render_ms, body = best_of(RUNS, renderer().render, data)
+        brotli_size = len(brotli.compress(body, quality=4)) if brotli else "-"
+        print(
+            f"{name:>18} {fetch_ms:>8.1f} {build_ms:>8.1f} {render_ms:>8.1f} "
+            f"{fetch_ms + build_ms + render_ms:>8.1f} {len(body):>9} "
+            f"{len(gzip.compress(body)):>8} {brotli_size:>8}"
+        )
+
+
+if __name__ == "__main__":
+    with benchmark_database():
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
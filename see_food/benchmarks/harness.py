@@ -0,0 +1,68 @@
+import contextlib
+import logging
+import os
+import tempfile
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "see_food.settings")
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.test import APIClient  # noqa: E402
+
+from core.testing import fast_password_hashers  # noqa: E402
+
+
+@contextlib.contextmanager
+def benchmark_database(on_disk=False):
+    """Create a throwaway test database for the duration of the block.
+
+    SQLite test databases live in memory unless ``on_disk`` is set, which
+    concurrency benchmarks need so that journal settings take effect.
+    """
+    logging.getLogger("see_food").setLevel(logging.WARNING)
+    setup_test_environment()
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(fast_password_hashers())
+        if on_disk and connection.vendor == "sqlite":
+            directory = stack.enter_context(tempfile.TemporaryDirectory())
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(
+                directory, "benchmark.sqlite3"
+            )
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+
+def create_user(username="bench"):
+    return get_user_model().objects.create_user(
+        username=username, email=f"{username}@example.com", password="benchpassword"
+    )
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@contextlib.contextmanager
+def measure():
+    """Yield a dict that is filled with ``seconds`` and ``queries`` on exit."""
+    result = {}
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        yield result
+        result["seconds"] = time.perf_counter() - start
+    result["queries"] = len(queries)
@@ -0,0 +1,199 @@
+"""
+Concurrent throughput of the async views under ASGI versus the DRF views
+under WSGI.
+
+Usage: python -m benchmarks.load_test_async [CLIENTS ...]
+
+Each available server is started against the same throwaway on-disk
+database:
+
+- the async endpoints (/api/async/...) under uvicorn, and under daphne;
+- the DRF endpoints under gunicorn (8 threads), or ``manage.py runserver``
+  when gunicorn is not installed.
+
+Every client thread has its own user and repeatedly logs a meal, adds a
+food component and reads the day's meals back, over real HTTP. Servers that
+are not installed are skipped. Use DJANGO_DB_PROFILE=sqlite-tuned or
+postgres for write-heavy runs; plain SQLite mostly measures lock waits.
+"""
+
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.db import connection
+
+from benchmarks.harness import benchmark_database, create_user
+
+# Imports models, so only after the harness has set Django up.
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+
+ITERATIONS_PER_CLIENT = 30
+PORT = 8765
+
+# (label, module that must be importable, command, API prefix)
+SERVERS = [
+    (
+        "ASGI uvicorn (async views)",
+        "uvicorn",
+        ["-m", "uvicorn", "see_food.asgi:application", "--port", str(PORT)],
+        "/api/async",
+    ),
+    (
+        "ASGI daphne (async views)",
+        "daphne",
+        ["-m", "daphne", "-p", str(PORT), "see_food.asgi:application"],
+        "/api/async",
+    ),
+    (
+        "WSGI gunicorn (DRF views)",
+        "gunicorn",
+        [
+            "-m",
+            "gunicorn",
+            "see_food.wsgi:application",
+            "--bind",
+            f"127.0.0.1:{PORT}",
+            "--threads",
+            "8",
+        ],
+        "/api",
+    ),
+    (
+        "WSGI runserver (DRF views)",
+        "django",
+        ["manage.py", "runserver", "--noreload", f"127.0.0.1:{PORT}"],
+        "/api",
+    ),
+]
+
+
+def request(method, path, token, payload=None):
+    data = None if payload is None else json.dumps(payload).encode()
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{PORT}{path}",
+        data=data,
+        method=method,
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        },
+    )
+    with urllib.request.urlopen(req, timeout=30) as response:
+        return json.loads(response.read() or b"null")
+
+
+def client(prefix, token, results):
+    done = errors = 0
+    for index in range(ITERATIONS_PER_CLIENT):
+        try:
+            meal = request(
+                "POST",
+                f"{prefix}/meals/",
+                token,
+                {
+                    "meal_name": f"Meal {index}",
+                    "time_of_consumption": "2024-07-29T12:00:00Z",
+                },
+            )
+            request(
+                "POST",
+                f"{prefix}/foodcomponents/",
+                token,
+                {
+                    "meal": meal["meal_id"],
+                    "food_name": "Rice",
+                    "weight": 100,
+                    "fat": 1,
+                    "protein": 3,
+                    "carbs": 28,
+                    "sugar": 0,
+                    "total_calories": 130,
+                },
+            )
+            request("GET", f"{prefix}/meals/?since=2024-07-29", token)
+            done += 3
+        except (urllib.error.URLError, OSError, KeyError):
+            errors += 1
+    results.append((done, errors))
+
+
+def wait_for_port(process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            with socket.create_connection(("127.0.0.1", PORT), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def server_environment():
+    env = dict(os.environ, DJANGO_LOG_LEVEL="WARNING")
+    # Point the server at the benchmark database rather than the real one.
+    if connection.vendor == "sqlite":
+        env["SQLITE_PATH"] = connection.settings_dict["NAME"]
+    else:
+        env["POSTGRES_DB"] = connection.settings_dict["NAME"]
+    return env
+
+
+def run(client_counts):
+    print(f"profile: {settings.DB_PROFILE} ({connection.vendor})")
+    print(f"{'server':<28} {'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>8}")
+    for label, module, command, prefix in SERVERS:
+        if importlib.util.find_spec(module) is None:
+            print(f"{label:<28} skipped: {module} is not installed")
+            continue
+        process = subprocess.Popen(
+            [sys.executable, *command],
+            env=server_environment(),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            if not wait_for_port(process):
+                print(f"{label:<28} skipped: server did not start")
+                continue
+            for clients in client_counts:
+                users = [
+                    create_user(f"{module}{clients}_{index}")
+                    for index in range(clients)
+                ]
+                tokens = [
+                    str(RefreshToken.for_user(user).access_token) for user in users
+                ]
+                results = []
+                threads = [
+                    threading.Thread(target=client, args=(prefix, token, results))
+                    for token in tokens
+                ]
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - start
+                done = sum(result[0] for result in results)
+                errors = sum(result[1] for result in results)
+                print(
+                    f"{label:<28} {clients:>8} {done:>9} {errors:>7} "
+                    f"{done / elapsed:>8.1f}"
+                )
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    with benchmark_database(on_disk=True):
+        run([int(arg) for arg in sys.argv[1:]] or [1, 8, 32])
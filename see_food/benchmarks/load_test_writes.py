@@ -0,0 +1,96 @@
+"""
+Measure meal write throughput under concurrent clients.
+
+Run once per database profile, e.g.:
+
+    DJANGO_DB_PROFILE=sqlite python -m benchmarks.load_test_writes
+    DJANGO_DB_PROFILE=sqlite-tuned python -m benchmarks.load_test_writes
+    DJANGO_DB_PROFILE=postgres python -m benchmarks.load_test_writes
+
+Each worker thread has its own database connection and logs meals with two
+food components through the API. Usage: load_test_writes [WORKERS ...]
+"""
+
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+
+from benchmarks.harness import api_client, benchmark_database, create_user
+
+MEALS_PER_WORKER = 50
+
+
+def component(meal_id, name):
+    return {
+        "meal": meal_id,
+        "food_name": name,
+        "weight": 100,
+        "fat": 5,
+        "protein": 10,
+        "carbs": 20,
+        "sugar": 2,
+        "total_calories": 165,
+    }
+
+
+def worker(user, results):
+    client = api_client(user)
+    meal_url = reverse("meal-list")
+    bulk_url = reverse("foodcomponent-bulk-add-food-components")
+    writes = errors = 0
+    try:
+        for index in range(MEALS_PER_WORKER):
+            try:
+                response = client.post(
+                    meal_url,
+                    {
+                        "meal_name": f"Meal {index}",
+                        "time_of_consumption": "2024-07-29T12:00:00Z",
+                        "user": str(user.pk),
+                    },
+                    format="json",
+                )
+                meal_id = response.data["meal_id"]
+                response = client.post(
+                    bulk_url,
+                    [component(meal_id, "Rice"), component(meal_id, "Beans")],
+                    format="json",
+                )
+                writes += 2 if response.status_code == 201 else 1
+            except Exception:  # e.g. "database is locked" under contention.
+                errors += 1
+    finally:
+        connection.close()
+    results.append((writes, errors))
+
+
+def run(worker_counts):
+    print(f"profile: {settings.DB_PROFILE} ({connection.vendor})")
+    print(f"{'workers':>8} {'requests':>9} {'errors':>7} {'seconds':>8} {'req/s':>8}")
+    for workers in worker_counts:
+        users = [create_user(f"load{workers}_{index}") for index in range(workers)]
+        results = []
+        threads = [
+            threading.Thread(target=worker, args=(user, results)) for user in users
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        writes = sum(result[0] for result in results)
+        errors = sum(result[1] for result in results)
+        print(
+            f"{workers:>8} {writes:>9} {errors:>7} {elapsed:>8.2f} "
+            f"{writes / elapsed:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    with benchmark_database(on_disk=True):
+        run([int(arg) for arg in sys.argv[1:]] or [1, 4, 16])
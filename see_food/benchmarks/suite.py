@@ -0,0 +1,303 @@
+"""
+End-to-end API benchmark suite with a diffable JSON report.
+
+Usage: python -m benchmarks.suite [--users N] [--days N] [--meals N]
+           [--components N] [--iterations N] [--warm-cache]
+           [--report PATH] [--thresholds PATH] [--baseline PATH]
+           [--max-regression PERCENT] [--noise-ms MS]
+
+Seeds a throwaway database with ``manage.py seed_perf_data``, then drives
+the routes in see_food/urls.py through the test client as one of the
+seeded users. For every endpoint it records latency percentiles and the
+query count, prints a table and writes the report (sorted keys, so two
+reports diff cleanly).
+
+The run fails (exit status 1) when an endpoint exceeds a limit in the
+thresholds file (benchmarks/thresholds.json by default), or, given a
+baseline report, when it needs more queries or its p90 grew by more than
+--max-regression percent and more than --noise-ms. Query counts are
+deterministic and make the most reliable gate; latencies depend on the
+machine.
+
+Per-user response caching is bypassed unless --warm-cache is given, so
+the numbers measure the views rather than cache hits.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import timedelta
+from io import StringIO
+
+import django
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from benchmarks.harness import api_client, benchmark_database, measure
+from core.cache import bump_user_cache_version
+from core.models import FoodComponent, HistoricalMeal, Meal, UserGoals
+from core.sync import encode_token
+
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(__file__), "thresholds.json")
+END_DATE = "2024-12-31"
+
+
+def endpoints(user, days):
+    """``(name, method, path, payload)`` for every benchmarked route."""
+    meal = Meal.objects.filter(user=user).latest("time_of_consumption")
+    end = meal.consumption_date()
+    start = (end - timedelta(days=min(days, 30) - 1)).isoformat()
+    template = HistoricalMeal.objects.filter(user=user).first()
+    # A client that synced right after seeding: it gets the suite's writes.
+    synced = encode_token(timezone.now())
+    component = {
+        "meal": str(meal.pk),
+        "food_name": "Benchmark Bar",
+        "weight": 50,
+        "fat": 5,
+        "protein": 10,
+        "carbs": 20,
+        "sugar": 8,
+        "total_calories": 200,
+        "micronutrients": {"sodium": 120},
+    }
+    return [
+        ("meal-list", "get", reverse("meal-list"), None),
+        ("meal-list-since", "get", f"{reverse('meal-list')}?since={start}", None),
+        ("meal-export", "get", f"{reverse('meal-export')}?since={start}", None),
+        (
+            "meal-create",
+            "post",
+            reverse("meal-list"),
+            {"meal_name": "Benchmark", "time_of_consumption": f"{end}T12:00:00Z"},
+        ),
+        ("foodcomponent-create", "post", reverse("foodcomponent-list"), component),
+        (
+            "foodcomponent-bulk",
+            "post",
+            reverse("foodcomponent-bulk-add-food-components"),
+            [component] * 10,
+        ),
+        (
+            "historicalmeal-list",
+            "get",
+            reverse("historicalmeal-list-historical-meals"),
+            None,
+        ),
+        ("historicalmeal-frequent", "get", reverse("historicalmeal-frequent"), None),
+        (
+            "historicalmeal-log",
+            "post",
+            reverse("historicalmeal-log", args=[template.pk]),
+            {"scale": 1.5},
+        ),
+        ("usergoals-list", "get", reverse("user-goals-list"), None),
+        ("dashboard", "get", f"{reverse('dashboard-list')}?date={end}", None),
+        ("summary-list", "get", f"{reverse('summary-list')}?from={start}", None),
+        ("summary-weekly", "get", reverse("summary-weekly"), None),
+        ("food-search", "get", f"{reverse('food-search')}?q=chi", None),
+        (
+            "analytics",
+            "get",
+            f"{reverse('analytics-list')}?from={start}&to={end}",
+            None,
+        ),
+        ("nutrient-list", "get", f"{reverse('nutrient-list')}?from={start}", None),
+        (
+            "nutrient-daily",
+            "get",
+            f"{reverse('nutrient-daily')}?nutrient=sodium&above=2300",
+            None,
+        ),
+        ("job-list", "get", reverse("job-list"), None),
+        (
+            "sync",
+            "get",
+            f"{reverse('sync')}?since={synced}",
+            None,
+        ),
+    ]
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def run_endpoint(client, user, method, path, payload, iterations, warm_cache):
+    seconds, queries, statuses = [], [], set()
+    # The first request warms imports, the food index and, with
+    # --warm-cache, the response cache; it is not recorded.
+    for iteration in range(iterations + 1):
+        if not warm_cache:
+            bump_user_cache_version(user.pk)
+        with measure() as result:
+            response = getattr(client, method)(path, payload, format="json")
+            if response.streaming:
+                b"".join(response.streaming_content)
+        if iteration:
+            seconds.append(result["seconds"] * 1000)
+            queries.append(result["queries"])
+            statuses.add(response.status_code)
+    return {
+        "method": method.upper(),
+        "path": path,
+        "iterations": iterations,
+        "status": sorted(statuses),
+        "queries": max(queries),
+        "mean_ms": round(statistics.fmean(seconds), 2),
+        "p50_ms": round(percentile(seconds, 50), 2),
+        "p90_ms": round(percentile(seconds, 90), 2),
+        "p99_ms": round(percentile(seconds, 99), 2),
+        "max_ms": round(max(seconds), 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def check(report, thresholds, baseline, max_regression, noise_ms):
+    """Return a message for every limit the report breaks. Latency
+    regressions of ``noise_ms`` or less are ignored."""
+    failures = []
+    defaults = thresholds.get("default", {})
+    for name, result in report["endpoints"].items():
+        limits = {**defaults, **thresholds.get("endpoints", {}).get(name, {})}
+        for metric, limit in limits.items():
+            if result.get(metric, 0) > limit:
+                failures.append(f"{name}: {metric} {result[metric]} > {limit}")
+        if any(code >= 400 for code in result["status"]):
+            failures.append(f"{name}: responded {result['status']}")
+        previous = (baseline or {}).get("endpoints", {}).get(name)
+        if previous and previous["p90_ms"]:
+            change = (result["p90_ms"] / previous["p90_ms"] - 1) * 100
+            slower = result["p90_ms"] - previous["p90_ms"]
+            if change > max_regression and slower > noise_ms:
+                failures.append(
+                    f"{name}: p90 {previous['p90_ms']} -> {result['p90_ms']} ms "
+                    f"(+{change:.0f}%)"
+                )
+        if previous and result["queries"] > previous["queries"]:
+            failures.append(
+                f"{name}: queries {previous['queries']} -> {result['queries']}"
+            )
+    return failures
+
+
+def load_json(path):
+    if not path:
+        return None
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def run(options):
+    stdout = StringIO()
+    call_command(
+        "seed_perf_data",
+        users=options.users,
+        days=options.days,
+        meals=options.meals,
+        components=options.components,
+        prefix="bench",
+        end_date=END_DATE,
+        stdout=stdout,
+    )
+    print(stdout.getvalue().strip())
+    # Seeded rows stand for old history, not for changes a client has yet
+    # to sync.
+    for model in (Meal, FoodComponent, HistoricalMeal, UserGoals):
+        model.objects.update(updated_at=timezone.now() - timedelta(days=1))
+    user = Meal.objects.first().user
+    client = api_client(user)
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "warm_cache": options.warm_cache,
+            "dataset": {
+                "users": options.users,
+                "days": options.days,
+                "meals_per_day": options.meals,
+                "components_per_meal": options.components,
+            },
+        },
+        "endpoints": {},
+    }
+    print(
+        f"{'endpoint':<24} {'queries':>7} {'p50 ms':>9} {'p90 ms':>9} "
+        f"{'p99 ms':>9} {'max ms':>9}"
+    )
+    for name, method, path, payload in endpoints(user, options.days):
+        result = run_endpoint(
+            client, user, method, path, payload, options.iterations, options.warm_cache
+        )
+        report["endpoints"][name] = result
+        print(
+            f"{name:<24} {result['queries']:>7} {result['p50_ms']:>9.2f} "
+            f"{result['p90_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+            f"{result['max_ms']:>9.2f}"
+        )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--meals", type=int, default=4)
+    parser.add_argument("--components", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warm-cache", action="store_true")
+    parser.add_argument("--report", default="benchmark-report.json")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--baseline", help="Earlier report to compare against.")
+    parser.add_argument("--max-regression", type=float, default=25.0)
+    parser.add_argument(
+        "--noise-ms",
+        type=float,
+        default=5.0,
+        help="Ignore p90 regressions of at most this many milliseconds.",
+    )
+    options = parser.parse_args(argv)
+
+    with benchmark_database():
+        report = run(options)
+    with open(options.report, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+        file.write("\n")
+    print(f"Wrote {options.report}")
+
+    failures = check(
+        report,
+        load_json(options.thresholds) or {},
+        load_json(options.baseline),
+        options.max_regression,
+        options.noise_ms,
+    )
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
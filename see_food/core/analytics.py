@@ -0,0 +1,181 @@
+import math
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Meal, UserGoals
+
+DEFAULT_WINDOWS = (7, 30, 90)
+MAX_WINDOW = 365
+MAX_RANGE_DAYS = 5 * 366
+MEAL_TYPE_LIMIT = 20
+
+# A logged day counts as on target when it is within this share of the goal.
+ADHERENCE_TOLERANCE = 0.1
+
+TOTALS = list(Meal.MACRO_FIELDS)
+
+# Meal total -> UserGoals field it is measured against.
+GOAL_FIELDS = {
+    "total_calories": "calorie_goal",
+    "total_fat": "fat_goal",
+    "total_protein": "protein_goal",
+    "total_carbs": "carb_goal",
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def load_meals(user, start, end):
+    """Return ``(days, names, totals)`` arrays for ``user``'s meals from
+    ``start`` to ``end`` inclusive.
+
+    The database buckets each meal into its local day, so the rows arrive
+    as plain dates and a column per total; nothing is built per ``Meal``.
+    """
+    rows = list(
+        Meal.objects.filter(
+            user=user,
+            time_of_consumption__gte=_day_start(start),
+            time_of_consumption__lt=_day_start(end + timedelta(days=1)),
+        )
+        .annotate(day=TruncDate("time_of_consumption"))
+        .values_list("day", "meal_name", *TOTALS)
+    )
+    if not rows:
+        return (
+            np.empty(0, dtype="datetime64[D]"),
+            np.empty(0, dtype=str),
+            np.empty((0, len(TOTALS))),
+        )
+    days, names, *totals = zip(*rows)
+    return (
+        np.array(days, dtype="datetime64[D]"),
+        np.array(names, dtype=str),
+        np.array(totals, dtype=float).T,
+    )
+
+
+def daily_totals(days, totals, start, day_count):
+    """Bucket meals into ``day_count`` days from ``start``.
+
+    Returns the meal count per day and a ``(day_count, len(TOTALS))`` array
+    of daily totals.
+    """
+    index = (days - np.datetime64(start, "D")).astype(int)
+    counts = np.bincount(index, minlength=day_count)
+    daily = np.column_stack(
+        [
+            np.bincount(index, weights=totals[:, column], minlength=day_count)
+            for column in range(len(TOTALS))
+        ]
+    )
+    return counts, daily
+
+
+def moving_averages(daily, logged, window):
+    """Trailing ``window``-day averages of ``daily`` over logged days only.
+
+    Days without any meals are treated as not logged rather than as zero
+    intake. Windows with no logged days are NaN.
+    """
+    day_count = len(daily)
+    sums = np.vstack([np.zeros(daily.shape[1]), np.cumsum(daily, axis=0)])
+    logged_days = np.concatenate([[0], np.cumsum(logged)])
+    low = np.maximum(np.arange(1, day_count + 1) - window, 0)
+    window_sums = sums[1:] - sums[low]
+    window_days = logged_days[1:] - logged_days[low]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return window_sums / window_days[:, None]
+
+
+def adherence(daily, logged, goals):
+    """Per goal, the share of logged days within ``ADHERENCE_TOLERANCE`` of
+    it and the average intake as a percentage of it."""
+    result = {}
+    logged_daily = daily[logged]
+    for total, field in GOAL_FIELDS.items():
+        goal = getattr(goals, field, 0) if goals else 0
+        if not goal or not len(logged_daily):
+            result[field] = None
+            continue
+        ratio = logged_daily[:, TOTALS.index(total)] / goal
+        result[field] = {
+            "goal": goal,
+            "days_on_target_percent": round(
+                float(np.mean(np.abs(ratio - 1) <= ADHERENCE_TOLERANCE)) * 100, 1
+            ),
+            "average_percent_of_goal": round(float(np.mean(ratio)) * 100, 1),
+        }
+    return result
+
+
+def meal_type_breakdown(names, totals):
+    """Meal counts and totals grouped by case-insensitive meal name, most
+    frequent first."""
+    if not len(names):
+        return []
+    types, index = np.unique(np.char.lower(np.char.strip(names)), return_inverse=True)
+    counts = np.bincount(index)
+    sums = np.column_stack(
+        [np.bincount(index, weights=totals[:, column]) for column in range(len(TOTALS))]
+    )
+    order = np.argsort(-counts, kind="stable")[:MEAL_TYPE_LIMIT]
+    return [
+        {
+            "meal_type": str(types[i]),
+            "meal_count": int(counts[i]),
+            **{total: round(float(sums[i, c]), 1) for c, total in enumerate(TOTALS)},
+            "average_calories": round(float(sums[i, 0] / counts[i]), 1),
+        }
+        for i in order
+    ]
+
+
+def _column(values):
+    return [
+        None if math.isnan(value) else value for value in np.round(values, 1).tolist()
+    ]
+
+
+def nutrition_report(user, start, end, windows=DEFAULT_WINDOWS):
+    """Daily totals, moving averages, goal adherence and meal type
+    breakdown for ``user`` from ``start`` to ``end`` inclusive."""
+    history = max(windows) - 1
+    first = start - timedelta(days=history)
+    day_count = (end - first).days + 1
+    days, names, totals = load_meals(user, first, end)
+    counts, daily = daily_totals(days, totals, first, day_count)
+    logged = counts > 0
+
+    averages = {
+        window: moving_averages(daily, logged, window)[history:] for window in windows
+    }
+    in_range = days >= np.datetime64(start, "D")
+    goals = UserGoals.objects.filter(user=user).first()
+    return {
+        "from": start,
+        "to": end,
+        "logged_days": int(np.count_nonzero(logged[history:])),
+        "dates": [
+            start + timedelta(days=offset) for offset in range(day_count - history)
+        ],
+        "meal_count": counts[history:].tolist(),
+        "daily": {
+            total: _column(daily[history:, column])
+            for column, total in enumerate(TOTALS)
+        },
+        "moving_averages": {
+            str(window): {
+                total: _column(window_averages[:, column])
+                for column, total in enumerate(TOTALS)
+            }
+            for window, window_averages in averages.items()
+        },
+        "adherence": adherence(daily[history:], logged[history:], goals),
+        "meal_types": meal_type_breakdown(names[in_range], totals[in_range]),
+    }
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from .db import apply_sqlite_pragmas
+        from .metrics import install_query_timer
+
+        connection_created.connect(apply_sqlite_pragmas)
+        connection_created.connect(install_query_timer)
@@ -0,0 +1,217 @@
+import logging
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .authentication import AsyncJWTAuthentication
+from .goals import aparse_goals
+from .models import FoodComponent, Meal, UserGoals
+from .pagination import MealCursorPagination
+from .renderers import FastJSONRenderer
+from .serializers import (
+    FoodComponentSerializer,
+    MealCreateSerializer,
+    MealSerializer,
+    UserGoalsSerializer,
+)
+from .views import filter_meals
+
+logger = logging.getLogger("see_food")
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        content_type=FastJSONRenderer.media_type,
+    )
+
+
+class AsyncAPIView(View):
+    """Base for the async API views.
+
+    DRF views are synchronous, so these are plain Django views that keep the
+    DRF contract: JWT authentication, request parsing through the default
+    parsers, and DRF-style error bodies. Handlers get a DRF ``Request`` and
+    must only touch the database through the async ORM.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Authentication is by bearer token, as with DRF's APIView.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        handler = getattr(self, method, None)
+        if method not in self.http_method_names or handler is None:
+            return HttpResponseNotAllowed(self._allowed_methods())
+        request = Request(
+            request,
+            parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+        )
+        authenticator = AsyncJWTAuthentication()
+        try:
+            user_auth = await authenticator.aauthenticate(request)
+            if user_auth is None:
+                raise NotAuthenticated()
+            request.user, request.auth = user_auth
+            return await handler(request, *args, **kwargs)
+        except APIException as error:
+            response = json_response(
+                (
+                    error.detail
+                    if isinstance(error.detail, (list, dict))
+                    else {"detail": error.detail}
+                ),
+                status=error.status_code,
+            )
+            if error.status_code == status.HTTP_401_UNAUTHORIZED:
+                response["WWW-Authenticate"] = authenticator.authenticate_header(
+                    request
+                )
+            return response
+
+
+class AsyncMealView(AsyncAPIView):
+    async def get(self, request):
+        paginator = MealCursorPagination()
+        # The paginator evaluates the page itself; running it through
+        # sync_to_async is what the async ORM methods do internally, and keeps
+        # cursors interchangeable with the synchronous endpoint.
+        meals = await sync_to_async(paginator.paginate_queryset)(
+            filter_meals(request), request
+        )
+        return json_response(
+            {
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+                "results": MealSerializer(meals, many=True).data,
+            }
+        )
+
+    async def post(self, request):
+        logger.debug(
+            "%s.%s: Creating a new meal.", self.__class__.__name__, self.post.__name__
+        )
+        serializer = MealCreateSerializer(
+            data=request.data, context={"request": request}
+        )
+        if not serializer.is_valid():
+            logger.debug(
+                "%s.%s: Meal creation failed with errors: %s.",
+                self.__class__.__name__,
+                self.post.__name__,
+                serializer.errors,
+            )
+            return json_response(
+                {
+                    "message": "Meal creation failed due to invalid data.",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        meal = await Meal.objects.acreate(**serializer.validated_data)
+        # A new meal has no components; saves the serializer a query.
+        meal._prefetched_objects_cache = {
+            "foodcomponent_set": FoodComponent.objects.none()
+        }
+        return json_response(MealSerializer(meal).data, status=status.HTTP_201_CREATED)
+
+
+class AsyncFoodComponentView(AsyncAPIView):
+    async def post(self, request):
+        logger.debug(
+            "%s.%s: Creating a new food component.",
+            self.__class__.__name__,
+            self.post.__name__,
+        )
+        try:
+            meal_id = uuid.UUID(str(request.data.get("meal")))
+        except (AttributeError, ValueError):
+            meal_id = None
+        # Only the user's own meal resolves; anything else fails validation.
+        meal = (
+            meal_id
+            and await Meal.objects.filter(user=request.user, pk=meal_id).afirst()
+        )
+        serializer = FoodComponentSerializer(
+            data=request.data, context={"meals": {meal.pk: meal} if meal else {}}
+        )
+        if not serializer.is_valid():
+            logger.debug(
+                "%s.%s: Food component creation failed with errors: %s.",
+                self.__class__.__name__,
+                self.post.__name__,
+                serializer.errors,
+            )
+            return json_response(
+                {
+                    "message": "Food component creation failed due to invalid data.",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        component = await FoodComponent.objects.acreate(**serializer.validated_data)
+        return json_response(
+            FoodComponentSerializer(component).data, status=status.HTTP_201_CREATED
+        )
+
+
+class AsyncUserGoalsView(AsyncAPIView):
+    async def post(self, request):
+        logger.debug(
+            "%s.%s: Creating user goals.", self.__class__.__name__, self.post.__name__
+        )
+        current = await UserGoals.objects.filter(user=request.user).afirst()
+        goals_data = await aparse_goals(request.data.get("goals_input", ""), current)
+        serializer = UserGoalsSerializer(data=goals_data)
+        if not serializer.is_valid():
+            return json_response(
+                {
+                    "message": "User goals creation failed due to invalid data.",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        goals = await UserGoals.objects.acreate(
+            user=request.user, **serializer.validated_data
+        )
+        return json_response(
+            UserGoalsSerializer(goals).data, status=status.HTTP_201_CREATED
+        )
+
+    async def put(self, request, partial=False):
+        logger.debug(
+            "%s.%s: Updating user goals.", self.__class__.__name__, self.put.__name__
+        )
+        try:
+            goals = await UserGoals.objects.aget(user=request.user)
+        except UserGoals.DoesNotExist:
+            return json_response(
+                {"message": "User goals not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+        goals_data = await aparse_goals(request.data.get("goals_input", ""), goals)
+        serializer = UserGoalsSerializer(goals, data=goals_data, partial=partial)
+        if not serializer.is_valid():
+            return json_response(
+                {
+                    "message": "User goals update failed due to invalid data.",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        for field, value in serializer.validated_data.items():
+            setattr(goals, field, value)
+        await goals.asave()
+        return json_response(UserGoalsSerializer(goals).data)
+
+    async def patch(self, request):
+        return await self.put(request, partial=True)
@@ -0,0 +1,108 @@
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from django.conf import settings
+
+from .cache import authenticated_user_cache, authenticated_user_key
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that keeps resolved users in a cache for
+    ``JWT_USER_CACHE_TTL`` seconds instead of loading the user on every
+    request.
+
+    ``User.save`` and ``User.delete`` drop the cached entry, so password
+    changes and deactivation apply on the next request. Writes that bypass
+    them (``QuerySet.update``) apply once the entry expires.
+
+    With ``JWT_STATELESS_READS`` set, safe-method requests skip the user
+    entirely and get an unsaved ``User`` carrying only the token's user id.
+    That trusts the token until it expires: a deactivated user keeps read
+    access for the rest of the access token's lifetime.
+    """
+
+    def authenticate(self, request):
+        self.read_only = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def user_id(self, validated_token):
+        try:
+            return validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+    def stateless_user(self, validated_token):
+        """A stand-in user built from the token alone, or None when the
+        request does not qualify. Saving it fails, as it looks unsaved."""
+        if not (
+            getattr(settings, "JWT_STATELESS_READS", False)
+            and getattr(self, "read_only", False)
+        ):
+            return None
+        return self.user_model(
+            **{jwt_settings.USER_ID_FIELD: self.user_id(validated_token)}
+        )
+
+    def check_user(self, user, validated_token):
+        """The checks ``JWTAuthentication.get_user`` runs after its lookup."""
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            jwt_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                "The user's password has been changed.", code="password_changed"
+            )
+        return user
+
+    def get_user(self, validated_token):
+        user = self.stateless_user(validated_token)
+        if user is not None:
+            return user
+        cache = authenticated_user_cache()
+        key = authenticated_user_key(self.user_id(validated_token))
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, getattr(settings, "JWT_USER_CACHE_TTL", 60))
+            return user
+        return self.check_user(user, validated_token)
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """``CachedJWTAuthentication`` with the cache and the user lookup done
+    through their async APIs."""
+
+    async def aauthenticate(self, request):
+        self.read_only = request.method in SAFE_METHODS
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user = self.stateless_user(validated_token)
+        if user is not None:
+            return user
+        cache = authenticated_user_cache()
+        user_id = self.user_id(validated_token)
+        key = authenticated_user_key(user_id)
+        user = await cache.aget(key)
+        if user is None:
+            try:
+                user = await self.user_model.objects.aget(
+                    **{jwt_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed("User not found", code="user_not_found")
+            self.check_user(user, validated_token)
+            await cache.aset(key, user, getattr(settings, "JWT_USER_CACHE_TTL", 60))
+            return user
+        return self.check_user(user, validated_token)
@@ -0,0 +1,138 @@
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _version_key(user_id):
+    return f"see_food:user-version:{user_id}"
+
+
+def user_cache_version(user_id):
+    """Return the current response cache version for ``user_id``.
+
+    A missing counter (never set, or evicted) starts from the clock, so it
+    can never fall back to a value that older cache entries were stored
+    under.
+    """
+    cache = _cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(_version_key(user_id), version, timeout=None):
+            version = cache.get(_version_key(user_id), version)
+    return version
+
+
+def _bump(user_id):
+    cache = _cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+def bump_user_cache_version(user_id):
+    """Invalidate every cached response for ``user_id``.
+
+    The counter is bumped now and again once the surrounding transaction
+    commits, so a response cached from a concurrent read of the uncommitted
+    state does not outlive the commit.
+    """
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def authenticated_user_cache():
+    return caches[getattr(settings, "JWT_USER_CACHE_ALIAS", "default")]
+
+
+def authenticated_user_key(user_id):
+    return f"see_food:jwt-user:{user_id}"
+
+
+def forget_authenticated_user(user_id):
+    """Drop ``user_id`` from the authentication cache, now and again once
+    the surrounding transaction commits."""
+    key = authenticated_user_key(user_id)
+    authenticated_user_cache().delete(key)
+    transaction.on_commit(lambda: authenticated_user_cache().delete(key))
+
+
+def _fingerprint(request, varies=""):
+    accepted = getattr(request, "accepted_media_type", "")
+    return hashlib.md5(
+        f"{request.get_full_path()}|{accepted}|{varies}".encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+
+
+def _etag_matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def _finish(response, etag):
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def cache_per_user(view_method=None, *, vary_on=None):
+    """Cache a read-only view method's rendered response per user.
+
+    Entries are keyed by the user's cache version, the full request path and
+    the negotiated media type. A view whose response also depends on
+    something the path doesn't show, such as a date that defaults to today,
+    passes ``vary_on``: a function of the request whose result joins the key.
+    A matching ``If-None-Match`` gets a 304 without running the view, and a
+    cache hit is returned without touching the database or the serializers.
+    """
+    if view_method is None:
+        return functools.partial(cache_per_user, vary_on=vary_on)
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        version = user_cache_version(request.user.pk)
+        fingerprint = _fingerprint(request, vary_on(request) if vary_on else "")
+        etag = f'"{version}-{fingerprint[:16]}"'
+        if _etag_matches(request, etag):
+            return _finish(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+        cache = _cache()
+        key = f"see_food:response:{request.user.pk}:{version}:{fingerprint}"
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return _finish(HttpResponse(content, content_type=content_type), etag)
+
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        response = self.finalize_response(request, response, *args, **kwargs)
+        response.render()
+        cache.set(
+            key,
+            (response.content, response["Content-Type"]),
+            getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300),
+        )
+        return _finish(response, etag)
+
+    return wrapper
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+
+def accepted_encodings(request):
+    """Content codings the client accepts, from ``Accept-Encoding``;
+    codings given ``q=0`` are refused and left out."""
+    accepted = set()
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        quality = "1"
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                quality = value.strip()
+        try:
+            if float(quality) > 0:
+                accepted.add(coding.lower())
+        except ValueError:
+            continue
+    return accepted
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """``GZipMiddleware`` that prefers Brotli when the ``brotli`` package is
+    installed and the client accepts ``br``.
+
+    Responses shorter than ``COMPRESSION_MIN_BYTES`` are sent as they are,
+    since compressing them costs more time than it saves on the wire.
+    Streaming responses are always gzipped, chunk by chunk.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < getattr(
+            settings, "COMPRESSION_MIN_BYTES", 1024
+        ):
+            return response
+        if (
+            brotli is None
+            or response.streaming
+            or response.has_header("Content-Encoding")
+            or "br" not in accepted_encodings(request)
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed = brotli.compress(
+            response.content,
+            quality=getattr(settings, "COMPRESSION_BROTLI_QUALITY", 4),
+        )
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
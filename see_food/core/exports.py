@@ -0,0 +1,94 @@
+import csv
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .serializers import MealSerializer
+
+EXPORT_CHUNK_SIZE = 500
+
+MEAL_COLUMNS = [
+    "meal_id",
+    "meal_name",
+    "time_of_consumption",
+    "hunger_level",
+    "exercise",
+    "total_calories",
+    "total_fat",
+    "total_protein",
+    "total_carbs",
+    "total_sugar",
+]
+COMPONENT_COLUMNS = [
+    "component_id",
+    "food_name",
+    "brand",
+    "weight",
+    "fat",
+    "protein",
+    "carbs",
+    "sugar",
+    "total_calories",
+    "micronutrients",
+]
+
+
+class Echo:
+    """File-like object that hands back whatever is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def _iterate(queryset):
+    meals = queryset.order_by("time_of_consumption", "meal_id").iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
+    for meal in meals:
+        yield meal
+        # Prefetched components point back at their meal. Dropping the cache
+        # breaks that cycle so each chunk is freed as soon as it is written
+        # instead of whenever the garbage collector next runs.
+        meal._prefetched_objects_cache = {}
+
+
+def iter_meals_ndjson(queryset):
+    """Yield one JSON line per meal, with its food components embedded.
+
+    Rows are fetched EXPORT_CHUNK_SIZE at a time, so memory use does not
+    depend on how many meals are exported.
+    """
+    serializer = MealSerializer()
+    encoder = JSONEncoder()
+    for meal in _iterate(queryset):
+        yield encoder.encode(serializer.to_representation(meal)) + "\n"
+
+
+def iter_meals_csv(queryset):
+    """Yield CSV lines with one row per food component.
+
+    Component columns are prefixed with ``component_``. Meals without
+    components get a single row with those columns left empty.
+    """
+    meal_serializer = MealSerializer()
+    writer = csv.writer(Echo())
+    yield writer.writerow(
+        MEAL_COLUMNS
+        + [
+            column if column.startswith("component_") else f"component_{column}"
+            for column in COMPONENT_COLUMNS
+        ]
+    )
+    for meal in _iterate(queryset):
+        meal_data = meal_serializer.to_representation(meal)
+        meal_row = [meal_data[column] for column in MEAL_COLUMNS]
+        components = meal_data["food_components"] or [None]
+        for component in components:
+            if component is None:
+                yield writer.writerow(meal_row + [""] * len(COMPONENT_COLUMNS))
+                continue
+            component = dict(component)
+            component["micronutrients"] = json.dumps(component["micronutrients"])
+            yield writer.writerow(
+                meal_row + [component[column] for column in COMPONENT_COLUMNS]
+            )
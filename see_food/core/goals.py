@@ -0,0 +1,232 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger("see_food")
+
+GOAL_FIELDS = ("calorie_goal", "fat_goal", "carb_goal", "protein_goal", "weight_goal")
+
+
+class GoalParser:
+    """Backend interface for turning natural-language goals into numbers.
+
+    ``parse`` gets the new input and the user's current goals (a dict with
+    every field in ``GOAL_FIELDS``) and returns the updated goal values.
+    Backends that wait on the network set ``blocking``; those run on a worker
+    pool under ``GOAL_PARSER_TIMEOUT``.
+    """
+
+    blocking = False
+
+    def parse(self, input_text, current):
+        raise NotImplementedError
+
+
+class RuleBasedGoalParser(GoalParser):
+    """Deterministic local parser for offline use and tests.
+
+    Reads each clause of the input on its own: a number next to a nutrient
+    sets that goal ("2,000 calories", "150g protein"), "by" makes it a change
+    ("cut fat by 10g", "raise carbs by 10%"), and a bare direction nudges the
+    goal by ``STEP`` ("reduce carbs and fat"). Relative changes to a goal that
+    is not set yet start from the reference daily values.
+    """
+
+    STEP = 0.1
+    DEFAULTS = {
+        "calorie_goal": 2000,
+        "fat_goal": 78,
+        "carb_goal": 275,
+        "protein_goal": 50,
+        "weight_goal": 0,
+    }
+    PATTERNS = {
+        "calorie_goal": re.compile(r"\b(?:calories|calorie|kcals?|cals?)\b"),
+        "fat_goal": re.compile(r"\bfats?\b"),
+        "carb_goal": re.compile(r"\b(?:carbs?|carbohydrates?)\b"),
+        "protein_goal": re.compile(r"\bproteins?\b"),
+        "weight_goal": re.compile(r"\b(?:weigh\w*|kgs?|kilos?|lbs?|pounds?)\b"),
+    }
+    CLAUSE_RE = re.compile(r"[,.;]|\band\b|\bbut\b")
+    NUMBER_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(%|percent)?")
+    DECREASE_RE = re.compile(
+        r"\b(?:reduce|decrease|lower|cut|drop|less|fewer|lose|limit)\b"
+    )
+    INCREASE_RE = re.compile(r"\b(?:increase|raise|boost|more|gain|add)\b")
+
+    def parse(self, input_text, current):
+        goals = dict(current)
+        text = re.sub(r"(\d),(\d{3})\b", r"\1\2", input_text.lower())
+        direction = 0
+        for clause in self.CLAUSE_RE.split(text):
+            fields = [
+                field
+                for field, pattern in self.PATTERNS.items()
+                if pattern.search(clause)
+            ]
+            if self.DECREASE_RE.search(clause):
+                direction = -1
+            elif self.INCREASE_RE.search(clause):
+                direction = 1
+            if len(fields) != 1:
+                continue
+            [field] = fields
+            value = goals[field] or self.DEFAULTS[field]
+            number = self.NUMBER_RE.search(clause)
+            if number is None:
+                if direction and field != "weight_goal":
+                    goals[field] = value * (1 + direction * self.STEP)
+            elif number.group(2):
+                goals[field] = value * (1 + direction * float(number.group(1)) / 100)
+            elif direction and re.search(r"\bby\b", clause):
+                goals[field] = value + direction * float(number.group(1))
+            else:
+                goals[field] = float(number.group(1))
+        return {field: max(0, round(goals[field])) for field in GOAL_FIELDS}
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+goal_cache = TTLCache(
+    getattr(settings, "GOAL_PARSER_CACHE_SIZE", 1024),
+    getattr(settings, "GOAL_PARSER_CACHE_TTL", 3600),
+)
+
+
+@functools.lru_cache
+def _load_parser(path):
+    return import_string(path)()
+
+
+def get_goal_parser():
+    return _load_parser(
+        getattr(settings, "GOAL_PARSER", "core.goals.RuleBasedGoalParser")
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _executor():
+    return ThreadPoolExecutor(
+        max_workers=getattr(settings, "GOAL_PARSER_WORKERS", 4),
+        thread_name_prefix="goal-parser",
+    )
+
+
+def current_goals(goals):
+    """The parser's view of a ``UserGoals`` row, or of no goals at all."""
+    current = {field: getattr(goals, field, 0) for field in GOAL_FIELDS}
+    current["summary"] = getattr(goals, "summary", "")
+    return current
+
+
+def _cache_key(parser, input_text, current):
+    payload = json.dumps(
+        [f"{type(parser).__module__}.{type(parser).__qualname__}", input_text, current],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _with_summary(values, input_text, current):
+    summary = current["summary"]
+    return {**values, "summary": f"{summary} {input_text}" if summary else input_text}
+
+
+def _fallback(input_text, current, error):
+    logger.warning(
+        "Goal parser failed (%r); using the rule-based parser.", error, exc_info=error
+    )
+    return RuleBasedGoalParser().parse(input_text, current)
+
+
+def _lookup(input_text, goals):
+    current = current_goals(goals)
+    parser = get_goal_parser()
+    key = _cache_key(parser, input_text, current)
+    return current, parser, key, goal_cache.get(key)
+
+
+def parse_goals(input_text, goals=None):
+    """Return ``UserGoals`` field values for ``input_text`` applied to
+    ``goals`` (the user's ``UserGoals``, or None).
+
+    Only the new input is parsed; the summary just records it. Results are
+    cached by backend, current goals (summary included) and input. A
+    blocking backend runs on the worker pool and falls back to the
+    rule-based parser after ``GOAL_PARSER_TIMEOUT`` seconds or on error;
+    fallback results are not cached.
+    """
+    current, parser, key, values = _lookup(input_text, goals)
+    if values is None and not parser.blocking:
+        values = parser.parse(input_text, current)
+        goal_cache.set(key, values)
+    elif values is None:
+        future = _executor().submit(parser.parse, input_text, current)
+        try:
+            values = future.result(timeout=settings.GOAL_PARSER_TIMEOUT)
+            goal_cache.set(key, values)
+        except Exception as error:
+            future.cancel()
+            values = _fallback(input_text, current, error)
+    return _with_summary(values, input_text, current)
+
+
+async def aparse_goals(input_text, goals=None):
+    """Async ``parse_goals``; a blocking backend is awaited on the worker
+    pool rather than run on the event loop."""
+    current, parser, key, values = _lookup(input_text, goals)
+    if values is None and not parser.blocking:
+        values = parser.parse(input_text, current)
+        goal_cache.set(key, values)
+    elif values is None:
+        future = _executor().submit(parser.parse, input_text, current)
+        try:
+            values = await asyncio.wait_for(
+                asyncio.wrap_future(future), settings.GOAL_PARSER_TIMEOUT
+            )
+            goal_cache.set(key, values)
+        except Exception as error:
+            future.cancel()
+            values = _fallback(input_text, current, error)
+    return _with_summary(values, input_text, current)
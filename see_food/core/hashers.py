@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with ``PASSWORD_PBKDF2_ITERATIONS`` iterations.
+
+    Hashes with a different count are rehashed on the next successful
+    login, like Django's own hasher does when its default changes.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(
+            settings,
+            "PASSWORD_PBKDF2_ITERATIONS",
+            hashers.PBKDF2PasswordHasher.iterations,
+        )
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id with its costs taken from the ``ARGON2_*`` settings.
+
+    Hashes made with other parameters are rehashed on the next successful
+    login.
+    """
+
+    @property
+    def time_cost(self):
+        return getattr(
+            settings, "ARGON2_TIME_COST", hashers.Argon2PasswordHasher.time_cost
+        )
+
+    @property
+    def memory_cost(self):
+        return getattr(
+            settings, "ARGON2_MEMORY_COST", hashers.Argon2PasswordHasher.memory_cost
+        )
+
+    @property
+    def parallelism(self):
+        return getattr(
+            settings, "ARGON2_PARALLELISM", hashers.Argon2PasswordHasher.parallelism
+        )
@@ -0,0 +1,180 @@
+import codecs
+import csv
+import functools
+import itertools
+import json
+import time
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .cache import bump_user_cache_version
+from .exports import COMPONENT_COLUMNS, MEAL_COLUMNS
+from .models import (
+    ComponentNutrient,
+    DailyNutritionSummary,
+    Food,
+    FoodComponent,
+    Meal,
+)
+from .serializers import MealImportSerializer
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+ENCODING_CHECK_CHUNK_SIZE = 64 * 1024
+
+# File type -> extensions recognised when no type is given explicitly. Plain
+# .json is left out: it usually holds one array, which is not NDJSON.
+IMPORT_TYPES = {
+    "ndjson": (".ndjson", ".jsonl"),
+    "csv": (".csv",),
+}
+
+
+def guess_import_type(filename):
+    for import_type, extensions in IMPORT_TYPES.items():
+        if filename.lower().endswith(extensions):
+            return import_type
+    return None
+
+
+def is_utf8(file):
+    """Return whether the binary ``file`` decodes as UTF-8, then rewind it.
+
+    Batches are committed as they are written, so an import has to be
+    refused before the first one rather than failing halfway through the
+    file. The file is decoded a chunk at a time to keep memory flat.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for chunk in iter(functools.partial(file.read, ENCODING_CHECK_CHUNK_SIZE), b""):
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    finally:
+        file.seek(0)
+    return True
+
+
+def iter_ndjson_records(lines):
+    """Yield one meal dict per non-blank line of NDJSON.
+
+    Undecodable lines are yielded as ``None`` so they are counted as skipped.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _csv_component_key(column):
+    return column if column.startswith("component_") else f"component_{column}"
+
+
+def iter_csv_records(lines):
+    """Yield one meal dict per group of consecutive CSV rows.
+
+    Accepts the layout written by the CSV export: one row per component, with
+    the meal columns repeated. Rows belong to the same meal while their
+    ``meal_id`` (or, without one, meal name and time) stays the same.
+    """
+    rows = csv.DictReader(lines)
+
+    def meal_key(row):
+        return row.get("meal_id") or (
+            row.get("meal_name"),
+            row.get("time_of_consumption"),
+        )
+
+    for _, group in itertools.groupby(rows, key=meal_key):
+        group = list(group)
+        meal = {
+            column: group[0][column]
+            for column in MEAL_COLUMNS
+            if group[0].get(column) not in (None, "")
+        }
+        meal["food_components"] = []
+        for row in group:
+            component = {
+                column: row.get(_csv_component_key(column))
+                for column in COMPONENT_COLUMNS
+                if row.get(_csv_component_key(column)) not in (None, "")
+            }
+            if not component.get("food_name"):
+                continue
+            try:
+                component["micronutrients"] = json.loads(
+                    component.get("micronutrients", "{}")
+                )
+            except ValueError:
+                pass  # Left as a string; validation rejects it.
+            meal["food_components"].append(component)
+        yield meal
+
+
+def read_records(lines, import_type):
+    readers = {"ndjson": iter_ndjson_records, "csv": iter_csv_records}
+    return readers[import_type](lines)
+
+
+def _validate_batch(records, first_index, report):
+    serializer = MealImportSerializer()
+    for index, record in enumerate(records, start=first_index):
+        try:
+            if not isinstance(record, dict):
+                raise ValidationError("Expected a JSON object.")
+            yield serializer.run_validation(record)
+        except ValidationError as error:
+            report["skipped"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"record": index, "errors": error.detail})
+
+
+def _write_batch(user, meals_data):
+    meals, components = [], []
+    for meal_data in meals_data:
+        meal_data = dict(meal_data)
+        components_data = meal_data.pop("food_components", [])
+        meal = Meal(user=user, **meal_data)
+        meals.append(meal)
+        components += [FoodComponent(meal=meal, **data) for data in components_data]
+    with transaction.atomic():
+        Meal.objects.bulk_create(meals)
+        FoodComponent.objects.bulk_create(components)
+        Meal.rebuild_macros(Meal.objects.filter(pk__in=[meal.pk for meal in meals]))
+        Food.observe(user.pk, components)
+        ComponentNutrient.record(components)
+    bump_user_cache_version(user.pk)
+    return len(meals), len(components)
+
+
+def import_meals(user, records, batch_size=IMPORT_BATCH_SIZE):
+    """Import meal ``records`` (dicts as yielded by the readers above) for
+    ``user``.
+
+    Records are validated and written ``batch_size`` at a time, each batch in
+    its own transaction, so memory use does not depend on the file size.
+    Invalid records are skipped and described in the returned report.
+    """
+    report = {"meals": 0, "components": 0, "skipped": 0, "errors": []}
+    start = time.perf_counter()
+    records = iter(records)
+    index = 0
+    while batch := list(itertools.islice(records, batch_size)):
+        meals_data = list(_validate_batch(batch, index, report))
+        index += len(batch)
+        if meals_data:
+            meals, components = _write_batch(user, meals_data)
+            report["meals"] += meals
+            report["components"] += components
+    if report["meals"]:
+        DailyNutritionSummary.rebuild_all(users=[user])
+    elapsed = time.perf_counter() - start
+    rows = report["meals"] + report["components"]
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(rows / elapsed) if rows else 0
+    return report
@@ -0,0 +1,112 @@
+import itertools
+import logging
+
+from django.db import transaction
+
+from .cache import bump_user_cache_version
+from .goals import parse_goals
+from .models import DailyNutritionSummary, Job, Meal, UserGoals
+from .serializers import UserGoalsSerializer
+
+logger = logging.getLogger("see_food")
+
+JOB_BATCH_SIZE = 20
+
+# Job kind -> (function, batched). A batched function gets the payloads of
+# every claimed job of its kind at once and returns one result per payload.
+TASKS = {}
+
+
+def task(kind, batched=False):
+    def register(function):
+        TASKS[kind] = (function, batched)
+        return function
+
+    return register
+
+
+@task("recalculate_meals", batched=True)
+def recalculate_meals(payloads):
+    """Recompute meal totals and the daily summaries they feed."""
+    meals = Meal.objects.filter(pk__in=[payload["meal_id"] for payload in payloads])
+    Meal.rebuild_macros(meals)
+    by_id = {str(meal.pk): meal for meal in meals}
+    days = {(meal.user_id, meal.consumption_date()) for meal in by_id.values()}
+    for user_id, date in days:
+        DailyNutritionSummary.rebuild(user_id, date)
+    for user_id in {user_id for user_id, _ in days}:
+        bump_user_cache_version(user_id)
+    results = []
+    for payload in payloads:
+        meal = by_id.get(str(payload["meal_id"]))
+        results.append(
+            meal
+            and {
+                "meal_id": str(meal.pk),
+                **{total: getattr(meal, total) for total in Meal.MACRO_FIELDS},
+            }
+        )
+    return results
+
+
+@task("rebuild_daily_summaries", batched=True)
+def rebuild_daily_summaries(payloads):
+    """Recompute every daily summary of the users in ``payloads``."""
+    user_ids = {payload["user_id"] for payload in payloads}
+    rows = DailyNutritionSummary.rebuild_all(users=user_ids)
+    for user_id in user_ids:
+        bump_user_cache_version(user_id)
+    return [{"users": len(user_ids), "summaries": rows} for _ in payloads]
+
+
+@task("parse_goals")
+def parse_goals_task(payload):
+    """Parse ``goals_input`` into the user's goals, creating them if needed."""
+    goals = UserGoals.objects.filter(user_id=payload["user_id"]).first()
+    values = parse_goals(payload["goals_input"], goals)
+    goals = goals or UserGoals(user_id=payload["user_id"])
+    for field, value in values.items():
+        setattr(goals, field, value)
+    goals.save()
+    return UserGoalsSerializer(goals).data
+
+
+def _run(kind, jobs):
+    function, batched = TASKS.get(kind, (None, False))
+    if function is None:
+        for job in jobs:
+            job.attempts = job.max_attempts
+            job.fail(f"Unknown job kind: {kind}")
+        return
+    if batched:
+        try:
+            with transaction.atomic():
+                results = function([job.payload for job in jobs])
+        except Exception as error:
+            logger.exception("Batch of %d %s jobs failed.", len(jobs), kind)
+            for job in jobs:
+                job.fail(error)
+            return
+        for job, result in zip(jobs, results):
+            job.succeed(result)
+        return
+    for job in jobs:
+        try:
+            with transaction.atomic():
+                result = function(job.payload)
+        except Exception as error:
+            logger.exception("Job %s (%s) failed.", job.pk, kind)
+            job.fail(error)
+        else:
+            job.succeed(result)
+
+
+def run_pending(worker, limit=JOB_BATCH_SIZE):
+    """Claim up to ``limit`` due jobs for ``worker`` and run them, batching
+    jobs of the same kind. Returns the number of jobs claimed."""
+    jobs = Job.claim(limit, worker)
+    for kind, group in itertools.groupby(
+        sorted(jobs, key=lambda job: job.kind), key=lambda job: job.kind
+    ):
+        _run(kind, list(group))
+    return len(jobs)
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cache import bump_user_cache_version
+from core.models import ComponentNutrient
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-nutrient rows from the food components' micronutrients."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            action="append",
+            dest="usernames",
+            help="Only rebuild nutrients for this username. May be repeated.",
+        )
+
+    def handle(self, *args, usernames=None, **options):
+        users = None
+        if usernames:
+            users = get_user_model().objects.filter(username__in=usernames)
+            missing = set(usernames) - set(users.values_list("username", flat=True))
+            if missing:
+                raise CommandError(f"Unknown users: {', '.join(sorted(missing))}")
+        written = ComponentNutrient.rebuild_all(users)
+        if users is None:
+            users = get_user_model().objects.all()
+        for user_id in users.values_list("pk", flat=True):
+            bump_user_cache_version(user_id)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} nutrient rows."))
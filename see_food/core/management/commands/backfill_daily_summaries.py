@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import DailyNutritionSummary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily nutrition summaries from the stored meals."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            action="append",
+            dest="usernames",
+            help="Only rebuild summaries for this username. May be repeated.",
+        )
+
+    def handle(self, *args, usernames=None, **options):
+        users = None
+        if usernames:
+            users = get_user_model().objects.filter(username__in=usernames)
+            missing = set(usernames) - set(users.values_list("username", flat=True))
+            if missing:
+                raise CommandError(f"Unknown users: {', '.join(sorted(missing))}")
+        written = DailyNutritionSummary.rebuild_all(users)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} daily summaries."))
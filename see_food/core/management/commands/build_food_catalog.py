@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Food, FoodComponent, HistoricalMeal
+from core.search import bump_catalog_version
+
+CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild every user's food catalog from their logged food components "
+        "and historical meals."
+    )
+
+    def handle(self, *args, **options):
+        fields = ["food_name", "brand", "weight", *Food.PER_100G_FIELDS.values()]
+        with transaction.atomic():
+            # Catalogs that end up empty must be reloaded as well.
+            emptied = set(Food.objects.values_list("user_id", flat=True).distinct())
+            Food.objects.all().delete()
+            components = (
+                FoodComponent.objects.values("meal__user_id", *fields)
+                .order_by("meal__user_id")
+                .iterator(chunk_size=CHUNK_SIZE)
+            )
+            self.observe(
+                (component.pop("meal__user_id"), [component])
+                for component in components
+            )
+            historical_meals = HistoricalMeal.objects.order_by("user_id").iterator(
+                chunk_size=CHUNK_SIZE
+            )
+            self.observe(
+                (historical_meal.user_id, historical_meal.catalog_entries())
+                for historical_meal in historical_meals
+            )
+            transaction.on_commit(
+                lambda: [bump_catalog_version(user_id) for user_id in emptied]
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Catalog holds {Food.objects.count()} foods.")
+        )
+
+    @staticmethod
+    def observe(entries):
+        """``Food.observe`` ``(user_id, components)`` pairs ordered by user,
+        up to CHUNK_SIZE components at a time."""
+        user_id, chunk = None, []
+        for owner, components in entries:
+            if chunk and (owner != user_id or len(chunk) >= CHUNK_SIZE):
+                Food.observe(user_id, chunk)
+                chunk = []
+            user_id = owner
+            chunk += components
+        if chunk:
+            Food.observe(user_id, chunk)
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import HistoricalMeal
+
+
+class Command(BaseCommand):
+    help = "Recompute historical meal content hashes and merge duplicates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            action="append",
+            dest="usernames",
+            help="Only deduplicate this username's meals. May be repeated.",
+        )
+
+    def handle(self, *args, usernames=None, **options):
+        users = None
+        if usernames:
+            users = get_user_model().objects.filter(username__in=usernames)
+            missing = set(usernames) - set(users.values_list("username", flat=True))
+            if missing:
+                raise CommandError(f"Unknown users: {', '.join(sorted(missing))}")
+        removed = HistoricalMeal.deduplicate(users)
+        self.stdout.write(
+            self.style.SUCCESS(f"Merged {removed} duplicate historical meals.")
+        )
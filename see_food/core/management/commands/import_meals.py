@@ -0,0 +1,65 @@
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_TYPES,
+    guess_import_type,
+    import_meals,
+    is_utf8,
+    read_records,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import meals and their food components for a user from an NDJSON or "
+        "CSV file in the export layout."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import.")
+        parser.add_argument("--user", required=True, help="Username to import for.")
+        parser.add_argument(
+            "--type",
+            dest="import_type",
+            choices=list(IMPORT_TYPES),
+            help="File type. Guessed from the file extension when omitted.",
+        )
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, path, user, import_type, batch_size, **options):
+        try:
+            user = get_user_model().objects.get(username=user)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Unknown user: {user}")
+        import_type = import_type or guess_import_type(path)
+        if import_type is None:
+            raise CommandError("Cannot tell the file type; pass --type.")
+
+        try:
+            with open(path, "rb") as file:
+                if not is_utf8(file):
+                    raise CommandError(f"{path} is not UTF-8 encoded.")
+                lines = io.TextIOWrapper(file, encoding="utf-8", newline="")
+                report = import_meals(
+                    user, read_records(lines, import_type), batch_size=batch_size
+                )
+        except OSError as error:
+            raise CommandError(str(error))
+
+        for error in report["errors"]:
+            self.stderr.write(
+                f"Record {error['record']}: {json.dumps(error['errors'])}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['meals']} meals and {report['components']} "
+                f"components in {report['seconds']}s "
+                f"({report['rows_per_second']} rows/s); "
+                f"skipped {report['skipped']} records."
+            )
+        )
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than SYNC_TOMBSTONE_DAYS."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.SYNC_TOMBSTONE_DAYS,
+            help="Keep tombstones this many days. Defaults to SYNC_TOMBSTONE_DAYS.",
+        )
+
+    def handle(self, *args, days, **options):
+        if days < settings.SYNC_TOMBSTONE_DAYS:
+            self.stderr.write(
+                "Keeping fewer days than SYNC_TOMBSTONE_DAYS; clients with older "
+                "tokens will miss deletions."
+            )
+        removed = Tombstone.prune(timezone.now() - timedelta(days=days))
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} tombstones."))
@@ -0,0 +1,70 @@
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.jobs import JOB_BATCH_SIZE, run_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs on a pool of worker threads, each polling "
+        "the job table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.JOB_WORKERS,
+            help="Worker threads. Defaults to JOB_WORKERS (the CPU count).",
+        )
+        parser.add_argument("--batch-size", type=int, default=JOB_BATCH_SIZE)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds an idle worker waits before polling again.",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit when no jobs are due."
+        )
+
+    def handle(self, *args, workers, batch_size, poll_interval, once, **options):
+        stop = threading.Event()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+        def work(index):
+            ran = 0
+            while not stop.is_set():
+                claimed = run_pending(f"{prefix}:{index}", batch_size)
+                ran += claimed
+                if not claimed:
+                    if once:
+                        break
+                    stop.wait(poll_interval)
+            return ran
+
+        def work_in_thread(index):
+            try:
+                return work(index)
+            finally:
+                connection.close()
+
+        if workers <= 1:
+            ran = work(0)
+        else:
+            pool = ThreadPoolExecutor(workers, thread_name_prefix="job-worker")
+            futures = [pool.submit(work_in_thread, index) for index in range(workers)]
+            try:
+                ran = sum(future.result() for future in futures)
+            except KeyboardInterrupt:
+                stop.set()
+                ran = sum(future.result() for future in futures)
+            finally:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(f"Ran {ran} jobs."))
@@ -0,0 +1,221 @@
+import random
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.models import (
+    ComponentNutrient,
+    DailyNutritionSummary,
+    Food,
+    FoodComponent,
+    HistoricalMeal,
+    Meal,
+    UserGoals,
+)
+
+# (food, brand, calories, fat, protein, carbs, sugar, sodium) per 100 g.
+MENU = [
+    ("Rolled Oats", "Quaker", 379, 6.5, 13.2, 67.7, 1.0, 6),
+    ("Whole Milk", "", 61, 3.3, 3.2, 4.8, 5.1, 43),
+    ("Banana", "", 89, 0.3, 1.1, 22.8, 12.2, 1),
+    ("Chicken Breast", "Brand A", 165, 3.6, 31.0, 0.0, 0.0, 74),
+    ("Brown Rice", "", 112, 0.9, 2.3, 23.5, 0.4, 5),
+    ("Broccoli", "", 34, 0.4, 2.8, 6.6, 1.7, 33),
+    ("Salmon", "Brand B", 208, 13.4, 20.4, 0.0, 0.0, 59),
+    ("Whole Wheat Bread", "Brand C", 247, 3.4, 13.0, 41.3, 6.0, 450),
+    ("Cheddar Cheese", "", 403, 33.1, 24.9, 1.3, 0.5, 621),
+    ("Greek Yogurt", "Brand D", 59, 0.4, 10.2, 3.6, 3.2, 36),
+    ("Lentil Soup", "Brand E", 56, 1.1, 3.6, 8.4, 1.2, 380),
+    ("Apple", "", 52, 0.2, 0.3, 13.8, 10.4, 1),
+]
+MEAL_NAMES = ["Breakfast", "Lunch", "Snack", "Dinner", "Supper"]
+TEMPLATES_PER_USER = 10
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users, meals, food components and derived rows "
+        "for performance testing, using bulk inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--days", type=int, default=90, help="Days per user.")
+        parser.add_argument("--meals", type=int, default=4, help="Meals per day.")
+        parser.add_argument(
+            "--components", type=int, default=5, help="Components per meal."
+        )
+        parser.add_argument(
+            "--prefix", default="perf", help="Username prefix; users are PREFIX0..."
+        )
+        parser.add_argument(
+            "--password",
+            default="perfpassword",
+            help="Password of every generated user (hashed once).",
+        )
+        parser.add_argument(
+            "--end-date",
+            help="Last day of the generated history, YYYY-MM-DD. Defaults to today.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(
+        self,
+        *args,
+        users,
+        days,
+        meals,
+        components,
+        prefix,
+        password,
+        end_date,
+        seed,
+        **options,
+    ):
+        if min(users, days, meals, components) < 1:
+            raise CommandError(
+                "--users, --days, --meals and --components must be >= 1."
+            )
+        User = get_user_model()
+        usernames = [f"{prefix}{index}" for index in range(users)]
+        taken = User.objects.filter(username__in=usernames).values_list(
+            "username", flat=True
+        )
+        if taken:
+            raise CommandError(
+                f"Users already exist: {', '.join(sorted(taken)[:5])}; "
+                "choose another --prefix."
+            )
+        end = timezone.localdate()
+        if end_date:
+            end = parse_date(end_date)
+            if end is None:
+                raise CommandError("--end-date must be YYYY-MM-DD.")
+        rng = random.Random(seed)
+        password = make_password(password)
+        start = time.perf_counter()
+
+        created = User.objects.bulk_create(
+            User(username=username, email=f"{username}@example.com", password=password)
+            for username in usernames
+        )
+        UserGoals.objects.bulk_create(
+            UserGoals(
+                user=user,
+                calorie_goal=rng.randrange(1600, 3000, 100),
+                fat_goal=rng.randrange(50, 100),
+                carb_goal=rng.randrange(150, 350),
+                protein_goal=rng.randrange(50, 180),
+            )
+            for user in created
+        )
+        rows = {"meals": 0, "components": 0, "nutrients": 0}
+        for user in created:
+            self.seed_user(user, end, rng, rows, days, meals, components)
+        written = DailyNutritionSummary.rebuild_all(users=created)
+        for user in created:
+            Food.observe(
+                user.pk,
+                [
+                    {"food_name": food, "brand": brand, "weight": 100}
+                    for food, brand, *_ in MENU
+                ],
+            )
+        elapsed = time.perf_counter() - start
+        total = sum(rows.values()) + written
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(created)} users, {rows['meals']} meals, "
+                f"{rows['components']} components, {rows['nutrients']} nutrient "
+                f"rows and {written} daily summaries in {elapsed:.1f}s "
+                f"({total / elapsed:.0f} rows/s)."
+            )
+        )
+
+    def seed_user(self, user, end, rng, rows, days, meals, components):
+        first = end - timedelta(days=days - 1)
+        meal_batch, component_batch = [], []
+        for day in range(days):
+            midnight = timezone.make_aware(
+                datetime.combine(first + timedelta(days=day), dt_time.min)
+            )
+            for index in range(meals):
+                meal = Meal(
+                    user=user,
+                    meal_name=MEAL_NAMES[index % len(MEAL_NAMES)],
+                    time_of_consumption=midnight
+                    + timedelta(hours=7 + 14 * index / meals),
+                )
+                parts = [
+                    self.component(meal, rng.choice(MENU), rng.uniform(30, 300))
+                    for _ in range(components)
+                ]
+                for total, field in Meal.MACRO_FIELDS.items():
+                    setattr(meal, total, sum(getattr(part, field) for part in parts))
+                meal_batch.append(meal)
+                component_batch += parts
+            if len(component_batch) >= BATCH_SIZE or day == days - 1:
+                self.write(meal_batch, component_batch, rows)
+                meal_batch, component_batch = [], []
+        HistoricalMeal.objects.bulk_create(
+            self.template(user, index, rng) for index in range(TEMPLATES_PER_USER)
+        )
+
+    @staticmethod
+    def component(meal, food, weight):
+        name, brand, calories, fat, protein, carbs, sugar, sodium = food
+        scale = weight / 100
+        return FoodComponent(
+            meal=meal,
+            food_name=name,
+            brand=brand,
+            weight=round(weight, 1),
+            total_calories=calories * scale,
+            fat=fat * scale,
+            protein=protein * scale,
+            carbs=carbs * scale,
+            sugar=sugar * scale,
+            micronutrients={"sodium": sodium * scale},
+        )
+
+    @staticmethod
+    def template(user, index, rng):
+        template = HistoricalMeal(
+            user=user,
+            meal_name=f"{MEAL_NAMES[index % len(MEAL_NAMES)]} {index}",
+            food_components=[
+                {
+                    "food_name": name,
+                    "brand": brand,
+                    "weight": 100,
+                    "total_calories": calories,
+                    "fat": fat,
+                    "protein": protein,
+                    "carbs": carbs,
+                    "sugar": sugar,
+                    "micronutrients": {"sodium": sodium},
+                }
+                for name, brand, calories, fat, protein, carbs, sugar, sodium in (
+                    rng.sample(MENU, 3)
+                )
+            ],
+            use_count=rng.randint(1, 20),
+        )
+        template.content_hash = template.compute_content_hash()
+        return template
+
+    @staticmethod
+    def write(meals, components, rows):
+        with transaction.atomic():
+            Meal.objects.bulk_create(meals, batch_size=1000)
+            FoodComponent.objects.bulk_create(components, batch_size=1000)
+            rows["nutrients"] += ComponentNutrient.record(components)
+        rows["meals"] += len(meals)
+        rows["components"] += len(components)
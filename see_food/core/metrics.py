@@ -0,0 +1,254 @@
+import bisect
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger("see_food")
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Metric name -> (help text, buckets, key in a request's measurements).
+HISTOGRAMS = {
+    "see_food_request_duration_seconds": (
+        "Wall time spent handling the request.",
+        SECONDS_BUCKETS,
+        "seconds",
+    ),
+    "see_food_request_queries": (
+        "Database queries issued by the request.",
+        QUERY_BUCKETS,
+        "queries",
+    ),
+    "see_food_request_db_seconds": (
+        "Time spent waiting on database queries.",
+        SECONDS_BUCKETS,
+        "db_seconds",
+    ),
+    "see_food_request_render_seconds": (
+        "Time spent rendering the response body. Responses served from the "
+        "response cache are not rendered again and count as zero.",
+        SECONDS_BUCKETS,
+        "render_seconds",
+    ),
+    "see_food_response_bytes": (
+        "Size of the response body. Streamed responses are not counted.",
+        BYTES_BUCKETS,
+        "bytes",
+    ),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class RequestMetrics:
+    """Per-route histograms of request measurements, kept in process memory.
+
+    Routes are identified by URL name (``meal-list``) and HTTP method, so the
+    number of series stays bounded whatever paths clients request. Each
+    worker process keeps its own figures.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+
+    def record(self, route, method, measurements):
+        with self._lock:
+            histograms = self._routes.get((route, method))
+            if histograms is None:
+                histograms = self._routes[(route, method)] = {
+                    name: Histogram(buckets)
+                    for name, (_, buckets, _) in HISTOGRAMS.items()
+                }
+            for name, (_, _, key) in HISTOGRAMS.items():
+                if measurements.get(key) is not None:
+                    histograms[name].observe(measurements[key])
+
+    def render(self):
+        """Return every histogram in the Prometheus text exposition format."""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = []
+            for name, (help_text, _, _) in HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (route, method), histograms in routes:
+                    histogram = histograms[name]
+                    labels = f'route="{_label(route)}",method="{_label(method)}"'
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f"{name}_sum{{{labels}}} {_number(histogram.sum)}")
+                    lines.append(f"{name}_count{{{labels}}} {sum(histogram.counts)}")
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+class RequestTimer:
+    """Counts a request's queries and the time spent in them, and the time
+    spent rendering its response."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.render_seconds = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+# The timer of the request being handled. A context variable rather than a
+# wrapper on the request thread's connections, so queries an async view runs
+# through sync_to_async, on another thread's connection, are counted too.
+_request_timer = contextvars.ContextVar("see_food_request_timer", default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    timer = _request_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@contextlib.contextmanager
+def timing_render():
+    """Count the block as the current request's rendering time.
+
+    Renderers wrap their work in this, so a response is timed wherever it
+    is rendered: by the handler, or inside a view that caches its output.
+    A renderer that calls another is counted once.
+    """
+    timer = _request_timer.get()
+    if timer is None or timer.rendering:
+        yield
+        return
+    timer.rendering = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.render_seconds += time.perf_counter() - start
+        timer.rendering = False
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """``connection_created`` receiver adding ``time_query`` to every
+    connection, whichever thread opens it."""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class RequestMetricsMiddleware:
+    """Measure each request and feed the figures to ``request_metrics``.
+
+    Records wall time, database query count and time, response rendering
+    time and response size, and logs a warning when a request goes over
+    ``REQUEST_QUERY_BUDGET`` queries or ``REQUEST_LATENCY_BUDGET_MS``.
+    Works under both WSGI and ASGI without adapting async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = RequestTimer()
+        start = time.perf_counter()
+        with self.timing(timer):
+            response = self.get_response(request)
+        self.finish(request, response, time.perf_counter() - start, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = RequestTimer()
+        start = time.perf_counter()
+        with self.timing(timer):
+            response = await self.get_response(request)
+        self.finish(request, response, time.perf_counter() - start, timer)
+        return response
+
+    @contextlib.contextmanager
+    def timing(self, timer):
+        token = _request_timer.set(timer)
+        try:
+            yield
+        finally:
+            _request_timer.reset(token)
+
+    def finish(self, request, response, seconds, timer):
+        match = request.resolver_match
+        route = match.view_name if match else "unmatched"
+        measurements = {
+            "seconds": seconds,
+            "queries": timer.queries,
+            "db_seconds": timer.seconds,
+            "render_seconds": timer.render_seconds,
+            "bytes": None if response.streaming else len(response.content),
+        }
+        request_metrics.record(route, request.method, measurements)
+        self.check_budgets(request, route, measurements)
+
+    def check_budgets(self, request, route, measurements):
+        query_budget = getattr(settings, "REQUEST_QUERY_BUDGET", None)
+        latency_budget = getattr(settings, "REQUEST_LATENCY_BUDGET_MS", None)
+        milliseconds = measurements["seconds"] * 1000
+        if (query_budget is not None and measurements["queries"] > query_budget) or (
+            latency_budget is not None and milliseconds > latency_budget
+        ):
+            logger.warning(
+                "%s %s (%s) over budget: %d queries (%.1f ms in the database), "
+                "%.1f ms total.",
+                request.method,
+                request.path,
+                route,
+                measurements["queries"],
+                measurements["db_seconds"] * 1000,
+                milliseconds,
+            )
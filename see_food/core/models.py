@@ -1,7 +1,21 @@
+import hashlib
+import json
+import math
+import re
 import uuid
+from collections import defaultdict
+from datetime import datetime, time, timedelta
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser, Group, Permission
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncWeek
+from django.utils import timezone
+
+from .cache import bump_user_cache_version, forget_authenticated_user
+from .search import bump_catalog_version, food_index, normalize_text
 
 
 class User(AbstractUser):
@@ -27,6 +41,16 @@ class User(AbstractUser):
         related_query_name="user",
     )
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        forget_authenticated_user(self.pk)
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        forget_authenticated_user(pk)
+        return result
+
     def __str__(self):
         return self.username
 
@@ -43,15 +67,181 @@ class Meal(models.Model):
     total_protein = models.FloatField(blank=True, default=0.0)
     total_carbs = models.FloatField(blank=True, default=0.0)
     total_sugar = models.FloatField(blank=True, default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "time_of_consumption"], name="meal_user_time_idx"
+            ),
+            models.Index(fields=["user", "updated_at"], name="meal_user_updated_idx"),
+        ]
+
+    # Meal total field -> FoodComponent field it is summed from.
+    MACRO_FIELDS = {
+        "total_calories": "total_calories",
+        "total_fat": "fat",
+        "total_protein": "protein",
+        "total_carbs": "carbs",
+        "total_sugar": "sugar",
+    }
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._persisted_summary = instance._summary_snapshot()
+        return instance
+
+    def consumption_date(self):
+        """The day this meal counts towards, in the current time zone."""
+        field = self._meta.get_field("time_of_consumption")
+        consumed_at = field.to_python(self.time_of_consumption)
+        if timezone.is_naive(consumed_at):
+            consumed_at = timezone.make_aware(consumed_at)
+        return timezone.localdate(consumed_at)
+
+    def _summary_snapshot(self):
+        """Return ``((user_id, date), {total field: value})`` for this meal.
+
+        Returns None when any of the fields involved is deferred.
+        """
+        fields = {"user_id", "time_of_consumption", *self.MACRO_FIELDS}
+        if fields & self.get_deferred_fields():
+            return None
+        return (self.user_id, self.consumption_date()), {
+            total: getattr(self, total) or 0.0 for total in self.MACRO_FIELDS
+        }
+
+    def save(self, *args, **kwargs):
+        previous = None
+        if not self._state.adding:
+            previous = getattr(self, "_persisted_summary", None)
+            if previous is None:
+                persisted = Meal.objects.filter(pk=self.pk).first()
+                previous = persisted and persisted._persisted_summary
+        super().save(*args, **kwargs)
+
+        day, current = self._summary_snapshot()
+        if previous is None:
+            DailyNutritionSummary.apply_delta(*day, current, meal_count=1)
+        elif previous[0] == day:
+            DailyNutritionSummary.apply_delta(
+                *day, {total: current[total] - previous[1][total] for total in current}
+            )
+        else:
+            DailyNutritionSummary.apply_delta(
+                *previous[0],
+                {total: -value for total, value in previous[1].items()},
+                meal_count=-1,
+            )
+            DailyNutritionSummary.apply_delta(*day, current, meal_count=1)
+        self._persisted_summary = day, current
+        bump_user_cache_version(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        persisted = getattr(self, "_persisted_summary", None)
+        component_ids = list(self.foodcomponent_set.values_list("pk", flat=True))
+        result = super().delete(*args, **kwargs)
+        Tombstone.record(self.user_id, {Meal: [self.pk], FoodComponent: component_ids})
+        if persisted is None:
+            DailyNutritionSummary.rebuild(self.user_id, self.consumption_date())
+        else:
+            day, totals = persisted
+            DailyNutritionSummary.apply_delta(
+                *day, {total: -value for total, value in totals.items()}, meal_count=-1
+            )
+        bump_user_cache_version(self.user_id)
+        return result
 
     def recalculate_macros(self):
-        components = self.foodcomponent_set.all()
-        self.total_calories = sum(component.total_calories for component in components)
-        self.total_fat = sum(component.fat for component in components)
-        self.total_protein = sum(component.protein for component in components)
-        self.total_carbs = sum(component.carbs for component in components)
-        self.total_sugar = sum(component.sugar for component in components)
-        self.save()
+        """Rebuild the totals from scratch with a single aggregate query."""
+        totals = self.foodcomponent_set.aggregate(
+            **{
+                total: Coalesce(Sum(field), Value(0.0))
+                for total, field in self.MACRO_FIELDS.items()
+            }
+        )
+        Meal.objects.filter(pk=self.pk).update(**totals, updated_at=timezone.now())
+        for total, value in totals.items():
+            setattr(self, total, value)
+        DailyNutritionSummary.rebuild(self.user_id, self.consumption_date())
+        self._persisted_summary = self._summary_snapshot()
+        bump_user_cache_version(self.user_id)
+
+    @classmethod
+    def rebuild_macros(cls, queryset):
+        """Recompute the totals of every meal in ``queryset`` in one UPDATE.
+
+        Each total is a grouped ``Sum()`` over the meal's components, run by
+        the database. Daily summaries are left to the caller.
+        """
+        components = (
+            FoodComponent.objects.filter(meal=OuterRef("pk")).order_by().values("meal")
+        )
+        return queryset.update(
+            **{
+                total: Coalesce(
+                    Subquery(components.annotate(amount=Sum(field)).values("amount")),
+                    Value(0.0),
+                )
+                for total, field in cls.MACRO_FIELDS.items()
+            },
+            updated_at=timezone.now(),
+        )
+
+    @classmethod
+    def create_with_components(cls, meal, components):
+        """Save the unsaved ``meal`` together with its unsaved
+        ``components`` in one transaction.
+
+        The totals are summed up front, so the meal and its daily summary
+        are written once, and the components go in with a single
+        ``bulk_create`` instead of one save (and totals update) each. The
+        returned meal has its components prefetched.
+        """
+        for total, field in cls.MACRO_FIELDS.items():
+            setattr(
+                meal, total, sum(getattr(component, field) for component in components)
+            )
+        for component in components:
+            component.meal = meal
+        with transaction.atomic():
+            meal.save()
+            created = FoodComponent.objects.bulk_create(components)
+            Food.observe(meal.user_id, created)
+            ComponentNutrient.record(created)
+        for component in created:
+            component._persisted_macros = component._macro_snapshot()
+            component._persisted_micronutrients = component._micronutrient_snapshot()
+        prefetched = meal.foodcomponent_set.all()
+        prefetched._result_cache = created
+        prefetched._prefetch_done = True
+        meal._prefetched_objects_cache = {"foodcomponent_set": prefetched}
+        return meal
+
+    @classmethod
+    def apply_macro_delta(cls, meal_id, delta, meal=None):
+        """Shift a meal's stored totals by ``delta`` with a single UPDATE.
+
+        ``delta`` maps total fields to amounts; zero amounts are dropped and
+        nothing is written when none remain. ``meal``, if given, is an
+        in-memory instance that is kept in step with the row and saves
+        looking up the meal's day for the daily summary.
+        """
+        delta = {total: value for total, value in delta.items() if value}
+        if not delta:
+            return
+        cls.objects.filter(pk=meal_id).update(
+            **{total: F(total) + value for total, value in delta.items()},
+            updated_at=timezone.now(),
+        )
+        if meal is None:
+            meal = cls.objects.only("user", "time_of_consumption").get(pk=meal_id)
+        else:
+            for total, value in delta.items():
+                setattr(meal, total, getattr(meal, total) + value)
+            meal._persisted_summary = meal._summary_snapshot()
+        DailyNutritionSummary.apply_delta(meal.user_id, meal.consumption_date(), delta)
 
     def __str__(self):
         return f"{self.meal_name} for {self.user.username} at {self.time_of_consumption}"
@@ -71,16 +261,317 @@ class FoodComponent(models.Model):
     sugar = models.FloatField()
     micronutrients = models.JSONField(default=dict)
     total_calories = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at"], name="foodcomponent_updated_idx")
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._persisted_macros = instance._macro_snapshot()
+        instance._persisted_micronutrients = instance._micronutrient_snapshot()
+        return instance
+
+    def _micronutrient_snapshot(self):
+        """A copy of ``micronutrients``, or None when it is deferred."""
+        if "micronutrients" in self.get_deferred_fields():
+            return None
+        micronutrients = self.micronutrients
+        return dict(micronutrients) if isinstance(micronutrients, dict) else None
+
+    def _macro_snapshot(self):
+        """Return ``(meal_id, {meal total field: value})`` for this component.
+
+        Returns None when any of the fields involved is deferred.
+        """
+        fields = {"meal_id", *Meal.MACRO_FIELDS.values()}
+        if fields & self.get_deferred_fields():
+            return None
+        return self.meal_id, {
+            total: getattr(self, field) for total, field in Meal.MACRO_FIELDS.items()
+        }
+
+    def _cached_meal(self, meal_id):
+        if FoodComponent.meal.is_cached(self) and self.meal.pk == meal_id:
+            return self.meal
+        return None
 
     def save(self, *args, **kwargs):
+        previous = None
+        if not self._state.adding:
+            previous = getattr(self, "_persisted_macros", None)
+            if previous is None:
+                row = (
+                    FoodComponent.objects.filter(pk=self.pk)
+                    .values_list("meal_id", *Meal.MACRO_FIELDS.values())
+                    .first()
+                )
+                if row is not None:
+                    previous = row[0], dict(zip(Meal.MACRO_FIELDS, row[1:]))
+        adding = self._state.adding
+        micronutrients = self._micronutrient_snapshot()
         super().save(*args, **kwargs)
-        self.meal.recalculate_macros()
+        if adding:
+            Food.observe(self.meal.user_id, [self])
+        if adding or micronutrients != getattr(self, "_persisted_micronutrients", None):
+            ComponentNutrient.record([self], replace=not adding)
+        self._persisted_micronutrients = micronutrients
+
+        meal_id, current = self._macro_snapshot()
+        if previous is None:
+            delta = current
+        elif previous[0] == meal_id:
+            delta = {total: current[total] - previous[1][total] for total in current}
+        else:
+            # The component moved to another meal; take it off the old one.
+            Meal.apply_macro_delta(
+                previous[0], {total: -value for total, value in previous[1].items()}
+            )
+            delta = current
+        Meal.apply_macro_delta(meal_id, delta, self._cached_meal(meal_id))
+        self._persisted_macros = meal_id, current
+        bump_user_cache_version(self.meal.user_id)
+
+    @staticmethod
+    def observe_foods(components):
+        """``Food.observe`` ``components``, for each user they belong to."""
+        by_user = defaultdict(list)
+        for component in components:
+            by_user[component.meal.user_id].append(component)
+        for user_id, owned in by_user.items():
+            Food.observe(user_id, owned)
+
+    @classmethod
+    def bulk_create_with_totals(cls, components):
+        """Insert ``components`` in one transaction and update each touched
+        meal's totals with a single UPDATE."""
+        deltas = {}
+        for component in components:
+            meal_id, macros = component._macro_snapshot()
+            meal, meal_delta = deltas.setdefault(
+                meal_id,
+                (component._cached_meal(meal_id), dict.fromkeys(macros, 0.0)),
+            )
+            for total, value in macros.items():
+                meal_delta[total] += value
+        with transaction.atomic():
+            created = cls.objects.bulk_create(components)
+            for meal_id, (meal, delta) in deltas.items():
+                Meal.apply_macro_delta(meal_id, delta, meal)
+            FoodComponent.observe_foods(created)
+            ComponentNutrient.record(created)
+        for component in created:
+            component._persisted_macros = component._macro_snapshot()
+            component._persisted_micronutrients = component._micronutrient_snapshot()
+        user_ids = {meal.user_id for meal, _ in deltas.values() if meal is not None}
+        unresolved = [meal_id for meal_id, (meal, _) in deltas.items() if meal is None]
+        if unresolved:
+            user_ids.update(
+                Meal.objects.filter(pk__in=unresolved).values_list("user_id", flat=True)
+            )
+        for user_id in user_ids:
+            bump_user_cache_version(user_id)
+        return created
+
+    def delete(self, *args, **kwargs):
+        persisted = getattr(self, "_persisted_macros", None) or self._macro_snapshot()
+        result = super().delete(*args, **kwargs)
+        if persisted is None:
+            self.meal.recalculate_macros()
+        else:
+            meal_id, totals = persisted
+            Meal.apply_macro_delta(
+                meal_id,
+                {total: -value for total, value in totals.items()},
+                self._cached_meal(meal_id),
+            )
+        Tombstone.record(self.meal.user_id, {FoodComponent: [self.pk]})
+        bump_user_cache_version(self.meal.user_id)
+        return result
 
     def __str__(self):
         return f"{self.food_name} ({self.brand})"
 
 
+class ComponentNutrient(models.Model):
+    """One micronutrient amount of a food component.
+
+    Mirrors ``FoodComponent.micronutrients`` as rows the database can index
+    and aggregate, so a question like "days over 2300 of sodium" is a grouped
+    ``Sum()`` rather than a scan of every component's JSON. Rows are written
+    by component saves and bulk writes; ``rebuild_all`` and the
+    ``backfill_component_nutrients`` command recompute them from the JSON.
+    Amounts are stored in whatever unit the client logs each nutrient in.
+    """
+
+    component = models.ForeignKey(
+        FoodComponent, on_delete=models.CASCADE, related_name="nutrients"
+    )
+    nutrient_code = models.CharField(max_length=64)
+    amount = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["component", "nutrient_code"],
+                name="unique_component_nutrient",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["nutrient_code"], name="component_nutrient_code_idx")
+        ]
+
+    @staticmethod
+    def normalize_code(code):
+        """``"Vitamin C"`` -> ``"vitamin_c"``."""
+        return re.sub(r"[^a-z0-9]+", "_", str(code).lower()).strip("_")[:64]
+
+    @classmethod
+    def _rows(cls, component_id, micronutrients):
+        """Unsaved rows for one component's ``micronutrients`` JSON.
+
+        Entries without a finite numeric amount are skipped, and codes that
+        normalise to the same value are summed.
+        """
+        if not isinstance(micronutrients, dict):
+            return []
+        amounts = {}
+        for code, amount in micronutrients.items():
+            code = cls.normalize_code(code)
+            try:
+                amount = float(amount)
+            except (TypeError, ValueError):
+                continue
+            if code and math.isfinite(amount):
+                amounts[code] = amounts.get(code, 0.0) + amount
+        return [
+            cls(component_id=component_id, nutrient_code=code, amount=amount)
+            for code, amount in amounts.items()
+        ]
+
+    @classmethod
+    def record(cls, components, replace=False):
+        """Write the rows for ``components``, first dropping their existing
+        rows when ``replace`` is set. Returns the number of rows written."""
+        if replace:
+            cls.objects.filter(
+                component_id__in=[component.pk for component in components]
+            ).delete()
+        rows = [
+            row
+            for component in components
+            for row in cls._rows(component.pk, component.micronutrients)
+        ]
+        if rows:
+            cls.objects.bulk_create(rows, batch_size=500)
+        return len(rows)
+
+    @classmethod
+    def rebuild_all(cls, users=None, batch_size=2000):
+        """Recompute every row from the components' JSON, optionally only
+        for ``users``. Returns the number of rows written."""
+        components = FoodComponent.objects.all()
+        nutrients = cls.objects.all()
+        if users is not None:
+            components = components.filter(meal__user__in=users)
+            nutrients = nutrients.filter(component__meal__user__in=users)
+        written = 0
+        with transaction.atomic():
+            nutrients.delete()
+            rows = components.values_list("pk", "micronutrients").iterator(batch_size)
+            batch = []
+            for component_id, micronutrients in rows:
+                batch += cls._rows(component_id, micronutrients)
+                if len(batch) >= batch_size:
+                    written += len(cls.objects.bulk_create(batch))
+                    batch = []
+            written += len(cls.objects.bulk_create(batch))
+        return written
+
+    @classmethod
+    def for_user(cls, user, start=None, end=None, codes=None):
+        """``user``'s rows for meals eaten from ``start`` to ``end`` (dates,
+        inclusive), optionally only for the nutrient ``codes``."""
+        queryset = cls.objects.filter(component__meal__user=user)
+        if start is not None:
+            queryset = queryset.filter(
+                component__meal__time_of_consumption__gte=timezone.make_aware(
+                    datetime.combine(start, time.min)
+                )
+            )
+        if end is not None:
+            queryset = queryset.filter(
+                component__meal__time_of_consumption__lt=timezone.make_aware(
+                    datetime.combine(end + timedelta(days=1), time.min)
+                )
+            )
+        if codes:
+            queryset = queryset.filter(
+                nutrient_code__in=[cls.normalize_code(code) for code in codes]
+            )
+        return queryset
+
+    @classmethod
+    def totals(cls, queryset):
+        """Per nutrient: the total, the number of days and components it was
+        logged on, and the average per logged day."""
+        return (
+            queryset.values("nutrient_code")
+            .order_by("nutrient_code")
+            .annotate(
+                total=Sum("amount"),
+                days=Count(
+                    TruncDate("component__meal__time_of_consumption"), distinct=True
+                ),
+                components=Count("component", distinct=True),
+            )
+            .annotate(daily_average=F("total") / F("days"))
+        )
+
+    @classmethod
+    def daily(cls, queryset):
+        """Per day and nutrient, the amount eaten that day."""
+        return (
+            queryset.annotate(date=TruncDate("component__meal__time_of_consumption"))
+            .values("date", "nutrient_code")
+            .order_by("date", "nutrient_code")
+            .annotate(amount=Sum("amount"))
+        )
+
+    def __str__(self):
+        return f"{self.amount} {self.nutrient_code} in {self.component_id}"
+
+
+def _rounded(value):
+    """``value`` rounded to one decimal when it is a number, else as text."""
+    try:
+        return round(float(value), 1)
+    except (TypeError, ValueError, OverflowError):
+        return normalize_text(value)
+
+
+def _scaled(value, scale):
+    """``value * scale`` for numbers and numeric strings; anything else is
+    returned as is, for validation to reject or keep."""
+    if isinstance(value, bool):
+        return value
+    try:
+        return float(value) * scale
+    except (TypeError, ValueError):
+        return value
+
+
 class HistoricalMeal(models.Model):
+    """A meal the user can log again.
+
+    Each user keeps one row per distinct meal: ``content_hash`` identifies
+    the normalised name and set of foods, and ``upsert`` counts a repeat in
+    ``use_count`` and ``last_used`` instead of storing another copy.
+    """
+
     historical_id = models.UUIDField(
         primary_key=True, default=uuid.uuid4, editable=False
     )
@@ -88,6 +579,177 @@ class HistoricalMeal(models.Model):
     meal_name = models.CharField(max_length=255)
     food_components = models.JSONField(default=list)
     brand_preferences = models.JSONField(default=dict)
+    content_hash = models.CharField(max_length=64, editable=False)
+    use_count = models.PositiveIntegerField(default=1)
+    last_used = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "content_hash"], name="unique_historical_meal"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-use_count", "-last_used"],
+                name="historical_meal_frequent_idx",
+            ),
+            models.Index(
+                fields=["user", "-last_used"], name="historical_meal_recent_idx"
+            ),
+            models.Index(
+                fields=["user", "updated_at"], name="historical_meal_updated_idx"
+            ),
+        ]
+
+    def compute_content_hash(self):
+        """Hash of the normalised meal name and the set of (food, brand,
+        weight) in ``food_components``; order and macros are ignored."""
+        components = sorted(
+            [
+                normalize_text(component.get("food_name")),
+                normalize_text(component.get("brand")),
+                _rounded(component.get("weight")),
+            ]
+            for component in self.catalog_entries()
+        )
+        encoded = json.dumps([normalize_text(self.meal_name), components])
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    @classmethod
+    def upsert(cls, user, meal_name, food_components=None, brand_preferences=None):
+        """Store a historical meal for ``user``, or count another use of the
+        identical one they already have. Returns ``(meal, created)``."""
+        meal = cls(
+            user=user,
+            meal_name=meal_name,
+            food_components=food_components or [],
+            brand_preferences=brand_preferences or {},
+        )
+        meal.content_hash = meal.compute_content_hash()
+        for _ in range(2):
+            existing = cls.objects.filter(
+                user=user, content_hash=meal.content_hash
+            ).first()
+            if existing is not None:
+                existing.mark_used()
+                return existing, False
+            try:
+                with transaction.atomic():
+                    meal.save()
+                return meal, True
+            except IntegrityError:
+                # Lost a race with an identical upsert; count a use of it.
+                continue
+        raise IntegrityError("Could not store or find the historical meal.")
+
+    @classmethod
+    def deduplicate(cls, users=None):
+        """Recompute every content hash and merge meals that turn out to be
+        identical into their most recently used copy, summing their use
+        counts. Returns the number of meals removed."""
+        meals = cls.objects.order_by("-last_used")
+        if users is not None:
+            meals = meals.filter(user__in=users)
+        kept, duplicates = {}, {}
+        now = timezone.now()
+        for meal in meals.iterator():
+            key = meal.user_id, meal.compute_content_hash()
+            if key in kept:
+                kept[key].use_count += meal.use_count
+                duplicates.setdefault(meal.user_id, []).append(meal.pk)
+            else:
+                meal.content_hash = key[1]
+                meal.updated_at = now
+                kept[key] = meal
+        with transaction.atomic():
+            for user_id, pks in duplicates.items():
+                cls.objects.filter(pk__in=pks).delete()
+                Tombstone.record(user_id, {cls: pks})
+            cls.objects.bulk_update(
+                kept.values(),
+                ["content_hash", "use_count", "updated_at"],
+                batch_size=500,
+            )
+        for user_id in {user_id for user_id, _ in kept}:
+            bump_user_cache_version(user_id)
+        return sum(len(pks) for pks in duplicates.values())
+
+    def mark_used(self):
+        """Count one more use, now, with a single UPDATE."""
+        self.last_used = self.updated_at = timezone.now()
+        HistoricalMeal.objects.filter(pk=self.pk).update(
+            use_count=F("use_count") + 1,
+            last_used=self.last_used,
+            updated_at=self.updated_at,
+        )
+        self.use_count += 1
+        bump_user_cache_version(self.user_id)
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        self.content_hash = self.compute_content_hash()
+        super().save(*args, **kwargs)
+        if adding:
+            Food.observe(self.user_id, self.catalog_entries())
+        bump_user_cache_version(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        Tombstone.record(self.user_id, {HistoricalMeal: [pk]})
+        bump_user_cache_version(self.user_id)
+        return result
+
+    def catalog_entries(self):
+        """The well-formed entries of ``food_components`` as catalog input."""
+        return [
+            component
+            for component in self.food_components or []
+            if isinstance(component, dict) and component.get("food_name")
+        ]
+
+    # Component fields that scale with the portion size.
+    SCALED_FIELDS = ("weight", *Meal.MACRO_FIELDS.values())
+
+    def scaled_components(self, scale=1.0):
+        """``catalog_entries`` with weights, macros and numeric
+        micronutrients multiplied by ``scale``."""
+        components = []
+        for component in self.catalog_entries():
+            component = dict(component)
+            for field in self.SCALED_FIELDS:
+                if field in component:
+                    component[field] = _scaled(component[field], scale)
+            micronutrients = component.get("micronutrients")
+            if isinstance(micronutrients, dict):
+                component["micronutrients"] = {
+                    code: _scaled(amount, scale)
+                    for code, amount in micronutrients.items()
+                }
+            components.append(component)
+        return components
+
+    @classmethod
+    def brand_weights(cls, user):
+        """Sum ``user``'s brand preferences over all their historical meals,
+        each counted once per use, keyed by normalised brand."""
+        weights = {}
+        preferences = cls.objects.filter(user=user).values_list(
+            "brand_preferences", "use_count"
+        )
+        for brand_preferences, use_count in preferences:
+            if not isinstance(brand_preferences, dict):
+                continue
+            for brand, weight in brand_preferences.items():
+                try:
+                    weight = float(weight) * use_count
+                except (TypeError, ValueError):
+                    continue
+                brand = normalize_text(brand)
+                weights[brand] = weights.get(brand, 0.0) + weight
+        return weights
 
     def __str__(self):
         return f"Historical {self.meal_name} for {self.user.username}"
@@ -101,6 +763,466 @@ class UserGoals(models.Model):
     calorie_goal = models.IntegerField(default=0)
     weight_goal = models.IntegerField(default=0)
     summary = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        bump_user_cache_version(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        Tombstone.record(self.user_id, {UserGoals: [pk]})
+        bump_user_cache_version(self.user_id)
+        return result
 
     def __str__(self):
         return f"{self.user.username}'s goals"
+
+
+class Tombstone(models.Model):
+    """Marks a deleted row so ``/api/sync/`` can tell clients to drop it.
+
+    Written by the ``delete`` of every synced model. Tombstones older than
+    ``SYNC_TOMBSTONE_DAYS`` are removed by ``prune_tombstones``; clients
+    that last synced before then get a full snapshot instead.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="tombstones")
+    model = models.CharField(max_length=32)
+    object_id = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "deleted_at"], name="tombstone_user_deleted_idx"
+            )
+        ]
+
+    @classmethod
+    def record(cls, user_id, deleted):
+        """Record the deletion of ``deleted``, a dict of model class -> primary
+        keys, for ``user_id`` with a single INSERT."""
+        rows = [
+            cls(user_id=user_id, model=model._meta.model_name, object_id=str(pk))
+            for model, pks in deleted.items()
+            for pk in pks
+        ]
+        if rows:
+            cls.objects.bulk_create(rows)
+
+    @classmethod
+    def prune(cls, before):
+        """Delete tombstones older than ``before``; returns how many."""
+        return cls.objects.filter(deleted_at__lt=before).delete()[0]
+
+    def __str__(self):
+        return f"Deleted {self.model} {self.object_id}"
+
+
+class Food(models.Model):
+    """An entry in a user's food catalog, with macros normalised to 100 g.
+
+    Each user's catalog is fed from their logged food components and
+    historical meals and backs their autocomplete search in ``core.search``.
+    """
+
+    food_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="foods")
+    name = models.CharField(max_length=255)
+    brand = models.CharField(max_length=255, blank=True)
+    normalized_name = models.CharField(max_length=255, editable=False)
+    normalized_brand = models.CharField(max_length=255, blank=True, editable=False)
+    calories_per_100g = models.FloatField(default=0.0)
+    fat_per_100g = models.FloatField(default=0.0)
+    protein_per_100g = models.FloatField(default=0.0)
+    carbs_per_100g = models.FloatField(default=0.0)
+    sugar_per_100g = models.FloatField(default=0.0)
+    use_count = models.PositiveIntegerField(default=0)
+
+    # Food field -> FoodComponent field it is derived from.
+    PER_100G_FIELDS = {
+        "calories_per_100g": "total_calories",
+        "fat_per_100g": "fat",
+        "protein_per_100g": "protein",
+        "carbs_per_100g": "carbs",
+        "sugar_per_100g": "sugar",
+    }
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "normalized_name", "normalized_brand"],
+                name="unique_food_per_user",
+            )
+        ]
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_text(self.name)
+        self.normalized_brand = normalize_text(self.brand)
+        super().save(*args, **kwargs)
+        Food._publish(self.user_id, [self])
+
+    @staticmethod
+    def _publish(user_id, foods):
+        """Add ``foods`` to the search index once they are committed."""
+
+        def publish():
+            food_index.add(user_id, foods, bump_catalog_version(user_id))
+
+        transaction.on_commit(publish)
+
+    @staticmethod
+    def _from_component(component):
+        """Build an unsaved Food from a FoodComponent or a component dict."""
+        if not isinstance(component, dict):
+            fields = ["food_name", "brand", "weight", *Food.PER_100G_FIELDS.values()]
+            component = {field: getattr(component, field) for field in fields}
+        get = component.get
+        name = str(get("food_name") or "").strip()
+        if not name:
+            return None
+        food = Food(name=name[:255], brand=str(get("brand") or "").strip()[:255])
+        food.normalized_name = normalize_text(food.name)
+        food.normalized_brand = normalize_text(food.brand)
+        try:
+            weight = float(get("weight") or 0)
+            per_100g = {
+                field: float(get(source) or 0) * 100 / weight if weight > 0 else 0.0
+                for field, source in Food.PER_100G_FIELDS.items()
+            }
+        except (TypeError, ValueError):
+            per_100g = {}
+        for field, value in per_100g.items():
+            setattr(food, field, value)
+        return food
+
+    @classmethod
+    def observe(cls, user_id, components):
+        """Record that ``user_id`` logged ``components``.
+
+        Unknown foods are added to the user's catalog and known ones have
+        their use count raised, in a constant number of queries for the
+        whole batch.
+        """
+        seen = {}
+        for component in components:
+            food = cls._from_component(component)
+            if food is None:
+                continue
+            food.user_id = user_id
+            key = food.normalized_name, food.normalized_brand
+            if key in seen:
+                seen[key].use_count += 1
+            else:
+                food.use_count = 1
+                seen[key] = food
+        if not seen:
+            return
+
+        names = {name for name, _ in seen}
+        stored = {
+            (food.normalized_name, food.normalized_brand): food
+            for food in cls.objects.filter(user_id=user_id, normalized_name__in=names)
+        }
+        new_foods = [food for key, food in seen.items() if key not in stored]
+        if new_foods:
+            # A concurrent request may insert the same food first; read the
+            # stored rows back so its id, not our discarded one, is counted
+            # and indexed.
+            cls.objects.bulk_create(new_foods, ignore_conflicts=True)
+            stored.update(
+                ((food.normalized_name, food.normalized_brand), food)
+                for food in cls.objects.filter(
+                    user_id=user_id,
+                    normalized_name__in={food.normalized_name for food in new_foods},
+                )
+            )
+
+        increments = {}
+        for key, food in seen.items():
+            if stored[key].pk != food.pk:
+                increments.setdefault(food.use_count, []).append(stored[key].pk)
+                stored[key].use_count += food.use_count
+        for increment, pks in increments.items():
+            cls.objects.filter(pk__in=pks).update(use_count=F("use_count") + increment)
+
+        cls._publish(user_id, [stored[key] for key in seen])
+
+    def __str__(self):
+        return f"{self.name} ({self.brand})" if self.brand else self.name
+
+
+class DailyNutritionSummary(models.Model):
+    """Per-user, per-day meal totals, kept up to date as meals change.
+
+    Rows are maintained incrementally by ``Meal`` and ``FoodComponent``
+    writes; ``rebuild`` recomputes a day from its meals and the
+    ``backfill_daily_summaries`` command recomputes everything.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="daily_summaries"
+    )
+    date = models.DateField()
+    meal_count = models.IntegerField(default=0)
+    total_calories = models.FloatField(default=0.0)
+    total_fat = models.FloatField(default=0.0)
+    total_protein = models.FloatField(default=0.0)
+    total_carbs = models.FloatField(default=0.0)
+    total_sugar = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "date"], name="unique_daily_summary_per_user"
+            )
+        ]
+        ordering = ["date"]
+
+    @classmethod
+    def apply_delta(cls, user_id, date, delta, meal_count=0):
+        """Shift one day's totals by ``delta`` with a single UPDATE.
+
+        Falls back to ``rebuild`` when the row does not exist yet, which also
+        covers days that predate the summary table.
+        """
+        delta = {total: value for total, value in delta.items() if value}
+        if meal_count:
+            delta["meal_count"] = meal_count
+        if not delta:
+            return
+        updated = cls.objects.filter(user_id=user_id, date=date).update(
+            **{field: F(field) + value for field, value in delta.items()}
+        )
+        if not updated:
+            cls.rebuild(user_id, date)
+        elif meal_count < 0:
+            cls.objects.filter(user_id=user_id, date=date, meal_count__lte=0).delete()
+
+    @classmethod
+    def _aggregates(cls):
+        return {
+            "meal_count": Count("pk"),
+            **{total: Coalesce(Sum(total), Value(0.0)) for total in Meal.MACRO_FIELDS},
+        }
+
+    @classmethod
+    def rebuild(cls, user_id, date):
+        """Recompute one day from its meals."""
+        totals = Meal.objects.filter(
+            user_id=user_id, time_of_consumption__date=date
+        ).aggregate(**cls._aggregates())
+        if totals["meal_count"]:
+            if not cls.objects.filter(user_id=user_id, date=date).update(**totals):
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(user_id=user_id, date=date, **totals)
+                except IntegrityError:
+                    # A concurrent first write for the day created the row;
+                    # recount so its meals are included too.
+                    cls.rebuild(user_id, date)
+        else:
+            cls.objects.filter(user_id=user_id, date=date).delete()
+
+    @classmethod
+    def rebuild_all(cls, users=None):
+        """Recompute every summary row, optionally only for ``users``.
+
+        Returns the number of rows written.
+        """
+        meals = Meal.objects.all()
+        summaries = cls.objects.all()
+        if users is not None:
+            meals = meals.filter(user__in=users)
+            summaries = summaries.filter(user__in=users)
+        rows = (
+            meals.annotate(date=TruncDate("time_of_consumption"))
+            .values("user_id", "date")
+            .order_by()
+            .annotate(**cls._aggregates())
+        )
+        with transaction.atomic():
+            summaries.delete()
+            created = cls.objects.bulk_create(
+                (cls(**row) for row in rows.iterator()), batch_size=500
+            )
+        return len(created)
+
+    @classmethod
+    def weekly(cls, queryset):
+        """Roll daily rows in ``queryset`` up into weeks starting on Monday."""
+        return (
+            queryset.annotate(week=TruncWeek("date"))
+            .values("week")
+            .order_by("week")
+            .annotate(
+                days=Count("pk"),
+                meal_count=Sum("meal_count"),
+                **{total: Sum(total) for total in Meal.MACRO_FIELDS},
+            )
+        )
+
+    def __str__(self):
+        return f"{self.user.username}'s summary for {self.date}"
+
+
+class Job(models.Model):
+    """A unit of deferred work, run by ``manage.py run_workers``.
+
+    ``enqueue`` hands back the existing job when an identical one is still
+    waiting, so repeated requests for the same work collapse into one run.
+    Failed jobs are retried with exponential backoff up to ``max_attempts``,
+    and a running job whose worker has not finished it within
+    ``JOB_LEASE_SECONDS`` is assumed lost and counted as a failed attempt.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+    # Seconds before the first retry; doubled for each further attempt.
+    RETRY_DELAY = 5
+
+    job_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name="jobs"
+    )
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    dedupe_key = models.CharField(max_length=64, editable=False)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=64, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Retries are excluded so one never collides with a fresh
+            # duplicate.
+            models.UniqueConstraint(
+                fields=["dedupe_key"],
+                condition=Q(status="pending", attempts=0),
+                name="unique_waiting_job",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_status_due_idx")
+        ]
+
+    @staticmethod
+    def make_dedupe_key(kind, payload, user_id=None):
+        encoded = json.dumps(
+            [kind, str(user_id or ""), payload], sort_keys=True, cls=DjangoJSONEncoder
+        )
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    @classmethod
+    def enqueue(cls, kind, payload=None, user=None, max_attempts=3):
+        """Queue ``kind`` with ``payload``, or return the identical job that
+        is already waiting."""
+        payload = payload or {}
+        key = cls.make_dedupe_key(kind, payload, user and user.pk)
+        waiting = cls.objects.filter(dedupe_key=key, status=cls.PENDING, attempts=0)
+        job = waiting.first()
+        if job is not None:
+            return job
+        try:
+            with transaction.atomic():
+                return cls.objects.create(
+                    user=user,
+                    kind=kind,
+                    payload=payload,
+                    dedupe_key=key,
+                    max_attempts=max_attempts,
+                )
+        except IntegrityError:
+            # Lost a race with an identical enqueue.
+            return cls.objects.filter(dedupe_key=key).order_by("-created_at").first()
+
+    @classmethod
+    def reclaim_expired(cls):
+        """Requeue running jobs whose lease has run out, or fail them after
+        their last attempt. Returns the number of jobs reclaimed.
+
+        A job's lease runs out when its worker crashed or was killed before
+        recording the outcome, which would otherwise leave it running forever.
+        """
+        now = timezone.now()
+        expired = cls.objects.filter(
+            status=cls.RUNNING,
+            claimed_at__lt=now - timedelta(seconds=settings.JOB_LEASE_SECONDS),
+        )
+        error = "The worker's lease expired before the job finished."
+        retried = expired.filter(attempts__lt=F("max_attempts")).update(
+            status=cls.PENDING, run_after=now, error=error
+        )
+        failed = expired.update(status=cls.FAILED, finished_at=now, error=error)
+        return retried + failed
+
+    @classmethod
+    def claim(cls, limit, worker):
+        """Mark up to ``limit`` due jobs as running for ``worker`` and return
+        them, oldest first.
+
+        The conditional UPDATE lets any number of workers poll the table
+        without running a job twice. Jobs whose lease has expired are
+        reclaimed first.
+        """
+        cls.reclaim_expired()
+        now = timezone.now()
+        due = (
+            cls.objects.filter(status=cls.PENDING, run_after__lte=now)
+            .order_by("run_after")
+            .values_list("pk", flat=True)[:limit]
+        )
+        claimed = cls.objects.filter(pk__in=list(due), status=cls.PENDING).update(
+            status=cls.RUNNING,
+            worker=worker,
+            claimed_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if not claimed:
+            return []
+        return list(
+            cls.objects.filter(
+                status=cls.RUNNING, worker=worker, claimed_at=now
+            ).order_by("run_after")
+        )
+
+    def succeed(self, result=None):
+        self.status = self.SUCCEEDED
+        self.result = result
+        self.error = ""
+        self.finished_at = timezone.now()
+        self.save(update_fields=["status", "result", "error", "finished_at"])
+
+    def fail(self, error):
+        """Record ``error`` and schedule a retry, or give up after the last
+        attempt."""
+        self.error = str(error)
+        if self.attempts < self.max_attempts:
+            self.status = self.PENDING
+            self.run_after = timezone.now() + timedelta(
+                seconds=self.RETRY_DELAY * 2 ** (self.attempts - 1)
+            )
+        else:
+            self.status = self.FAILED
+            self.finished_at = timezone.now()
+        self.save(update_fields=["status", "error", "run_after", "finished_at"])
+
+    def __str__(self):
+        return f"{self.kind} job {self.job_id} ({self.status})"
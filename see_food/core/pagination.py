@@ -0,0 +1,24 @@
+from rest_framework.pagination import CursorPagination
+
+
+class MealCursorPagination(CursorPagination):
+    """Keyset pagination over a user's meals, newest first.
+
+    Each page is a range scan on the (user, time_of_consumption) index, so
+    its cost does not grow with the length of the user's history.
+    """
+
+    ordering = ("-time_of_consumption", "-meal_id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class HistoricalMealCursorPagination(CursorPagination):
+    """Keyset pagination over a user's historical meals, most recently used
+    first, along the (user, last_used) index."""
+
+    ordering = ("-last_used", "-historical_id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
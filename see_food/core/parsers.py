@@ -0,0 +1,23 @@
+import codecs
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, get_encoding
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` backed by orjson when it is installed. It rejects NaN
+    and infinities like DRF's strict parser; bodies in an encoding other
+    than UTF-8, or a non-strict configuration, use the standard library."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = codecs.lookup(get_encoding(parser_context or {})).name
+        if orjson is None or not self.strict or encoding != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
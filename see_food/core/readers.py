@@ -0,0 +1,114 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .models import FoodComponent
+from .serializers import FoodComponentSerializer, MealSerializer
+
+# Fields whose database value differs from their representation.
+CONVERTED_FIELDS = (
+    serializers.DateTimeField,
+    serializers.DateField,
+    serializers.DecimalField,
+    serializers.UUIDField,
+)
+
+
+def _iso_datetime(zone):
+    """``DateTimeField.to_representation`` for ISO 8601 output in ``zone``,
+    without looking the current timezone up again for every value."""
+
+    def convert(value):
+        value = value.astimezone(zone).isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return convert
+
+
+class ValuesReader:
+    """Builds the data ``serializer_class(many=True)`` would, from
+    ``QuerySet.values()`` rows instead of model instances.
+
+    Only the serializer's readable model columns are read. Values whose
+    representation differs from the database value (datetimes, UUIDs, ...)
+    are converted by the serializer's own fields; the rest are passed
+    through, relations as primary keys. Nested serializers named in
+    ``nested`` are left to the caller.
+    """
+
+    def __init__(self, serializer_class, nested=()):
+        readable = {
+            name: field
+            for name, field in serializer_class().fields.items()
+            if not field.write_only
+        }
+        self.names = list(readable)
+        fields = {name: field for name, field in readable.items() if name not in nested}
+        self.columns = [field.source for field in fields.values()]
+        self.converted = {
+            name: field
+            for name, field in fields.items()
+            if isinstance(field, CONVERTED_FIELDS)
+        }
+
+    def values(self, queryset):
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def converters(self):
+        zone = timezone.get_current_timezone() if settings.USE_TZ else None
+        converters = []
+        for name, field in self.converted.items():
+            convert = field.to_representation
+            if (
+                type(field) is serializers.DateTimeField
+                and zone is not None
+                and not hasattr(field, "timezone")
+                and getattr(field, "format", api_settings.DATETIME_FORMAT) == ISO_8601
+            ):
+                convert = _iso_datetime(zone)
+            converters.append((name, convert))
+        return converters
+
+    def represent(self, rows, nested=None):
+        """Return converted copies of ``rows``. The rows themselves are left
+        as read, so paginators can still take positions from them.
+
+        ``nested`` maps a row to the values of its nested fields, which are
+        put where the serializer would put them.
+        """
+        converters = self.converters()
+        data = []
+        for row in rows:
+            item = dict(row)
+            for name, convert in converters:
+                if item[name] is not None:
+                    item[name] = convert(item[name])
+            if nested is not None:
+                item.update(nested(row))
+                item = {name: item[name] for name in self.names}
+            data.append(item)
+        return data
+
+    def data(self, queryset):
+        return self.represent(self.values(queryset))
+
+
+meal_reader = ValuesReader(MealSerializer, nested=("food_components",))
+component_reader = ValuesReader(FoodComponentSerializer)
+
+
+def meals_with_components(rows):
+    """Represent meal ``rows`` from ``meal_reader.values()`` with their food
+    components, fetched in one query, under ``food_components``."""
+    components = defaultdict(list)
+    queryset = FoodComponent.objects.filter(
+        meal_id__in=[row["meal_id"] for row in rows]
+    )
+    for component in component_reader.data(queryset):
+        components[component["meal"]].append(component)
+    return meal_reader.represent(
+        rows, lambda row: {"food_components": components[row["meal_id"]]}
+    )
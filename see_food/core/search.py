@@ -0,0 +1,242 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+
+WORD_RE = re.compile(r"\w+")
+
+# Share of a query's trigrams a name must contain to count as a fuzzy match.
+FUZZY_THRESHOLD = 0.4
+
+
+def normalize_text(value):
+    """Lower-case ``value`` and collapse its whitespace."""
+    return " ".join(str(value or "").lower().split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _catalog_version_key(user_id):
+    return f"see_food:food-catalog-version:{user_id}"
+
+
+def catalog_version(user_id):
+    """Return the current version of ``user_id``'s food catalog.
+
+    Like the response cache version, a missing counter starts from the
+    clock so it never repeats a version some process already loaded.
+    """
+    cache = _cache()
+    key = _catalog_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_catalog_version(user_id):
+    """Mark ``user_id``'s catalog as changed and return the new version."""
+    cache = _cache()
+    key = _catalog_version_key(user_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+class _Catalog:
+    """One user's foods: entries by ``(normalized_name, normalized_brand)``,
+    a sorted ``(word, key)`` list and a trigram index."""
+
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.entries = {}
+        self.words = []
+        self.trigrams = defaultdict(set)
+
+    @classmethod
+    def load(cls, user_id, version):
+        from .models import Food
+
+        catalog = cls(version)
+        words = []
+        for food in Food.objects.filter(user_id=user_id).iterator(chunk_size=2000):
+            words += catalog._index(food)
+        words.sort()
+        catalog.words = words
+        return catalog
+
+    def _index(self, food):
+        """Store ``food``'s entry. Returns the ``(word, key)`` pairs to add
+        to ``words`` if the food is new to the catalog."""
+        key = food.normalized_name, food.normalized_brand
+        new = key not in self.entries
+        self.entries[key] = {
+            "food_id": food.food_id,
+            "name": food.name,
+            "brand": food.brand,
+            "calories_per_100g": food.calories_per_100g,
+            "fat_per_100g": food.fat_per_100g,
+            "protein_per_100g": food.protein_per_100g,
+            "carbs_per_100g": food.carbs_per_100g,
+            "sugar_per_100g": food.sugar_per_100g,
+            "use_count": food.use_count,
+        }
+        if not new:
+            return []
+        for trigram in trigrams(food.normalized_name):
+            self.trigrams[trigram].add(key)
+        return [(word, key) for word in set(WORD_RE.findall(food.normalized_name))]
+
+    def insert(self, foods):
+        for food in foods:
+            for pair in self._index(food):
+                bisect.insort(self.words, pair)
+
+    def prefix_keys(self, prefix):
+        keys = set()
+        index = bisect.bisect_left(self.words, (prefix,))
+        while index < len(self.words) and self.words[index][0].startswith(prefix):
+            keys.add(self.words[index][1])
+            index += 1
+        return keys
+
+    def fuzzy_keys(self, query):
+        query_trigrams = trigrams(query)
+        counts = Counter()
+        for trigram in query_trigrams:
+            counts.update(self.trigrams.get(trigram, ()))
+        needed = FUZZY_THRESHOLD * len(query_trigrams)
+        return {key for key, count in counts.items() if count >= needed}
+
+
+class FoodSearchIndex:
+    """In-process autocomplete index over each user's ``Food`` catalog.
+
+    Prefix lookups bisect a sorted list of ``(word, key)`` pairs, which is a
+    flattened trie over every word of every food name. When prefixes find
+    too few foods, a trigram index supplies fuzzy matches for typos.
+
+    A user's catalog loads on their first search and is kept current by
+    ``add``, which ``Food.observe`` calls once its transaction commits. The
+    catalog is reloaded when its version in the cache moved on without this
+    process (another worker committed foods) or after ``FOOD_INDEX_TTL``
+    seconds, for caches that are not shared between processes. At most
+    ``FOOD_INDEX_MAX_USERS`` catalogs are kept, least recently used first
+    out.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        """Drop everything; the next searches reload from the database."""
+        with self._lock:
+            self._catalogs = OrderedDict()
+
+    def _current(self, catalog, version):
+        ttl = getattr(settings, "FOOD_INDEX_TTL", 300)
+        return (
+            catalog is not None
+            and catalog.version == version
+            and time.monotonic() - catalog.loaded_at <= ttl
+        )
+
+    def _catalog(self, user_id):
+        """Return ``user_id``'s catalog, loading it if it is missing or out
+        of date. The database is read without holding the lock, so one
+        user's load does not hold up everyone else's searches."""
+        version = catalog_version(user_id)
+        with self._lock:
+            catalog = self._catalogs.get(user_id)
+            if self._current(catalog, version):
+                self._catalogs.move_to_end(user_id)
+                return catalog
+
+        loaded = _Catalog.load(user_id, version)
+        with self._lock:
+            # Keep a catalog another thread installed, or ``add`` moved on,
+            # while this one was loading.
+            catalog = self._catalogs.get(user_id)
+            if (
+                catalog is None
+                or catalog.version < version
+                or not self._current(catalog, catalog.version)
+            ):
+                catalog = self._catalogs[user_id] = loaded
+            self._catalogs.move_to_end(user_id)
+            while len(self._catalogs) > getattr(settings, "FOOD_INDEX_MAX_USERS", 1000):
+                self._catalogs.popitem(last=False)
+            return catalog
+
+    def add(self, user_id, foods, version):
+        """Add or refresh committed ``foods``, which moved ``user_id``'s
+        catalog to ``version``. If other changes came in between, the
+        catalog is dropped and reloads on its next search instead."""
+        with self._lock:
+            catalog = self._catalogs.get(user_id)
+            if catalog is None:
+                return
+            if catalog.version != version - 1:
+                del self._catalogs[user_id]
+                return
+            catalog.insert(foods)
+            catalog.version = version
+
+    def search(self, user_id, query, brand_weights=None, limit=10):
+        """Return up to ``limit`` of ``user_id``'s foods matching ``query``.
+
+        Every word of the query must prefix a word of the food name; fuzzy
+        matches only fill the remaining slots. Results are ranked by prefix
+        match, then by ``brand_weights`` (normalised brand -> weight), then
+        by how often the food has been logged.
+        """
+        query = normalize_text(query)
+        words = WORD_RE.findall(query)
+        if not words:
+            return []
+        brand_weights = brand_weights or {}
+
+        catalog = self._catalog(user_id)
+        with self._lock:
+            matches = None
+            for word in words:
+                keys = catalog.prefix_keys(word)
+                matches = keys if matches is None else matches & keys
+            fuzzy = set()
+            if len(matches) < limit and len(query) >= 3:
+                fuzzy = catalog.fuzzy_keys(query) - matches
+
+            def rank(key):
+                entry = catalog.entries[key]
+                return (
+                    key not in matches,
+                    -brand_weights.get(key[1], 0),
+                    -entry["use_count"],
+                    len(key[0]),
+                    key,
+                )
+
+            best = heapq.nsmallest(limit, matches | fuzzy, key=rank)
+            return [dict(catalog.entries[key]) for key in best]
+
+
+food_index = FoodSearchIndex()
@@ -1,8 +1,19 @@
 import logging
+import uuid
 
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import User, Meal, FoodComponent, HistoricalMeal, UserGoals
+from .models import (
+    User,
+    Meal,
+    FoodComponent,
+    HistoricalMeal,
+    UserGoals,
+    DailyNutritionSummary,
+    Food,
+    Job,
+)
 
 logger = logging.getLogger("see_food")
 
@@ -18,7 +29,7 @@ class UserSerializer(serializers.ModelSerializer):
             username=validated_data["username"], email=validated_data["email"]
         )
         user.set_password(validated_data["password"])
-        logger.debug(f"Creating user with username: {user.username}")
+        logger.debug("Creating user with username: %s", user.username)
         user.save()
         return user
 
@@ -28,29 +39,136 @@ class UserSerializer(serializers.ModelSerializer):
         password = validated_data.get("password", None)
         if password:
             instance.set_password(password)
-            logger.debug(f"Updating user with username: {instance.username}")
+            logger.debug("Updating user with username: %s", instance.username)
         instance.save()
         return instance
 
 
+class MealPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves meals from a ``meals`` dict in the serializer context when one
+    is given, so bulk writes do not issue one SELECT per row."""
+
+    def to_internal_value(self, data):
+        meals = self.context.get("meals")
+        if meals is None:
+            return super().to_internal_value(data)
+        try:
+            return meals[uuid.UUID(str(data))]
+        except (KeyError, ValueError):
+            self.fail("does_not_exist", pk_value=data)
+
+
 class FoodComponentSerializer(serializers.ModelSerializer):
+    meal = MealPrimaryKeyRelatedField(queryset=Meal.objects.all())
+
     class Meta:
         model = FoodComponent
         fields = "__all__"
 
 
 class MealSerializer(serializers.ModelSerializer):
-    food_components = FoodComponentSerializer(many=True, read_only=True)
+    food_components = FoodComponentSerializer(
+        source="foodcomponent_set", many=True, read_only=True
+    )
 
     class Meta:
         model = Meal
         fields = "__all__"
+        # Totals are summed from the components and shifted as they change,
+        # so a client-sent value would skew every later update.
+        read_only_fields = list(Meal.MACRO_FIELDS)
+
+
+class MealSyncSerializer(serializers.ModelSerializer):
+    """A meal without its components, which sync sends separately."""
+
+    class Meta:
+        model = Meal
+        fields = "__all__"
+
+
+class MealCreateSerializer(MealSerializer):
+    """Takes the meal's user from the request, so validation runs without
+    touching the database."""
+
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+
+
+class FoodComponentImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FoodComponent
+        fields = [
+            "food_name",
+            "brand",
+            "weight",
+            "fat",
+            "protein",
+            "carbs",
+            "sugar",
+            "micronutrients",
+            "total_calories",
+        ]
+
+
+class MealImportSerializer(serializers.ModelSerializer):
+    """Validates one imported meal. Totals are computed from the components,
+    so they are not accepted here."""
+
+    food_components = FoodComponentImportSerializer(many=True, required=False)
+
+    class Meta:
+        model = Meal
+        fields = [
+            "meal_name",
+            "time_of_consumption",
+            "hunger_level",
+            "exercise",
+            "food_components",
+        ]
 
 
 class HistoricalMealSerializer(serializers.ModelSerializer):
+    DUPLICATE_MESSAGE = "An identical historical meal already exists."
+
     class Meta:
         model = HistoricalMeal
         fields = "__all__"
+        read_only_fields = ["use_count", "last_used"]
+
+    def validate(self, attrs):
+        """Refuse an update that would make the meal identical to another of
+        the user's historical meals. Creating one counts a use instead."""
+        if self.instance is not None:
+            updated = HistoricalMeal(
+                meal_name=attrs.get("meal_name", self.instance.meal_name),
+                food_components=attrs.get(
+                    "food_components", self.instance.food_components
+                ),
+            )
+            duplicate = (
+                HistoricalMeal.objects.filter(
+                    user=attrs.get("user", self.instance.user),
+                    content_hash=updated.compute_content_hash(),
+                )
+                .exclude(pk=self.instance.pk)
+                .exists()
+            )
+            if duplicate:
+                raise serializers.ValidationError(self.DUPLICATE_MESSAGE)
+        return attrs
+
+
+class HistoricalMealLogSerializer(serializers.Serializer):
+    """Options for logging a historical meal as a new meal. The name
+    defaults to the historical meal's."""
+
+    time_of_consumption = serializers.DateTimeField(default=timezone.now)
+    scale = serializers.FloatField(default=1.0, min_value=0.01, max_value=100)
+    meal_name = serializers.CharField(max_length=255, required=False)
+    hunger_level = serializers.CharField(
+        max_length=255, required=False, allow_blank=True
+    )
+    exercise = serializers.CharField(max_length=255, required=False, allow_blank=True)
 
 
 class UserGoalsSerializer(serializers.ModelSerializer):
@@ -68,3 +186,47 @@ class UserGoalsSerializer(serializers.ModelSerializer):
         ]
         extra_kwargs = {"user": {"read_only": True}}
 
+
+class DailyNutritionSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailyNutritionSummary
+        fields = [
+            "date",
+            "meal_count",
+            "total_calories",
+            "total_fat",
+            "total_protein",
+            "total_carbs",
+            "total_sugar",
+        ]
+
+
+class FoodSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Food
+        fields = [
+            "food_id",
+            "name",
+            "brand",
+            "calories_per_100g",
+            "fat_per_100g",
+            "protein_per_100g",
+            "carbs_per_100g",
+            "sugar_per_100g",
+            "use_count",
+        ]
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            "job_id",
+            "kind",
+            "status",
+            "attempts",
+            "result",
+            "error",
+            "created_at",
+            "finished_at",
+        ]
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import FoodComponent, HistoricalMeal, Meal, Tombstone, UserGoals
+from .serializers import (
+    FoodComponentSerializer,
+    HistoricalMealSerializer,
+    MealSyncSerializer,
+    UserGoalsSerializer,
+)
+
+# Response key -> (model, serializer, lookup from the model to its user).
+SYNC_MODELS = {
+    "meals": (Meal, MealSyncSerializer, "user"),
+    "food_components": (FoodComponent, FoodComponentSerializer, "meal__user"),
+    "historical_meals": (HistoricalMeal, HistoricalMealSerializer, "user"),
+    "user_goals": (UserGoals, UserGoalsSerializer, "user"),
+}
+# Tombstone.model -> response key.
+TOMBSTONE_KEYS = {
+    model._meta.model_name: key for key, (model, _, _) in SYNC_MODELS.items()
+}
+
+
+def encode_token(moment):
+    """The change token for ``moment``: microseconds since the epoch."""
+    return str(round(moment.timestamp() * 1_000_000))
+
+
+def decode_token(token):
+    """The moment ``token`` stands for. Raises ValueError for bad tokens."""
+    return datetime.fromtimestamp(int(token) / 1_000_000, tz=dt_timezone.utc)
+
+
+def changes(user, since=None):
+    """Everything that changed for ``user`` since the moment ``since``, and
+    a token for the next call.
+
+    Rows whose ``updated_at`` falls within ``SYNC_OVERLAP_SECONDS`` before
+    ``since`` are sent again, so a write that committed after the previous
+    call read its rows is not missed; clients apply rows as upserts, so the
+    repeats are harmless. Without ``since``, or when it predates the kept
+    tombstones, the response is a full snapshot with ``reset`` set and the
+    client replaces what it has.
+    """
+    now = timezone.now()
+    reset = since is None or since < now - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    start = None if reset else since - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+    result = {"token": encode_token(now), "reset": reset}
+    for key, (model, serializer, user_lookup) in SYNC_MODELS.items():
+        rows = model.objects.filter(**{user_lookup: user})
+        if start is not None:
+            rows = rows.filter(updated_at__gte=start)
+        result[key] = serializer(rows, many=True).data
+    result["deleted"] = {key: [] for key in SYNC_MODELS}
+    if start is not None:
+        tombstones = Tombstone.objects.filter(
+            user=user, deleted_at__gte=start
+        ).values_list("model", "object_id")
+        for model_name, object_id in tombstones:
+            if model_name in TOMBSTONE_KEYS:
+                result["deleted"][TOMBSTONE_KEYS[model_name]].append(object_id)
+    return result
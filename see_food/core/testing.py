@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def fast_password_hashers():
+    """Hash passwords with ``TEST_PASSWORD_HASHERS`` while enabled."""
+    return override_settings(PASSWORD_HASHERS=settings.TEST_PASSWORD_HASHERS)
+
+
+class TestRunner(DiscoverRunner):
+    """``manage.py test`` runner that creates users with the fast test
+    hasher; PBKDF2 at production cost would dominate the suite's run time."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._password_hashers = fast_password_hashers()
+        self._password_hashers.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._password_hashers.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,9 +1,118 @@
+import csv
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from decimal import Decimal
+from logging.handlers import QueueHandler
+from types import SimpleNamespace
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.contrib.auth import get_user_model, authenticate
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.db import apply_sqlite_pragmas
+from core.exports import EXPORT_CHUNK_SIZE
+from core.imports import import_meals, read_records
+from core.goals import (
+    GoalParser,
+    RuleBasedGoalParser,
+    TTLCache,
+    aparse_goals,
+    current_goals,
+    goal_cache,
+    parse_goals,
+)
+from core.jobs import run_pending, task
+from core.metrics import request_metrics
+from core.models import (
+    UserGoals,
+    Meal,
+    FoodComponent,
+    ComponentNutrient,
+    DailyNutritionSummary,
+    Food,
+    HistoricalMeal,
+    Job,
+    Tombstone,
+)
+from core.renderers import FastJSONRenderer
+from core.search import _Catalog, bump_catalog_version, food_index
+from core.serializers import FoodComponentSerializer, MealSerializer
+from core.throttling import TokenBucketThrottle
+from see_food.log_setup import configure_logging, stop_listeners
+
+
+class UserTestCase(APITestCase):
+    """Creates ``self.user`` from ``username`` and logs the client in as them.
+
+    The factories fill in whatever a test doesn't care about, so each test only
+    spells out the values it asserts on.
+    """
+
+    username = "tester"
+    authenticate = True
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user(self.username)
+        if self.authenticate:
+            self.client.force_authenticate(user=self.user)
 
-from core.models import UserGoals, Meal
+    def create_user(self, username):
+        return get_user_model().objects.create_user(
+            username=username, email=f"{username}@example.com", password="testpassword"
+        )
+
+    def create_meal(
+        self, name="Lunch", when="2024-07-29T12:00:00Z", user=None, **fields
+    ):
+        return Meal.objects.create(
+            user=user or self.user,
+            meal_name=name,
+            time_of_consumption=when,
+            **fields,
+        )
+
+    def build_component(self, meal, food_name="Food", **fields):
+        values = {
+            "weight": 100,
+            "fat": 0,
+            "protein": 0,
+            "carbs": 0,
+            "sugar": 0,
+            "total_calories": 0,
+        }
+        values.update(fields)
+        return FoodComponent(meal=meal, food_name=food_name, **values)
+
+    def add_component(self, meal, food_name="Food", **fields):
+        component = self.build_component(meal, food_name, **fields)
+        component.save(force_insert=True)
+        return component
 
 
 class SeeFoodAPITest(APITestCase):
@@ -80,6 +189,55 @@ class SeeFoodAPITest(APITestCase):
         print(f"Meal update response data: {response.data}")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_meal_totals_ignore_client_values(self):
+        meal_data = {
+            "meal_name": "Lunch",
+            "time_of_consumption": "2024-07-29T13:00:00Z",
+            "total_calories": 500,
+            "total_protein": 50,
+        }
+        response = self.client.post(self.meal_url, meal_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["total_calories"], 0)
+        meal_id = response.data["meal_id"]
+        self.client.post(
+            self.food_component_url,
+            {
+                "meal": meal_id,
+                "food_name": "Chicken",
+                "weight": 200,
+                "fat": 10,
+                "protein": 30,
+                "carbs": 0,
+                "sugar": 0,
+                "total_calories": 200,
+            },
+            format="json",
+        )
+
+        def totals():
+            meal = Meal.objects.get(pk=meal_id)
+            summary = DailyNutritionSummary.objects.get(user=self.user)
+            return (
+                (meal.total_calories, meal.total_protein),
+                (summary.total_calories, summary.total_protein),
+            )
+
+        self.assertEqual(totals(), ((200, 30), (200, 30)))
+        # A stale full PUT, as the dashboard sends, and a partial edit.
+        stale = {**meal_data, "user": str(self.user.pk), "total_calories": 0}
+        response = self.client.put(f"{self.meal_url}{meal_id}/", stale, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(totals(), ((200, 30), (200, 30)))
+        response = self.client.put(
+            f"{self.meal_url}{meal_id}/edit_meal/",
+            {"total_calories": 0, "total_protein": 0},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_calories"], 200)
+        self.assertEqual(totals(), ((200, 30), (200, 30)))
+
     def test_food_component_management(self):
         # Create a new meal
         meal_data = {
@@ -146,6 +304,53 @@ class SeeFoodAPITest(APITestCase):
         self.assertEqual(meal.total_carbs, 5)
         self.assertEqual(meal.total_sugar, 1)
 
+    def test_bulk_food_component_creation(self):
+        meal = Meal.objects.create(
+            user=self.user,
+            meal_name="Dinner",
+            time_of_consumption="2024-07-29T19:00:00Z",
+        )
+        components = [
+            {
+                "meal": str(meal.meal_id),
+                "food_name": f"Ingredient {index}",
+                "weight": 100,
+                "fat": 1,
+                "protein": 2,
+                "carbs": 3,
+                "sugar": 1,
+                "total_calories": 50,
+            }
+            for index in range(20)
+        ]
+        bulk_url = f"{self.food_component_url}bulk_add_food_components/"
+        # New foods are read back after their INSERT so a concurrent insert's
+        # row, not the discarded one, is counted and indexed.
+        with self.assertNumQueries(10):
+            response = self.client.post(bulk_url, components, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 20)
+
+        meal.refresh_from_db()
+        self.assertEqual(meal.foodcomponent_set.count(), 20)
+        self.assertEqual(meal.total_calories, 1000)
+        self.assertEqual(meal.total_protein, 40)
+
+        # Components cannot be attached to another user's meal.
+        other_user = get_user_model().objects.create_user(
+            username="other", email="other@example.com", password="testpassword"
+        )
+        other_meal = Meal.objects.create(
+            user=other_user,
+            meal_name="Other",
+            time_of_consumption="2024-07-29T19:00:00Z",
+        )
+        components[0]["meal"] = str(other_meal.meal_id)
+        response = self.client.post(bulk_url, components, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(other_meal.foodcomponent_set.count(), 0)
+        self.assertEqual(meal.foodcomponent_set.count(), 20)
+
     def test_historical_meal_management(self):
         # Add a historical meal
         historical_meal_data = {
@@ -191,7 +396,7 @@ class SeeFoodAPITest(APITestCase):
         )
         print(f"List historical meals response data: {response.data}")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreater(len(response.data), 0)
+        self.assertGreater(len(response.data["results"]), 0)
 
     def test_create_user_goals(self):
         # Test creating user goals
@@ -199,7 +404,9 @@ class SeeFoodAPITest(APITestCase):
         response = self.client.post(self.goals_url, data, format="json")
         print(f"User goals creation response data: {response.data}")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(response.data["fat_goal"], 42)
+        self.assertEqual(response.data["carb_goal"], 248)
+        self.assertEqual(response.data["protein_goal"], 55)
+        self.assertEqual(response.data["fat_goal"], 0)
 
         # Check if summary includes the input
         self.assertIn(
@@ -237,9 +444,1842 @@ class SeeFoodAPITest(APITestCase):
             "I want to increase carbs and reduce protein", response.data["summary"]
         )
 
-        # Assuming parsing logic will change values appropriately
-        self.assertEqual(response.data["carb_goal"], 42)
-        self.assertEqual(response.data["protein_goal"], 42)
+        # Relative changes apply to the current goals.
+        self.assertEqual(response.data["carb_goal"], 273)
+        self.assertEqual(response.data["protein_goal"], 50)
+
+
+class MealTotalsTest(UserTestCase):
+    username = "totals"
+
+    def setUp(self):
+        super().setUp()
+        self.meal = self.create_meal(when="2024-07-29T13:00:00Z")
+
+    def assertTotals(self, meal, calories, fat, protein, carbs, sugar):
+        meal.refresh_from_db()
+        self.assertEqual(
+            (
+                meal.total_calories,
+                meal.total_fat,
+                meal.total_protein,
+                meal.total_carbs,
+                meal.total_sugar,
+            ),
+            (calories, fat, protein, carbs, sugar),
+        )
+
+    def test_insert_update_delete_apply_deltas(self):
+        rice = self.add_component(self.meal, total_calories=200, carbs=45, sugar=1)
+        chicken = self.add_component(self.meal, total_calories=250, fat=10, protein=30)
+        self.assertTotals(self.meal, 450, 10, 30, 45, 1)
+
+        chicken = FoodComponent.objects.get(pk=chicken.pk)
+        chicken.protein = 35
+        chicken.total_calories = 270
+        chicken.save()
+        self.assertTotals(self.meal, 470, 10, 35, 45, 1)
+
+        FoodComponent.objects.get(pk=rice.pk).delete()
+        self.assertTotals(self.meal, 270, 10, 35, 0, 0)
+
+    def test_moving_component_updates_both_meals(self):
+        dinner = self.create_meal("Dinner", "2024-07-29T19:00:00Z")
+        component = self.add_component(self.meal, total_calories=300, fat=12)
+        component.meal = dinner
+        component.save()
+        self.assertTotals(self.meal, 0, 0, 0, 0, 0)
+        self.assertTotals(dinner, 300, 12, 0, 0, 0)
+
+    def test_component_write_cost_is_independent_of_meal_size(self):
+        for _ in range(50):
+            self.add_component(self.meal, total_calories=10, fat=1)
+        component = (
+            FoodComponent.objects.filter(meal=self.meal).select_related("meal").first()
+        )
+        component.fat = 2
+        # One UPDATE each for the component, the meal and the daily summary.
+        with self.assertNumQueries(3):
+            component.save()
+        self.assertTotals(self.meal, 500, 51, 0, 0, 0)
+
+    def test_recalculate_macros_rebuilds_from_components(self):
+        self.add_component(self.meal, total_calories=120, protein=8, sugar=3)
+        self.add_component(self.meal, total_calories=80, carbs=20)
+        Meal.objects.filter(pk=self.meal.pk).update(total_calories=0, total_carbs=0)
+        with self.assertNumQueries(4):
+            self.meal.recalculate_macros()
+        self.assertEqual(self.meal.total_calories, 200)
+        self.assertTotals(self.meal, 200, 0, 8, 20, 3)
+
+
+class DailyNutritionSummaryTest(UserTestCase):
+    username = "summary"
+
+    def setUp(self):
+        super().setUp()
+        self.summary_url = reverse("summary-list")
+
+    def add_meal(self, time_of_consumption, calories, protein=0):
+        meal = self.create_meal("Meal", time_of_consumption)
+        self.add_component(meal, protein=protein, total_calories=calories)
+        return meal
+
+    def summaries(self):
+        return list(
+            DailyNutritionSummary.objects.filter(user=self.user).values_list(
+                "date", "meal_count", "total_calories", "total_protein"
+            )
+        )
+
+    def test_summaries_follow_meal_and_component_writes(self):
+        breakfast = self.add_meal("2024-07-29T08:00:00Z", 300, protein=20)
+        self.add_meal("2024-07-29T13:00:00Z", 500)
+        self.assertEqual(self.summaries(), [(date(2024, 7, 29), 2, 800, 20)])
+
+        breakfast = Meal.objects.get(pk=breakfast.pk)
+        breakfast.time_of_consumption = datetime(2024, 7, 30, 8, tzinfo=dt_timezone.utc)
+        breakfast.save()
+        self.assertEqual(
+            self.summaries(),
+            [(date(2024, 7, 29), 1, 500, 0), (date(2024, 7, 30), 1, 300, 20)],
+        )
+
+        breakfast.foodcomponent_set.get().delete()
+        breakfast.delete()
+        self.assertEqual(self.summaries(), [(date(2024, 7, 29), 1, 500, 0)])
+
+    def test_concurrent_first_write_for_a_day(self):
+        self.add_meal("2024-07-29T08:00:00Z", 300)
+        self.add_meal("2024-07-29T13:00:00Z", 500)
+        DailyNutritionSummary.objects.filter(user=self.user).update(
+            meal_count=1, total_calories=300
+        )
+        update = QuerySet.update
+        raced = []
+
+        def update_before_the_row_exists(queryset, **kwargs):
+            # The first UPDATE misses the row a concurrent writer then creates.
+            if not raced:
+                raced.append(True)
+                return 0
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", update_before_the_row_exists):
+            DailyNutritionSummary.rebuild(self.user.pk, date(2024, 7, 29))
+        self.assertEqual(self.summaries(), [(date(2024, 7, 29), 2, 800, 0)])
+
+    def test_backfill_matches_incremental_totals(self):
+        self.add_meal("2024-07-29T08:00:00Z", 300, protein=20)
+        self.add_meal("2024-07-31T08:00:00Z", 400)
+        incremental = self.summaries()
+        DailyNutritionSummary.objects.all().delete()
+        call_command("backfill_daily_summaries", stdout=StringIO())
+        self.assertEqual(self.summaries(), incremental)
+
+    def test_summary_endpoint_filters_by_date_range(self):
+        for day in range(1, 11):
+            self.add_meal(f"2024-07-{day:02d}T12:00:00Z", 100 * day)
+        response = self.client.get(
+            self.summary_url, {"from": "2024-07-03", "to": "2024-07-05"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["date"] for row in response.data],
+            ["2024-07-03", "2024-07-04", "2024-07-05"],
+        )
+        self.assertEqual(response.data[0]["total_calories"], 300)
+
+        response = self.client.get(f"{self.summary_url}weekly/", {"to": "2024-07-07"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["days"], 7)
+        self.assertEqual(response.data[0]["total_calories"], 2800)
+
+        response = self.client.get(self.summary_url, {"from": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MealListQueryTest(UserTestCase):
+    username = "lister"
+
+    def setUp(self):
+        super().setUp()
+        self.meal_url = reverse("meal-list")
+
+    def create_meals(self, count):
+        meals = Meal.objects.bulk_create(
+            Meal(
+                user=self.user,
+                meal_name=f"Meal {index}",
+                time_of_consumption="2024-07-29T12:00:00Z",
+            )
+            for index in range(count)
+        )
+        FoodComponent.objects.bulk_create(
+            self.build_component(
+                meal,
+                f"Food {index}",
+                fat=1,
+                protein=1,
+                carbs=1,
+                sugar=1,
+                total_calories=10,
+            )
+            for meal in meals
+            for index in range(3)
+        )
+
+    def test_meal_list_embeds_components(self):
+        self.create_meals(1)
+        response = self.client.get(self.meal_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        meal = response.data["results"][0]
+        self.assertEqual(len(meal["food_components"]), 3)
+        self.assertEqual(str(meal["food_components"][0]["meal"]), meal["meal_id"])
+
+    def test_meal_list_query_count_is_constant(self):
+        created = 0
+        for count in (1, 10, 100):
+            self.create_meals(count - created)
+            created = count
+            with self.subTest(meals=count):
+                # One query for the meals and one for all of their components.
+                with self.assertNumQueries(2):
+                    response = self.client.get(self.meal_url, {"page_size": count})
+                self.assertEqual(len(response.data["results"]), count)
+
+    def test_meal_list_cursor_pagination_and_time_range(self):
+        for day in range(1, 8):
+            self.create_meal(f"Day {day}", f"2024-07-{day:02d}T12:00:00Z")
+
+        names = []
+        url, params = self.meal_url, {"page_size": 3}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 3)
+            names += [meal["meal_name"] for meal in response.data["results"]]
+            url, params = response.data["next"], None
+        self.assertEqual(names, [f"Day {day}" for day in range(7, 0, -1)])
+
+        response = self.client.get(
+            self.meal_url, {"since": "2024-07-03", "until": "2024-07-05T12:00:00Z"}
+        )
+        self.assertEqual(
+            [meal["meal_name"] for meal in response.data["results"]],
+            ["Day 4", "Day 3"],
+        )
+
+        response = self.client.get(self.meal_url, {"since": "last week"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MealExportTest(UserTestCase):
+    username = "exporter"
+
+    def setUp(self):
+        super().setUp()
+        self.export_url = reverse("meal-export")
+
+    def create_meals(self, count, components_per_meal=2):
+        meals = Meal.objects.bulk_create(
+            Meal(
+                user=self.user,
+                meal_name=f"Meal {index}",
+                time_of_consumption=datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+                + timedelta(hours=index),
+            )
+            for index in range(count)
+        )
+        FoodComponent.objects.bulk_create(
+            self.build_component(
+                meal,
+                f"Food {index}",
+                fat=1,
+                protein=2,
+                carbs=3,
+                sugar=4,
+                micronutrients={"sodium": 5},
+                total_calories=50,
+            )
+            for meal in meals
+            for index in range(components_per_meal)
+        )
+
+    def test_ndjson_export(self):
+        self.create_meals(3)
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        meals = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [meal["meal_name"] for meal in meals], ["Meal 0", "Meal 1", "Meal 2"]
+        )
+        self.assertEqual(len(meals[0]["food_components"]), 2)
+
+    def test_csv_export(self):
+        self.create_meals(2)
+        self.create_meal("Empty", "2021-01-01T00:00:00Z")
+        response = self.client.get(self.export_url, {"type": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["component_food_name"], "Food 0")
+        self.assertEqual(json.loads(rows[0]["component_micronutrients"]), {"sodium": 5})
+        self.assertEqual(rows[-1]["meal_name"], "Empty")
+        self.assertEqual(rows[-1]["component_id"], "")
+
+        response = self.client.get(self.export_url, {"type": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def peak_export_memory(self):
+        response = self.client.get(self.export_url)
+        tracemalloc.start()
+        try:
+            for _ in response.streaming_content:
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_export_memory_does_not_grow_with_history(self):
+        self.create_meals(EXPORT_CHUNK_SIZE)
+        small_peak = self.peak_export_memory()
+        self.create_meals(EXPORT_CHUNK_SIZE * 7)
+        large_peak = self.peak_export_memory()
+        # Eight times the rows must not need anywhere near eight times the
+        # memory; only one chunk is held at a time.
+        self.assertLess(large_peak, small_peak * 2)
+
+
+class MealImportTest(UserTestCase):
+    username = "importer"
+
+    def ndjson_lines(self):
+        meals = [
+            {
+                "meal_name": f"Meal {index}",
+                "time_of_consumption": f"2024-07-{index + 1:02d}T12:00:00Z",
+                "food_components": [
+                    {
+                        "food_name": "Oats",
+                        "weight": 80,
+                        "fat": 5,
+                        "protein": 10,
+                        "carbs": 50,
+                        "sugar": 1,
+                        "total_calories": 300,
+                    },
+                    {
+                        "food_name": "Milk",
+                        "weight": 200,
+                        "fat": 7,
+                        "protein": 7,
+                        "carbs": 10,
+                        "sugar": 10,
+                        "total_calories": 130,
+                    },
+                ],
+            }
+            for index in range(5)
+        ]
+        return [json.dumps(meal) + "\n" for meal in meals]
+
+    def test_import_computes_totals_and_summaries(self):
+        lines = self.ndjson_lines()
+        lines.insert(2, "not json\n")
+        lines.insert(3, json.dumps({"meal_name": "No time"}) + "\n")
+        report = import_meals(self.user, read_records(lines, "ndjson"), batch_size=2)
+        self.assertEqual(report["meals"], 5)
+        self.assertEqual(report["components"], 10)
+        self.assertEqual(report["skipped"], 2)
+        self.assertEqual([error["record"] for error in report["errors"]], [2, 3])
+
+        meals = Meal.objects.filter(user=self.user)
+        self.assertEqual(meals.count(), 5)
+        self.assertTrue(all(meal.total_calories == 430 for meal in meals))
+        self.assertEqual(
+            DailyNutritionSummary.objects.filter(user=self.user).count(), 5
+        )
+
+    def test_csv_export_round_trips_through_import(self):
+        import_meals(self.user, read_records(self.ndjson_lines(), "ndjson"))
+        self.create_meal("Empty", "2024-08-01T12:00:00Z")
+        export = self.client.get(reverse("meal-export"), {"type": "csv"})
+        content = b"".join(export.streaming_content)
+
+        other = self.create_user("importer2")
+        self.client.force_authenticate(user=other)
+        response = self.client.post(
+            reverse("meal-import-file"),
+            {"file": SimpleUploadedFile("meals.csv", content, "text/csv")},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["meals"], 6)
+        self.assertEqual(response.data["components"], 10)
+        self.assertEqual(
+            sorted(
+                Meal.objects.filter(user=other).values_list("total_protein", flat=True)
+            ),
+            [0, 17, 17, 17, 17, 17],
+        )
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as file:
+            file.writelines(self.ndjson_lines())
+        self.addCleanup(os.remove, file.name)
+        stdout = StringIO()
+        call_command("import_meals", file.name, user="importer", stdout=stdout)
+        self.assertIn("Imported 5 meals and 10 components", stdout.getvalue())
+
+    def test_json_array_files_are_refused(self):
+        content = json.dumps([json.loads(line) for line in self.ndjson_lines()])
+        response = self.client.post(
+            reverse("meal-import-file"),
+            {"file": SimpleUploadedFile("meals.json", content.encode())},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("type", response.data["errors"])
+        self.assertFalse(Meal.objects.filter(user=self.user).exists())
+
+    def test_non_utf8_files_are_refused_before_importing(self):
+        content = "".join(self.ndjson_lines()).encode() + b'{"meal_name": "\xff"}\n'
+        response = self.client.post(
+            reverse("meal-import-file"),
+            {"file": SimpleUploadedFile("meals.ndjson", content)},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["message"], "The file must be UTF-8 encoded.")
+
+        with tempfile.NamedTemporaryFile(suffix=".ndjson", delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        with self.assertRaisesMessage(CommandError, "is not UTF-8 encoded"):
+            call_command("import_meals", file.name, user="importer", batch_size=2)
+        self.assertFalse(Meal.objects.filter(user=self.user).exists())
+
+
+class FoodSearchTest(UserTestCase):
+    username = "searcher"
+
+    def setUp(self):
+        food_index.reset()
+        self.addCleanup(food_index.reset)
+        super().setUp()
+        self.search_url = reverse("food-search")
+        self.meal = self.create_meal()
+
+    def log(self, food_name, brand="", times=1, meal=None):
+        # The index is updated once the write commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(times):
+                self.add_component(
+                    meal or self.meal,
+                    food_name,
+                    brand=brand,
+                    weight=200,
+                    fat=10,
+                    protein=40,
+                    total_calories=300,
+                )
+
+    def search(self, query):
+        response = self.client.get(self.search_url, {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(food["name"], food["brand"]) for food in response.data]
+
+    def test_catalog_is_fed_from_components_and_historical_meals(self):
+        self.log("Chicken Breast", "Brand A", times=2)
+        HistoricalMeal.objects.create(
+            user=self.user,
+            meal_name="Dinner",
+            food_components=[{"food_name": "Chickpea Curry", "weight": 0}, "bad"],
+        )
+        chicken = Food.objects.get(normalized_name="chicken breast")
+        self.assertEqual(chicken.use_count, 2)
+        self.assertEqual(chicken.protein_per_100g, 20)
+        self.assertTrue(Food.objects.filter(normalized_name="chickpea curry").exists())
+
+    def test_prefix_search_ranks_by_brand_preference_then_use(self):
+        self.log("Chicken Breast", "Brand A", times=3)
+        self.log("Chicken Breast", "Brand B")
+        self.log("Grilled Chicken", times=2)
+        self.log("Rice")
+        self.assertEqual(
+            self.search("chi"),
+            [
+                ("Chicken Breast", "Brand A"),
+                ("Grilled Chicken", ""),
+                ("Chicken Breast", "Brand B"),
+            ],
+        )
+        HistoricalMeal.objects.create(
+            user=self.user, meal_name="Usual", brand_preferences={"brand b": 5}
+        )
+        self.assertEqual(self.search("chicken br")[0], ("Chicken Breast", "Brand B"))
+
+    def test_index_updates_incrementally_and_matches_typos(self):
+        self.assertEqual(self.search("oat"), [])
+        self.log("Rolled Oats")
+        self.assertEqual(self.search("oat"), [("Rolled Oats", "")])
+        self.assertEqual(self.search("roled oats"), [("Rolled Oats", "")])
+
+    def test_catalogs_are_per_user(self):
+        self.log("Rolled Oats")
+        other = self.create_user("other")
+        meal = self.create_meal(user=other)
+        self.log("Rolled Oats", "Brand O", meal=meal)
+        self.log("Secret Stew", meal=meal)
+        self.assertEqual(self.search("oat"), [("Rolled Oats", "")])
+        self.assertEqual(self.search("stew"), [])
+        response = self.client.get(reverse("food-list"))
+        self.assertEqual([food["name"] for food in response.data], ["Rolled Oats"])
+        self.assertEqual(Food.objects.filter(user=other).count(), 2)
+
+    def test_rolled_back_foods_are_not_indexed(self):
+        self.assertEqual(self.search("oat"), [])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    Food.observe(self.user.pk, [{"food_name": "Rolled Oats"}])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.search("oat"), [])
+
+    def test_conflicting_inserts_index_the_stored_row(self):
+        # Inserted by another request, so this process never saw it.
+        stored = Food(user=self.user, name="Rolled Oats", use_count=4)
+        stored.normalized_name = "rolled oats"
+        Food.objects.bulk_create([stored])
+        self.log("Rolled Oats")
+        stored.refresh_from_db()
+        self.assertEqual(stored.use_count, 5)
+        response = self.client.get(self.search_url, {"q": "oat"})
+        self.assertEqual(
+            [(food["food_id"], food["use_count"]) for food in response.data],
+            [(stored.pk, 5)],
+        )
+
+    def test_index_reloads_when_another_process_changed_the_catalog(self):
+        self.assertEqual(self.search("oat"), [])
+        # Written without publishing, as by another worker process.
+        Food.objects.bulk_create([Food(user=self.user, name="Rolled Oats")])
+        Food.objects.filter(user=self.user).update(normalized_name="rolled oats")
+        self.assertEqual(self.search("oat"), [])
+        bump_catalog_version(self.user.pk)
+        self.assertEqual(self.search("oat"), [("Rolled Oats", "")])
+
+        Food.objects.bulk_create([Food(user=self.user, name="Oat Milk")])
+        Food.objects.filter(name="Oat Milk").update(normalized_name="oat milk")
+        with override_settings(FOOD_INDEX_TTL=0):
+            self.assertEqual(len(self.search("oat")), 2)
+
+    def test_a_slow_catalog_load_does_not_block_other_users(self):
+        load = _Catalog.load
+        loading, release = threading.Event(), threading.Event()
+
+        def slow_load(user_id, version):
+            if user_id == "slow":
+                loading.set()
+                release.wait(5)
+                return _Catalog(version)
+            return load(user_id, version)
+
+        with mock.patch.object(_Catalog, "load", slow_load):
+            slow = threading.Thread(target=food_index.search, args=("slow", "oat"))
+            slow.start()
+            self.addCleanup(slow.join)
+            self.addCleanup(release.set)
+            self.assertTrue(loading.wait(5))
+            self.log("Rolled Oats")
+            self.assertEqual(self.search("oat"), [("Rolled Oats", "")])
+            self.assertTrue(slow.is_alive())
+
+
+class ResponseCacheTest(UserTestCase):
+    username = "cached"
+
+    def setUp(self):
+        super().setUp()
+        self.meal_url = reverse("meal-list")
+
+    def test_cached_list_is_served_without_queries(self):
+        self.create_meal("Breakfast")
+        first = self.client.get(self.meal_url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.meal_url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_writes_invalidate_cached_responses(self):
+        meal = self.create_meal("Breakfast")
+        etag = self.client.get(self.meal_url)["ETag"]
+
+        self.add_component(
+            meal,
+            "Toast",
+            weight=50,
+            fat=1,
+            protein=3,
+            carbs=20,
+            sugar=2,
+            total_calories=110,
+        )
+        response = self.client.get(self.meal_url)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            response.data["results"][0]["food_components"][0]["food_name"], "Toast"
+        )
+
+        goals_url = reverse("user-goals-list")
+        self.assertEqual(self.client.get(goals_url).json(), [])
+        UserGoals.objects.create(user=self.user, calorie_goal=2000)
+        self.assertEqual(self.client.get(goals_url).json()[0]["calorie_goal"], 2000)
+
+    def test_matching_etag_returns_not_modified(self):
+        self.create_meal("Breakfast")
+        etag = self.client.get(self.meal_url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(self.meal_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+        self.create_meal("Lunch")
+        response = self.client.get(self.meal_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_cache_is_per_user(self):
+        self.create_meal("Mine")
+        self.client.get(self.meal_url)
+        other = self.create_user("other")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(self.meal_url).data["results"], [])
+
+
+class SQLitePragmaTest(TestCase):
+    @override_settings(SQLITE_PRAGMAS={"busy_timeout": 1234})
+    def test_pragmas_are_applied_to_new_connections(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite only")
+        apply_sqlite_pragmas(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 1234)
+
+
+class QueuedLoggingTest(TestCase):
+    def test_records_are_written_by_a_background_listener(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.addCleanup(configure_logging, settings.LOGGING)
+        log_file = os.path.join(directory, "queued.log")
+        with override_settings(LOG_ASYNC=True):
+            configure_logging(
+                {
+                    "version": 1,
+                    "disable_existing_loggers": False,
+                    "handlers": {
+                        "file": {
+                            "class": "logging.handlers.RotatingFileHandler",
+                            "filename": log_file,
+                        }
+                    },
+                    "loggers": {"see_food.queued": {"handlers": ["file"]}},
+                }
+            )
+        logger = logging.getLogger("see_food.queued")
+        self.assertIsInstance(logger.handlers[0], QueueHandler)
+        logger.warning("Logged %s records.", 3)
+        stop_listeners()
+        with open(log_file) as file:
+            self.assertEqual(file.read(), "Logged 3 records.\n")
+
+
+class RequestMetricsTest(UserTestCase):
+    username = "metrics"
+
+    def setUp(self):
+        request_metrics.reset()
+        super().setUp()
+
+    def test_metrics_are_aggregated_per_route(self):
+        self.create_meal()
+        for _ in range(2):
+            self.client.get(reverse("meal-list"), {"since": "2024-07-29"})
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        labels = 'route="meal-list",method="GET"'
+        self.assertIn(f"see_food_request_duration_seconds_count{{{labels}}} 2", body)
+        # The first request runs the view, the second is a response cache hit.
+        self.assertIn(f'see_food_request_queries_bucket{{{labels},le="0"}} 1', body)
+        self.assertIn(f'see_food_request_queries_bucket{{{labels},le="+Inf"}} 2', body)
+        self.assertIn("# TYPE see_food_response_bytes histogram", body)
+
+    def test_metrics_require_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rendering_inside_cached_views_is_timed(self):
+        render = FastJSONRenderer._render
+
+        def slow_render(renderer, *args):
+            time.sleep(0.02)
+            return render(renderer, *args)
+
+        with mock.patch.object(FastJSONRenderer, "_render", slow_render):
+            self.client.get(reverse("meal-list"))
+        body = self.client.get(reverse("metrics")).content.decode()
+        seconds = re.search(
+            r'see_food_request_render_seconds_sum\{route="meal-list",method="GET"\} (\S+)',
+            body,
+        )
+        self.assertGreaterEqual(float(seconds[1]), 0.02)
+
+    def test_async_routes_count_queries_run_in_worker_threads(self):
+        self.create_meal()
+        token = RefreshToken.for_user(self.user).access_token
+
+        async def fetch():
+            return await AsyncClient().get(
+                reverse("async-meal-list"), headers={"Authorization": f"Bearer {token}"}
+            )
+
+        self.assertEqual(async_to_sync(fetch)().status_code, status.HTTP_200_OK)
+        body = self.client.get(reverse("metrics")).content.decode()
+        labels = 'route="async-meal-list",method="GET"'
+        self.assertIn(f"see_food_request_queries_count{{{labels}}} 1", body)
+        # The view's queries run on a sync_to_async thread's connection.
+        self.assertIn(f'see_food_request_queries_bucket{{{labels},le="0"}} 0', body)
+
+    @override_settings(REQUEST_QUERY_BUDGET=0)
+    def test_requests_over_budget_are_logged(self):
+        with self.assertLogs("see_food", level="WARNING") as logs:
+            self.client.get(reverse("summary-list"))
+        self.assertIn("(summary-list) over budget", logs.output[0])
+
+
+class AsyncViewTest(UserTestCase):
+    # Requests carry a bearer token instead of a forced login.
+    username = "async"
+    authenticate = False
+
+    def setUp(self):
+        super().setUp()
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth_header = f"Bearer {token}"
+        self.auth = {"HTTP_AUTHORIZATION": self.auth_header}
+
+    def test_requires_a_valid_token(self):
+        url = reverse("async-meal-list")
+        self.assertEqual(self.client.get(url).status_code, 401)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer nonsense")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "token_not_valid")
+
+    def test_meal_and_component_create_and_list(self):
+        response = self.client.post(
+            reverse("async-meal-list"),
+            {"meal_name": "Lunch", "time_of_consumption": "2024-07-29T12:00:00Z"},
+            content_type="application/json",
+            **self.auth,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        meal_id = response.json()["meal_id"]
+        self.assertEqual(response.json()["user"], str(self.user.pk))
+
+        response = self.client.post(
+            reverse("async-foodcomponent-list"),
+            {
+                "meal": meal_id,
+                "food_name": "Rice",
+                "weight": 100,
+                "fat": 1,
+                "protein": 3,
+                "carbs": 28,
+                "sugar": 0,
+                "total_calories": 130,
+            },
+            content_type="application/json",
+            **self.auth,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(
+            reverse("async-meal-list"), {"since": "2024-07-29"}, **self.auth
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [meal] = response.json()["results"]
+        self.assertEqual(meal["total_calories"], 130)
+        self.assertEqual(meal["food_components"][0]["food_name"], "Rice")
+
+    def test_component_cannot_target_another_users_meal(self):
+        other = self.create_user("other")
+        meal = self.create_meal("Dinner", "2024-07-29T19:00:00Z", user=other)
+        response = self.client.post(
+            reverse("async-foodcomponent-list"),
+            {"meal": str(meal.pk), "food_name": "Rice", "weight": 100},
+            content_type="application/json",
+            **self.auth,
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("meal", response.json()["errors"])
+
+    def test_goals_create_and_update(self):
+        url = reverse("async-user-goals")
+        response = self.client.post(
+            url,
+            {"goals_input": "More protein"},
+            content_type="application/json",
+            **self.auth,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.put(
+            url,
+            {"goals_input": "less sugar"},
+            content_type="application/json",
+            **self.auth,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["summary"], "More protein less sugar")
+
+    async def test_served_by_the_async_handler(self):
+        client = AsyncClient()
+        response = await client.get(
+            reverse("async-meal-list"), headers={"Authorization": self.auth_header}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], [])
+
+
+class SlowGoalParser(GoalParser):
+    blocking = True
+    calls = 0
+
+    def parse(self, input_text, current):
+        SlowGoalParser.calls += 1
+        time.sleep(float(input_text))
+        return RuleBasedGoalParser().parse("2000 calories", current)
+
+
+class GoalParserTest(TestCase):
+    def setUp(self):
+        goal_cache.clear()
+        SlowGoalParser.calls = 0
+
+    def test_rule_based_parser(self):
+        current = current_goals(UserGoals(carb_goal=200))
+        values = RuleBasedGoalParser().parse(
+            "Eat 2,000 calories a day and 150g of protein; cut carbs by 50g "
+            "and reduce fat. I want to weigh 72 kg.",
+            current,
+        )
+        self.assertEqual(
+            values,
+            {
+                "calorie_goal": 2000,
+                "protein_goal": 150,
+                "carb_goal": 150,
+                "fat_goal": 70,
+                "weight_goal": 72,
+            },
+        )
+
+    def test_only_the_new_input_is_parsed(self):
+        goals = UserGoals(protein_goal=100, summary="2000 calories")
+        values = parse_goals("raise protein by 10%", goals)
+        self.assertEqual(values["protein_goal"], 110)
+        self.assertEqual(values["calorie_goal"], 0)
+        self.assertEqual(values["summary"], "2000 calories raise protein by 10%")
+
+    @override_settings(GOAL_PARSER="core.tests.SlowGoalParser")
+    def test_results_are_cached(self):
+        self.assertEqual(parse_goals("0")["calorie_goal"], 2000)
+        self.assertEqual(parse_goals("0")["calorie_goal"], 2000)
+        self.assertEqual(SlowGoalParser.calls, 1)
+
+    def test_cache_entries_expire_and_are_evicted(self):
+        now = [0]
+        cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        now[0] = 10
+        self.assertIsNone(cache.get("a"))
+
+    @override_settings(
+        GOAL_PARSER="core.tests.SlowGoalParser", GOAL_PARSER_TIMEOUT=0.05
+    )
+    def test_slow_backend_times_out_to_the_rule_based_parser(self):
+        for parse in (parse_goals, async_to_sync(aparse_goals)):
+            start = time.perf_counter()
+            with self.assertLogs("see_food", level="WARNING"):
+                values = parse("1")
+            self.assertLess(time.perf_counter() - start, 0.5)
+            # The fallback parser finds nothing it understands in "1".
+            self.assertEqual(values["calorie_goal"], 0)
+
+
+@task("test_flaky")
+def flaky_task(payload):
+    raise RuntimeError("Backend unavailable.")
+
+
+class JobQueueTest(UserTestCase):
+    username = "jobs"
+
+    def setUp(self):
+        goal_cache.clear()
+        super().setUp()
+
+    def create_rice_meal(self, when="2024-07-29T12:00:00Z"):
+        meal = self.create_meal(when=when)
+        self.add_component(meal, "Rice", fat=1, protein=3, carbs=28, total_calories=130)
+        return meal
+
+    def test_identical_waiting_jobs_are_deduplicated(self):
+        first = Job.enqueue("parse_goals", {"goals_input": "x"}, user=self.user)
+        second = Job.enqueue("parse_goals", {"goals_input": "x"}, user=self.user)
+        other = Job.enqueue("parse_goals", {"goals_input": "y"}, user=self.user)
+        self.assertEqual(first.pk, second.pk)
+        self.assertNotEqual(first.pk, other.pk)
+
+    def test_goal_parsing_runs_in_the_background(self):
+        response = self.client.post(
+            reverse("user-goals-parse-in-background"),
+            {"goals_input": "2000 calories"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_url = reverse("job-detail", args=[response.data["job_id"]])
+        self.assertEqual(response["Location"], job_url)
+        self.assertFalse(UserGoals.objects.filter(user=self.user).exists())
+
+        self.assertEqual(run_pending("test"), 1)
+        response = self.client.get(job_url)
+        self.assertEqual(response.data["status"], Job.SUCCEEDED)
+        self.assertEqual(response.data["result"]["calorie_goal"], 2000)
+        self.assertEqual(UserGoals.objects.get(user=self.user).calorie_goal, 2000)
+
+    def test_recalculations_are_batched(self):
+        meals = [self.create_rice_meal(), self.create_rice_meal("2024-07-30T12:00:00Z")]
+        Meal.objects.update(total_calories=0)
+        DailyNutritionSummary.objects.all().delete()
+        for meal in meals:
+            response = self.client.post(reverse("meal-recalculate", args=[meal.pk]))
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        run_pending("test")
+        self.assertEqual(
+            list(Meal.objects.values_list("total_calories", flat=True)), [130, 130]
+        )
+        self.assertEqual(DailyNutritionSummary.objects.count(), 2)
+        self.assertEqual(
+            Job.objects.filter(status=Job.SUCCEEDED, kind="recalculate_meals").count(),
+            2,
+        )
+
+    def test_summary_rebuild_job(self):
+        self.create_rice_meal()
+        DailyNutritionSummary.objects.all().delete()
+        response = self.client.post(reverse("summary-rebuild"))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        call_command("run_workers", "--once", "--workers", "1", stdout=StringIO())
+        self.assertEqual(DailyNutritionSummary.objects.get().total_calories, 130)
+
+    def test_failed_jobs_are_retried_then_given_up(self):
+        job = Job.enqueue("test_flaky", max_attempts=2)
+        with self.assertLogs("see_food", level="ERROR"):
+            run_pending("test")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertEqual(run_pending("test"), 0)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs("see_food", level="ERROR"):
+            run_pending("test")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(job.error, "Backend unavailable.")
+
+    def test_jobs_of_crashed_workers_are_reclaimed(self):
+        job = Job.enqueue(
+            "parse_goals",
+            {"user_id": str(self.user.pk), "goals_input": "1800 calories"},
+            user=self.user,
+        )
+        self.assertEqual(Job.claim(10, "crashed"), [job])
+        # The worker died without recording an outcome.
+        self.assertEqual(run_pending("test"), 0)
+
+        lease = timedelta(seconds=settings.JOB_LEASE_SECONDS + 1)
+        Job.objects.filter(pk=job.pk).update(claimed_at=timezone.now() - lease)
+        self.assertEqual(run_pending("test"), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.SUCCEEDED, 2))
+        self.assertEqual(UserGoals.objects.get(user=self.user).calorie_goal, 1800)
+
+        job = Job.enqueue("parse_goals", {"goals_input": "x"}, user=self.user)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING,
+            attempts=job.max_attempts,
+            claimed_at=timezone.now() - lease,
+        )
+        self.assertEqual(Job.reclaim_expired(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn("lease expired", job.error)
+
+    def test_jobs_are_private(self):
+        other = self.create_user("other")
+        job = Job.enqueue("parse_goals", {"goals_input": "x"}, user=other)
+        response = self.client.get(reverse("job-detail", args=[job.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AnalyticsTest(UserTestCase):
+    username = "analyst"
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("analytics-list")
+
+    def test_report(self):
+        UserGoals.objects.create(user=self.user, calorie_goal=2000)
+        # Totals are set directly; the report only reads the meal rows.
+        self.create_meal("Breakfast", "2024-07-01T08:00:00Z", total_calories=500)
+        self.create_meal(
+            "Dinner", "2024-07-01T19:00:00Z", total_calories=1500, total_protein=40
+        )
+        self.create_meal("breakfast ", "2024-07-03T08:00:00Z", total_calories=1000)
+        # Before the range, so only in the moving averages.
+        self.create_meal("Lunch", "2024-06-30T12:00:00Z", total_calories=2600)
+
+        response = self.client.get(
+            self.url, {"from": "2024-07-01", "to": "2024-07-04", "windows": "7,2"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = response.data
+        self.assertEqual(len(report["dates"]), 4)
+        self.assertEqual(report["logged_days"], 2)
+        self.assertEqual(report["meal_count"], [2, 0, 1, 0])
+        self.assertEqual(report["daily"]["total_calories"], [2000, 0, 1000, 0])
+        # Averages are over logged days in the window.
+        self.assertEqual(
+            report["moving_averages"]["2"]["total_calories"], [2300, 2000, 1000, 1000]
+        )
+        self.assertEqual(
+            report["moving_averages"]["7"]["total_calories"],
+            [2300, 2300, 1866.7, 1866.7],
+        )
+        self.assertEqual(
+            report["adherence"]["calorie_goal"],
+            {
+                "goal": 2000,
+                "days_on_target_percent": 50.0,
+                "average_percent_of_goal": 75.0,
+            },
+        )
+        self.assertIsNone(report["adherence"]["protein_goal"])
+        breakfast, dinner = report["meal_types"]
+        self.assertEqual(
+            (
+                breakfast["meal_type"],
+                breakfast["meal_count"],
+                breakfast["average_calories"],
+            ),
+            ("breakfast", 2, 750.0),
+        )
+        self.assertEqual(dinner["total_protein"], 40)
+
+    def test_empty_history(self):
+        response = self.client.get(self.url, {"from": "2024-07-01", "to": "2024-07-02"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["meal_types"], [])
+        self.assertEqual(
+            response.data["moving_averages"]["7"]["total_fat"], [None, None]
+        )
+
+    def test_default_range_follows_the_date(self):
+        for today in (date(2024, 7, 29), date(2024, 7, 30)):
+            with mock.patch("django.utils.timezone.localdate", return_value=today):
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()["dates"][-1], today.isoformat())
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"from": "2024-07-02", "to": "2024-07-01"},
+            {"windows": "0"},
+            {"windows": "seven"},
+            {"from": "2010-01-01", "to": "2024-01-01"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class ComponentNutrientTest(UserTestCase):
+    username = "nutrients"
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("nutrient-list")
+
+    def log_soup(self, when, micronutrients):
+        meal = self.create_meal("Meal", when)
+        return self.add_component(meal, "Soup", micronutrients=micronutrients)
+
+    def nutrients(self, component):
+        return dict(component.nutrients.values_list("nutrient_code", "amount"))
+
+    def test_rows_follow_the_json(self):
+        component = self.log_soup(
+            "2024-07-01T12:00:00Z",
+            {"Sodium": 1200, "Vitamin C": "30", "note": "salty", "iron": None},
+        )
+        self.assertEqual(self.nutrients(component), {"sodium": 1200, "vitamin_c": 30})
+
+        component = FoodComponent.objects.select_related("meal").get(pk=component.pk)
+        component.fat = 1
+        # Unchanged micronutrients leave the nutrient rows alone.
+        with self.assertNumQueries(3):
+            component.save()
+        component.micronutrients = {"sodium": 900}
+        component.save()
+        self.assertEqual(self.nutrients(component), {"sodium": 900})
+
+        component.delete()
+        self.assertFalse(ComponentNutrient.objects.exists())
+
+    def test_bulk_writes_and_backfill(self):
+        meal = self.create_meal("Meal", "2024-07-01T12:00:00Z")
+        response = self.client.post(
+            f"{reverse('foodcomponent-list')}bulk_add_food_components/",
+            [
+                {
+                    "meal": str(meal.meal_id),
+                    "food_name": f"Food {index}",
+                    "weight": 100,
+                    "fat": 0,
+                    "protein": 0,
+                    "carbs": 0,
+                    "sugar": 0,
+                    "total_calories": 0,
+                    "micronutrients": {"sodium": 100 * index},
+                }
+                for index in range(1, 4)
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(ComponentNutrient.objects.count(), 3)
+
+        ComponentNutrient.objects.all().delete()
+        stdout = StringIO()
+        call_command("backfill_component_nutrients", stdout=stdout)
+        self.assertIn("Wrote 3 nutrient rows.", stdout.getvalue())
+        self.assertEqual(
+            sorted(ComponentNutrient.objects.values_list("amount", flat=True)),
+            [100, 200, 300],
+        )
+
+    def test_aggregates(self):
+        self.log_soup("2024-07-01T08:00:00Z", {"sodium": 1500, "iron": 4})
+        self.log_soup("2024-07-01T19:00:00Z", {"sodium": 1000})
+        self.log_soup("2024-07-02T12:00:00Z", {"sodium": 800, "iron": 2})
+        self.log_soup("2024-07-05T12:00:00Z", {"sodium": 3000})
+
+        response = self.client.get(self.url, {"from": "2024-07-01", "to": "2024-07-02"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        iron, sodium = response.data
+        self.assertEqual(
+            (iron["nutrient_code"], iron["total"], iron["days"]), ("iron", 6, 2)
+        )
+        self.assertEqual(
+            (sodium["total"], sodium["components"], sodium["daily_average"]),
+            (3300, 3, 1650),
+        )
+
+        response = self.client.get(
+            f"{self.url}daily/", {"nutrient": "Sodium", "above": 2300}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row["date"], row["amount"]) for row in response.data],
+            [(date(2024, 7, 1), 2500), (date(2024, 7, 5), 3000)],
+        )
+
+        response = self.client.get(f"{self.url}daily/", {"above": "lots"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class HistoricalMealLogTest(UserTestCase):
+    username = "templates"
+
+    def create_template(self, count, user=None, name="Usual breakfast"):
+        return HistoricalMeal.objects.create(
+            user=user or self.user,
+            meal_name=name,
+            food_components=[
+                {
+                    "food_name": f"Food {index}",
+                    "weight": 100,
+                    "fat": 2,
+                    "protein": 4,
+                    "carbs": 10,
+                    "sugar": 1,
+                    "total_calories": 80,
+                    "micronutrients": {"sodium": 10},
+                }
+                for index in range(count)
+            ],
+        )
+
+    def log_url(self, template):
+        return reverse("historicalmeal-log", args=[template.pk])
+
+    def test_log_scaled_template(self):
+        template = self.create_template(2)
+        response = self.client.post(
+            self.log_url(template),
+            {"time_of_consumption": "2024-07-29T08:00:00Z", "scale": 1.5},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["meal_name"], "Usual breakfast")
+        self.assertEqual(len(response.data["food_components"]), 2)
+        self.assertEqual(response.data["food_components"][0]["weight"], 150)
+
+        template.refresh_from_db()
+        self.assertEqual(template.use_count, 2)
+
+        meal = Meal.objects.get(pk=response.data["meal_id"])
+        self.assertEqual(meal.total_calories, 240)
+        self.assertEqual(meal.total_protein, 12)
+        summary = DailyNutritionSummary.objects.get(user=self.user)
+        self.assertEqual((summary.meal_count, summary.total_carbs), (1, 30))
+        self.assertEqual(
+            sum(ComponentNutrient.objects.values_list("amount", flat=True)), 30
+        )
+
+    def test_query_count_does_not_depend_on_size(self):
+        templates = [self.create_template(size) for size in (2, 10)]
+        counts = []
+        for template in templates * 2:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.log_url(template), {}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            counts.append(len(queries))
+        # The first round adds the foods and the day's summary.
+        self.assertEqual(counts[2], counts[3])
+
+    def test_invalid_requests(self):
+        response = self.client.post(
+            self.log_url(self.create_template(1)), {"scale": 0}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        broken = self.create_template(1, name="Broken")
+        broken.food_components[0]["fat"] = "lots"
+        broken.save()
+        response = self.client.post(self.log_url(broken), {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Meal.objects.exists())
+
+        other = self.create_user("other")
+        response = self.client.post(
+            self.log_url(self.create_template(1, user=other)), {}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class HistoricalMealDedupeTest(UserTestCase):
+    username = "dedupe"
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("historicalmeal-list")
+
+    def add(self, name, *foods):
+        return self.client.post(
+            self.url,
+            {
+                "meal_name": name,
+                "food_components": [
+                    {"food_name": food, "weight": weight} for food, weight in foods
+                ],
+            },
+            format="json",
+        )
+
+    def test_identical_meals_are_stored_once(self):
+        first = self.add("Porridge", ("Oats", 50), ("Milk", 200))
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        # Case, spacing and component order do not make a new meal.
+        again = self.add(" porridge", ("milk", 200.0), ("Oats ", 50))
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        self.assertEqual(again.data["historical_id"], first.data["historical_id"])
+        self.assertEqual(again.data["use_count"], 2)
+        self.assertEqual(HistoricalMeal.objects.count(), 1)
+
+        bigger = self.add("Porridge", ("Oats", 80), ("Milk", 200))
+        self.assertEqual(bigger.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.put(
+            f"{self.url}{bigger.data['historical_id']}/edit_historical_meal/",
+            {
+                "food_components": [
+                    {"food_name": "Oats", "weight": 50},
+                    {"food_name": "Milk", "weight": 200},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_updates_to_an_existing_meals_content_are_refused(self):
+        self.add("Porridge", ("Oats", 50))
+        toast = self.add("Toast", ("Bread", 60)).data
+        detail = f"{self.url}{toast['historical_id']}/"
+        duplicate = {
+            "user": str(self.user.pk),
+            "meal_name": "Porridge",
+            "food_components": [{"food_name": "Oats", "weight": 50}],
+        }
+        response = self.client.put(detail, duplicate, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(detail, duplicate, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["non_field_errors"],
+            ["An identical historical meal already exists."],
+        )
+
+        # Saving a meal with its own content is not a duplicate.
+        response = self.client.patch(detail, {"meal_name": "toast"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_frequent_and_recent(self):
+        self.add("Toast", ("Bread", 60))
+        for _ in range(3):
+            self.add("Salad", ("Lettuce", 100))
+        self.add("Soup", ("Lentils", 150))
+
+        response = self.client.get(f"{self.url}frequent/", {"limit": 2})
+        self.assertEqual(
+            [(meal["meal_name"], meal["use_count"]) for meal in response.data],
+            [("Salad", 3), ("Soup", 1)],
+        )
+        response = self.client.get(f"{self.url}recent/")
+        self.assertEqual(
+            [meal["meal_name"] for meal in response.data], ["Soup", "Salad", "Toast"]
+        )
+        response = self.client.get(f"{self.url}list_historical_meals/")
+        self.assertEqual(response.data["results"][0]["meal_name"], "Soup")
+
+    def test_dedupe_command_merges_copies(self):
+        soup = HistoricalMeal.objects.create(
+            user=self.user, meal_name="Soup", food_components=[], use_count=2
+        )
+        copy = HistoricalMeal.objects.create(
+            user=self.user, meal_name="Soup copy", food_components=[]
+        )
+        # A copy stored before hashing took case into account, say.
+        HistoricalMeal.objects.filter(pk=copy.pk).update(meal_name="SOUP")
+        stdout = StringIO()
+        call_command("dedupe_historical_meals", stdout=stdout)
+        self.assertIn("Merged 1 duplicate historical meals.", stdout.getvalue())
+        [merged] = HistoricalMeal.objects.all()
+        self.assertEqual(merged.use_count, 3)
+        self.assertEqual(merged.content_hash, soup.content_hash)
+
+
+class SeedPerfDataTest(TestCase):
+    def test_seeds_consistent_rows(self):
+        stdout = StringIO()
+        call_command(
+            "seed_perf_data",
+            users=2,
+            days=3,
+            meals=2,
+            components=4,
+            end_date="2024-07-31",
+            stdout=stdout,
+        )
+        self.assertIn("Seeded 2 users, 12 meals, 48 components", stdout.getvalue())
+        user = get_user_model().objects.get(username="perf1")
+        self.assertTrue(user.check_password("perfpassword"))
+        self.assertEqual(DailyNutritionSummary.objects.filter(user=user).count(), 3)
+        self.assertEqual(
+            DailyNutritionSummary.objects.filter(user=user).last().date,
+            date(2024, 7, 31),
+        )
+        meal = Meal.objects.filter(user=user).first()
+        self.assertAlmostEqual(
+            meal.total_calories,
+            sum(meal.foodcomponent_set.values_list("total_calories", flat=True)),
+        )
+        self.assertEqual(ComponentNutrient.objects.count(), 48)
+        self.assertEqual(HistoricalMeal.objects.filter(user=user).count(), 10)
+
+        with self.assertRaises(CommandError):
+            call_command("seed_perf_data", users=1, stdout=StringIO())
+
+
+@override_settings(SYNC_OVERLAP_SECONDS=0)
+class SyncTest(UserTestCase):
+    username = "syncer"
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("sync")
+        self.breakfast = self.create_meal("Breakfast")
+        self.component = self.add_toast(self.breakfast)
+        self.dinner = self.create_meal("Dinner")
+        self.dinner_component = self.add_toast(self.dinner)
+        self.goals = UserGoals.objects.create(user=self.user, calorie_goal=2000)
+        self.template = HistoricalMeal.objects.create(user=self.user, meal_name="Usual")
+
+    def add_toast(self, meal):
+        return self.add_component(
+            meal,
+            "Toast",
+            weight=50,
+            fat=1,
+            protein=2,
+            carbs=20,
+            sugar=1,
+            total_calories=100,
+        )
+
+    def sync(self, since=None):
+        response = self.client.get(self.url, {"since": since} if since else {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_full_then_delta(self):
+        snapshot = self.sync()
+        self.assertTrue(snapshot["reset"])
+        self.assertEqual(len(snapshot["meals"]), 2)
+        self.assertNotIn("food_components", snapshot["meals"][0])
+        self.assertEqual(len(snapshot["food_components"]), 2)
+        self.assertEqual(len(snapshot["historical_meals"]), 1)
+        self.assertEqual(snapshot["user_goals"][0]["calorie_goal"], 2000)
+
+        unchanged = self.sync(snapshot["token"])
+        self.assertGreater(int(unchanged.pop("token")), int(snapshot["token"]))
+        self.assertEqual(
+            unchanged,
+            {
+                "reset": False,
+                "meals": [],
+                "food_components": [],
+                "historical_meals": [],
+                "user_goals": [],
+                "deleted": {
+                    "meals": [],
+                    "food_components": [],
+                    "historical_meals": [],
+                    "user_goals": [],
+                },
+            },
+        )
+
+        token = snapshot["token"]
+        lunch = self.create_meal("Lunch")
+        # A component write also moves its meal's totals.
+        self.component.fat = 3
+        self.component.save()
+        self.dinner.delete()
+        self.template.mark_used()
+        self.client.delete(reverse("user-goals-delete-goals"))
+        self.create_meal("Elsewhere", user=self.create_user("other"))
+
+        delta = self.sync(token)
+        self.assertFalse(delta["reset"])
+        self.assertEqual(
+            {meal["meal_id"] for meal in delta["meals"]},
+            {str(lunch.pk), str(self.breakfast.pk)},
+        )
+        self.assertEqual(
+            [component["fat"] for component in delta["food_components"]], [3]
+        )
+        self.assertEqual(delta["historical_meals"][0]["use_count"], 2)
+        self.assertEqual(delta["user_goals"], [])
+        self.assertEqual(delta["deleted"]["meals"], [str(self.dinner.pk)])
+        self.assertEqual(
+            delta["deleted"]["food_components"], [str(self.dinner_component.pk)]
+        )
+        self.assertEqual(delta["deleted"]["user_goals"], [str(self.goals.pk)])
+
+    def test_old_and_invalid_tokens(self):
+        old = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS + 1)
+        self.assertTrue(self.sync(str(int(old.timestamp() * 1_000_000)))["reset"])
+        response = self.client.get(self.url, {"since": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_prune_tombstones(self):
+        self.template.delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=365))
+        stdout = StringIO()
+        call_command("prune_tombstones", stdout=stdout)
+        self.assertIn("Removed 1 tombstones.", stdout.getvalue())
+
+
+class DashboardTest(UserTestCase):
+    username = "dash"
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("dashboard-list")
+
+    def log_meal(self, name, when, components=3):
+        meal = self.create_meal(name, when)
+        FoodComponent.bulk_create_with_totals(
+            [
+                self.build_component(
+                    meal,
+                    f"{name} {index}",
+                    fat=5,
+                    protein=10,
+                    carbs=20,
+                    sugar=2,
+                    total_calories=200,
+                )
+                for index in range(components)
+            ]
+        )
+        return meal
+
+    def test_day_in_fixed_queries(self):
+        UserGoals.objects.create(
+            user=self.user, calorie_goal=2000, protein_goal=100, carb_goal=0
+        )
+        self.log_meal("Dinner", "2024-07-29T19:00:00Z")
+        self.log_meal("Breakfast", "2024-07-29T08:00:00Z", components=5)
+        self.log_meal("Yesterday", "2024-07-28T12:00:00Z")
+
+        # The meals, their components and the goals.
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {"date": "2024-07-29"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual(
+            [meal["meal_name"] for meal in data["meals"]], ["Breakfast", "Dinner"]
+        )
+        self.assertEqual(len(data["meals"][0]["food_components"]), 5)
+        self.assertEqual(data["totals"]["meal_count"], 2)
+        self.assertEqual(data["totals"]["total_calories"], 1600)
+        self.assertEqual(data["goals"]["calorie_goal"], 2000)
+        self.assertEqual(data["remaining"]["calorie_goal"], 400)
+        self.assertEqual(data["remaining"]["protein_goal"], 20)
+        self.assertIsNone(data["remaining"]["carb_goal"])
+
+    def test_defaults_to_today_without_goals(self):
+        self.log_meal("Lunch", timezone.now())
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["date"], timezone.localdate())
+        self.assertEqual(response.data["totals"]["meal_count"], 1)
+        self.assertIsNone(response.data["goals"])
+
+        response = self.client.get(self.url, {"date": "today"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_default_day_is_not_served_from_yesterdays_cache(self):
+        self.log_meal("Lunch", "2024-07-29T12:00:00Z")
+        with mock.patch(
+            "django.utils.timezone.localdate", return_value=date(2024, 7, 29)
+        ):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["totals"]["meal_count"], 1)
+
+        with mock.patch(
+            "django.utils.timezone.localdate", return_value=date(2024, 7, 30)
+        ):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["date"], "2024-07-30")
+        self.assertEqual(response.json()["totals"]["meal_count"], 0)
+
+
+class CachedJWTAuthenticationTest(UserTestCase):
+    username = "cached"
+    authenticate = False
+
+    def setUp(self):
+        super().setUp()
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        self.client.credentials(**self.auth)
+        self.url = reverse("user-goals-list")
+        self.table = f'FROM "{get_user_model()._meta.db_table}" '
+
+    def user_queries(self, send):
+        with CaptureQueriesContext(connection) as context:
+            response = send()
+        return response, [
+            query for query in context.captured_queries if self.table in query["sql"]
+        ]
+
+    def test_user_is_loaded_once(self):
+        response, queries = self.user_queries(lambda: self.client.get(self.url))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        response, queries = self.user_queries(lambda: self.client.get(self.url))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, [])
+
+    def test_saving_the_user_evicts_it(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.is_active = True
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_STATELESS_READS=True)
+    def test_stateless_reads_skip_the_user(self):
+        response, queries = self.user_queries(lambda: self.client.get(self.url))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(queries, [])
+
+        response, queries = self.user_queries(
+            lambda: self.client.post(self.url, {"calorie_goal": 2000}, format="json")
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(queries), 1)
+
+    def test_async_views_share_the_cache(self):
+        url = reverse("async-meal-list")
+        self.client.get(self.url)
+
+        async def fetch():
+            return await AsyncClient().get(
+                url, headers={"Authorization": self.auth["HTTP_AUTHORIZATION"]}
+            )
+
+        with CaptureQueriesContext(connection) as context:
+            response = async_to_sync(fetch)()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            any(self.table in query["sql"] for query in context.captured_queries)
+        )
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(async_to_sync(fetch)().status_code, 401)
+
+
+class LoginHardeningTest(UserTestCase):
+    username = "guarded"
+    authenticate = False
+
+    def setUp(self):
+        caches[settings.LOGIN_THROTTLE_CACHE_ALIAS].clear()
+        super().setUp()
+        self.url = reverse("login")
+
+    def attempt(self, username="guarded", password="wrong", address="10.0.0.1"):
+        return self.client.post(
+            self.url,
+            {"username": username, "password": password},
+            format="json",
+            REMOTE_ADDR=address,
+        )
+
+    def test_suite_uses_the_fast_hasher(self):
+        self.assertTrue(self.user.password.startswith("md5$"))
+
+    @override_settings(LOGIN_THROTTLE_RATES={"login_ip": "3/min"})
+    def test_addresses_get_a_bucket_each(self):
+        for _ in range(3):
+            self.assertEqual(self.attempt().status_code, 401)
+        response = self.attempt(password="testpassword")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "20")
+        self.assertEqual(self.attempt(address="10.0.0.2").status_code, 401)
+
+    @override_settings(LOGIN_THROTTLE_RATES={"login_username": "2/min"})
+    def test_usernames_get_a_bucket_each(self):
+        self.assertEqual(self.attempt(address="10.0.0.1").status_code, 401)
+        self.assertEqual(self.attempt(" Guarded", address="10.0.0.2").status_code, 401)
+        response = self.attempt(password="testpassword", address="10.0.0.3")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.attempt("someone").status_code, 401)
+
+    @override_settings(LOGIN_THROTTLE_RATES={"login_ip": "2/min"})
+    def test_buckets_refill_at_the_rate(self):
+        now = [1000.0]
+        with mock.patch.object(
+            TokenBucketThrottle, "timer", staticmethod(lambda: now[0])
+        ):
+            self.attempt()
+            self.attempt()
+            self.assertEqual(self.attempt().status_code, 429)
+            now[0] += 30
+            self.assertEqual(self.attempt().status_code, 401)
+            self.assertEqual(self.attempt().status_code, 429)
+
+    @override_settings(
+        PASSWORD_HASHERS=["core.hashers.PBKDF2PasswordHasher"],
+        PASSWORD_PBKDF2_ITERATIONS=1000,
+    )
+    def test_passwords_are_rehashed_on_login(self):
+        self.user.set_password("testpassword")
+        self.user.save()
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            response = self.attempt(password="testpassword")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+
+        with self.settings(
+            PASSWORD_HASHERS=[
+                "django.contrib.auth.hashers.MD5PasswordHasher",
+                "core.hashers.PBKDF2PasswordHasher",
+            ]
+        ):
+            response = self.attempt(password="testpassword")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("md5$"))
+
+
+class FastJSONTest(UserTestCase):
+    username = "fast"
+
+    def setUp(self):
+        super().setUp()
+        for day in range(1, 6):
+            meal = self.create_meal(
+                f"Day {day}",
+                f"2024-07-{day:02d}T12:30:15.250Z",
+                hunger_level="Hungry" if day % 2 else "",
+            )
+            FoodComponent.bulk_create_with_totals(
+                [
+                    self.build_component(
+                        meal,
+                        f"Food {index} \u2028",
+                        fat=1.5,
+                        protein=2,
+                        carbs=3,
+                        sugar=0.5,
+                        total_calories=40,
+                        micronutrients={"sodium": 120, "iron": None},
+                    )
+                    for index in range(20)
+                ]
+            )
+
+    def serialized(self, serializer_class, queryset):
+        return json.loads(
+            JSONRenderer().render(serializer_class(queryset, many=True).data)
+        )
+
+    def test_meal_list_matches_the_serializer(self):
+        pages, url, params = [], reverse("meal-list"), {"page_size": 2}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.json())
+            url, params = response.data["next"], None
+        meals = Meal.objects.filter(user=self.user).order_by("-time_of_consumption")
+        listed = [meal for page in pages for meal in page["results"]]
+        expected = self.serialized(
+            MealSerializer, meals.prefetch_related("foodcomponent_set")
+        )
+        self.assertEqual(listed, expected)
+        # Dict equality ignores order; clients diffing the JSON do not.
+        self.assertEqual(
+            [list(meal) for meal in listed], [list(meal) for meal in expected]
+        )
+        self.assertEqual(
+            list(listed[0]["food_components"][0]),
+            list(expected[0]["food_components"][0]),
+        )
+        # Paging back from the last page uses positions of the read rows.
+        response = self.client.get(pages[-1]["previous"])
+        self.assertEqual(response.json()["results"], pages[-2]["results"])
+
+    def test_component_list_matches_the_serializer(self):
+        response = self.client.get(reverse("foodcomponent-list"))
+        self.assertCountEqual(
+            response.json(),
+            self.serialized(FoodComponentSerializer, FoodComponent.objects.all()),
+        )
+
+    def test_renderer_matches_json_renderer(self):
+        data = {
+            "when": datetime(2024, 7, 29, 12, 0, 0, 500, tzinfo=dt_timezone.utc),
+            "day": date(2024, 7, 29),
+            "id": self.user.pk,
+            "amount": Decimal("1.50"),
+            "text": "line\u2028separator \u00e9",
+            "list": [1, 2.5, None, True],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
+
+    def test_parser_rejects_invalid_json(self):
+        response = self.client.post(
+            reverse("meal-list"), '{"meal_name": NaN}', content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("JSON parse error", response.data["detail"])
+
+    def test_large_responses_are_compressed(self):
+        url = reverse("meal-list")
+        plain = self.client.get(url)
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertEqual(plain["Vary"].count("Accept-Encoding"), 1)
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertTrue(response["ETag"].startswith("W/"))
+
+        fake_brotli = SimpleNamespace(
+            compress=lambda data, quality: zlib.compress(data)
+        )
+        with mock.patch("core.compression.brotli", fake_brotli):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, br")
+            self.assertEqual(response["Content-Encoding"], "br")
+            self.assertEqual(zlib.decompress(response.content), plain.content)
+
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, br;q=0")
+            self.assertEqual(response["Content-Encoding"], "gzip")
+
+        small = self.client.get(reverse("user-goals-list"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(small.has_header("Content-Encoding"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """``SimpleRateThrottle`` with a token bucket in place of a request log.
+
+    A rate of ``N/period`` is a bucket of ``N`` tokens that refills evenly
+    over ``period``: a burst of ``N`` requests goes through, after which
+    requests are admitted at the sustained rate. Each bucket is a single
+    ``(tokens, timestamp)`` cache entry. Rates come from
+    ``LOGIN_THROTTLE_RATES``; a scope without a rate is not throttled.
+
+    The cache read and write are not atomic, so concurrent requests can
+    overdraw a bucket by a few tokens.
+    """
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, "LOGIN_THROTTLE_CACHE_ALIAS", "default")]
+        super().__init__()
+
+    def get_rate(self):
+        return getattr(settings, "LOGIN_THROTTLE_RATES", {}).get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        self.tokens = min(
+            self.num_requests,
+            tokens + (now - updated) * self.num_requests / self.duration,
+        )
+        if self.tokens < 1:
+            return False
+        self.cache.set(self.key, (self.tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    """Limits attempts per username, whichever addresses they come from."""
+
+    scope = "login_username"
+
+    def get_cache_key(self, request, view):
+        username = request.data.get("username")
+        if not isinstance(username, str):
+            return None
+        ident = hashlib.md5(
+            username.strip().casefold().encode(), usedforsecurity=False
+        ).hexdigest()
+        return self.cache_format % {"scope": self.scope, "ident": ident}
@@ -1,26 +1,154 @@
+import io
 import logging
+import uuid
+from datetime import datetime, time, timedelta
 
 from django.contrib.auth import authenticate, get_user_model
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import status
 from rest_framework import viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import (
+    action,
+    api_view,
+    permission_classes,
+    throttle_classes,
+)
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Meal, FoodComponent, HistoricalMeal, UserGoals
+from .analytics import (
+    DEFAULT_WINDOWS,
+    GOAL_FIELDS,
+    MAX_RANGE_DAYS,
+    MAX_WINDOW,
+    nutrition_report,
+)
+from .cache import bump_user_cache_version, cache_per_user
+from .exports import iter_meals_csv, iter_meals_ndjson
+from .goals import parse_goals
+from .imports import (
+    IMPORT_TYPES,
+    guess_import_type,
+    import_meals,
+    is_utf8,
+    read_records,
+)
+from .metrics import request_metrics
+from .models import (
+    Meal,
+    FoodComponent,
+    ComponentNutrient,
+    HistoricalMeal,
+    UserGoals,
+    DailyNutritionSummary,
+    Food,
+    Job,
+)
+from .pagination import HistoricalMealCursorPagination, MealCursorPagination
+from .readers import component_reader, meal_reader, meals_with_components
 from .serializers import (
     UserSerializer,
     MealSerializer,
     FoodComponentSerializer,
     HistoricalMealSerializer,
+    HistoricalMealLogSerializer,
+    FoodComponentImportSerializer,
     UserGoalsSerializer,
+    DailyNutritionSummarySerializer,
+    FoodSerializer,
+    JobSerializer,
 )
+from .search import food_index
+from .sync import changes, decode_token
+from .throttling import LoginIPThrottle, LoginUsernameThrottle
 
 User = get_user_model()
 logger = logging.getLogger("see_food")
 
 
+def parse_date_param(request, name):
+    """Return the ``name`` query parameter as a date, or None if absent."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Expected a date in YYYY-MM-DD format."})
+    return parsed
+
+
+def today(request):
+    """The current date, for ``cache_per_user(vary_on=...)`` on views whose
+    date range defaults to today."""
+    return timezone.localdate()
+
+
+def parse_float_param(request, name):
+    """Return the ``name`` query parameter as a float, or None if absent."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValidationError({name: "Expected a number."})
+
+
+def parse_datetime_param(request, name):
+    """Return the ``name`` query parameter as an aware datetime, or None if
+    absent. A bare date means midnight at the start of that day."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = day and datetime.combine(day, time.min)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Expected an ISO 8601 date or datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def job_accepted(job):
+    """202 response pointing the client at ``job``'s status endpoint."""
+    return Response(
+        JobSerializer(job).data,
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": reverse("job-detail", args=[job.pk])},
+    )
+
+
+def filter_meals(request):
+    """Return the requesting user's meals, with their components prefetched,
+    limited to the ``since``/``until`` query parameters."""
+    queryset = Meal.objects.filter(user=request.user).prefetch_related(
+        "foodcomponent_set"
+    )
+    # ?since= is inclusive and ?until= exclusive, so consecutive ranges
+    # never overlap.
+    since = parse_datetime_param(request, "since")
+    until = parse_datetime_param(request, "until")
+    if since:
+        queryset = queryset.filter(time_of_consumption__gte=since)
+    if until:
+        queryset = queryset.filter(time_of_consumption__lt=until)
+    return queryset
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -31,17 +159,21 @@ class UserViewSet(viewsets.ModelViewSet):
 
 @api_view(["POST"])
 def register(request):
-    logger.debug(f"{register.__name__}: Received registration request.")
+    logger.debug("%s: Received registration request.", register.__name__)
     serializer = UserSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
         logger.debug(
-            f"{register.__name__}: User registered successfully with username: {user.username}."
+            "%s: User registered successfully with username: %s.",
+            register.__name__,
+            user.username,
         )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     else:
         logger.debug(
-            f"{register.__name__}: Registration failed with errors: {serializer.errors}."
+            "%s: Registration failed with errors: %s.",
+            register.__name__,
+            serializer.errors,
         )
         return Response(
             {
@@ -53,21 +185,24 @@ def register(request):
 
 
 @api_view(["POST"])
+@throttle_classes([LoginIPThrottle, LoginUsernameThrottle])
 def login(request):
     username = request.data.get("username")
     password = request.data.get("password")
 
     if username is None or password is None:
-        logger.debug(f"{login.__name__}: Missing username or password in the request.")
+        logger.debug("%s: Missing username or password in the request.", login.__name__)
         return Response(
             {"error": "Please provide both username and password."},
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    logger.debug(f"{login.__name__}: Attempting to authenticate user: {username}.")
+    logger.debug("%s: Attempting to authenticate user: %s.", login.__name__, username)
     user = authenticate(username=username, password=password)
     if user:
-        logger.debug(f"{login.__name__}: User authenticated successfully: {username}.")
+        logger.debug(
+            "%s: User authenticated successfully: %s.", login.__name__, username
+        )
         refresh = RefreshToken.for_user(user)
         return Response(
             {
@@ -77,7 +212,7 @@ def login(request):
             status=status.HTTP_200_OK,
         )
 
-    logger.debug(f"{login.__name__}: Invalid credentials for user: {username}.")
+    logger.debug("%s: Invalid credentials for user: %s.", login.__name__, username)
     return Response(
         {
             "error": "Invalid Credentials",
@@ -87,16 +222,47 @@ def login(request):
     )
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def metrics(request):
+    """Per-route request histograms in the Prometheus text format."""
+    return HttpResponse(
+        request_metrics.render(), content_type="text/plain; version=0.0.4"
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    """Rows created, changed or deleted since the ``since`` token."""
+    since = request.query_params.get("since")
+    logger.debug("Syncing changes since token %s.", since)
+    if since:
+        try:
+            since = decode_token(since)
+        except (ValueError, OverflowError, OSError):
+            raise ValidationError({"since": "Expected a token from a previous sync."})
+    return Response(changes(request.user, since or None))
+
+
 class MealViewSet(viewsets.ModelViewSet):
     serializer_class = MealSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MealCursorPagination
+
+    @cache_per_user
+    def list(self, request, *args, **kwargs):
+        # Reads rows with .values() rather than building Meal instances and
+        # running MealSerializer; the output is the same.
+        page = self.paginate_queryset(meal_reader.values(self.get_queryset()))
+        return self.get_paginated_response(meals_with_components(page))
 
     def get_queryset(self):
-        return Meal.objects.filter(user=self.request.user)
+        return filter_meals(self.request)
 
     def create(self, request, *args, **kwargs):
         logger.debug(
-            f"{self.__class__.__name__}.{self.create.__name__}: Creating a new meal."
+            "%s.%s: Creating a new meal.", self.__class__.__name__, self.create.__name__
         )
         data = request.data.copy()
         data["user"] = request.user.user_id
@@ -104,12 +270,17 @@ class MealViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             serializer.save()
             logger.debug(
-                f"{self.__class__.__name__}.{self.create.__name__}: Meal created successfully."
+                "%s.%s: Meal created successfully.",
+                self.__class__.__name__,
+                self.create.__name__,
             )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             logger.debug(
-                f"{self.__class__.__name__}.{self.create.__name__}: Meal creation failed with errors: {serializer.errors}."
+                "%s.%s: Meal creation failed with errors: %s.",
+                self.__class__.__name__,
+                self.create.__name__,
+                serializer.errors,
             )
             return Response(
                 {
@@ -119,22 +290,115 @@ class MealViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+    EXPORT_TYPES = {
+        "ndjson": (iter_meals_ndjson, "application/x-ndjson", "meals.ndjson"),
+        "csv": (iter_meals_csv, "text/csv", "meals.csv"),
+    }
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        # The file type is read from ?type= because DRF reserves ?format=.
+        export_type = request.query_params.get("type", "ndjson")
+        logger.debug(
+            "%s.%s: Exporting meals as %s.",
+            self.__class__.__name__,
+            self.export.__name__,
+            export_type,
+        )
+        if export_type not in self.EXPORT_TYPES:
+            return Response(
+                {
+                    "message": "Unsupported export type.",
+                    "errors": {
+                        "type": [f"Choose one of: {', '.join(self.EXPORT_TYPES)}."]
+                    },
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        rows, content_type, filename = self.EXPORT_TYPES[export_type]
+        response = StreamingHttpResponse(
+            rows(self.get_queryset()), content_type=content_type
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_file(self, request):
+        logger.debug(
+            "%s.%s: Importing meals from an uploaded file.",
+            self.__class__.__name__,
+            self.import_file.__name__,
+        )
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"message": "Attach the file to import as 'file'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        import_type = request.data.get("type") or guess_import_type(upload.name)
+        if import_type not in IMPORT_TYPES:
+            return Response(
+                {
+                    "message": "Unsupported import type.",
+                    "errors": {"type": [f"Choose one of: {', '.join(IMPORT_TYPES)}."]},
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not is_utf8(upload.file):
+            return Response(
+                {"message": "The file must be UTF-8 encoded."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        lines = io.TextIOWrapper(upload.file, encoding="utf-8", newline="")
+        report = import_meals(request.user, read_records(lines, import_type))
+        logger.debug(
+            "%s.%s: Imported %s meals and skipped %s records.",
+            self.__class__.__name__,
+            self.import_file.__name__,
+            report["meals"],
+            report["skipped"],
+        )
+        return Response(report, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"])
+    def recalculate(self, request, pk=None):
+        logger.debug(
+            "%s.%s: Queueing a totals recalculation for meal %s.",
+            self.__class__.__name__,
+            self.recalculate.__name__,
+            pk,
+        )
+        meal = self.get_object()
+        return job_accepted(
+            Job.enqueue(
+                "recalculate_meals", {"meal_id": str(meal.pk)}, user=request.user
+            )
+        )
+
     @action(detail=True, methods=["put"])
     def edit_meal(self, request, pk=None):
         logger.debug(
-            f"{self.__class__.__name__}.{self.edit_meal.__name__}: Editing meal with ID: {pk}."
+            "%s.%s: Editing meal with ID: %s.",
+            self.__class__.__name__,
+            self.edit_meal.__name__,
+            pk,
         )
         meal = self.get_object()
         serializer = MealSerializer(meal, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             logger.debug(
-                f"{self.__class__.__name__}.{self.edit_meal.__name__}: Meal updated successfully."
+                "%s.%s: Meal updated successfully.",
+                self.__class__.__name__,
+                self.edit_meal.__name__,
             )
             return Response(serializer.data)
         else:
             logger.debug(
-                f"{self.__class__.__name__}.{self.edit_meal.__name__}: Meal update failed with errors: {serializer.errors}."
+                "%s.%s: Meal update failed with errors: %s.",
+                self.__class__.__name__,
+                self.edit_meal.__name__,
+                serializer.errors,
             )
             return Response(
                 {
@@ -150,23 +414,68 @@ class FoodComponentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return FoodComponent.objects.filter(meal__user=self.request.user)
+        return FoodComponent.objects.filter(
+            meal__user=self.request.user
+        ).select_related("meal")
+
+    def list(self, request, *args, **kwargs):
+        return Response(component_reader.data(self.get_queryset()))
 
     def create(self, request, *args, **kwargs):
         logger.debug(
-            f"{self.__class__.__name__}.{self.create.__name__}: Creating a new food component."
+            "%s.%s: Creating a new food component.",
+            self.__class__.__name__,
+            self.create.__name__,
         )
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            food_component = serializer.save()
-            food_component.meal.recalculate_macros()
+            serializer.save()
             logger.debug(
-                f"{self.__class__.__name__}.{self.create.__name__}: Food component created and macros recalculated."
+                "%s.%s: Food component created and meal totals updated.",
+                self.__class__.__name__,
+                self.create.__name__,
             )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             logger.debug(
-                f"{self.__class__.__name__}.{self.create.__name__}: Food component creation failed with errors: {serializer.errors}."
+                "%s.%s: Food component creation failed with errors: %s.",
+                self.__class__.__name__,
+                self.create.__name__,
+                serializer.errors,
+            )
+            return Response(
+                {
+                    "message": "Food component creation failed due to invalid data.",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    @action(detail=False, methods=["post"])
+    def bulk_add_food_components(self, request):
+        logger.debug(
+            "%s.%s: Creating food components in bulk.",
+            self.__class__.__name__,
+            self.bulk_add_food_components.__name__,
+        )
+        meal_ids = set()
+        if isinstance(request.data, list):
+            for item in request.data:
+                try:
+                    meal_ids.add(uuid.UUID(str(item.get("meal"))))
+                except (AttributeError, ValueError):
+                    pass
+        # Only the user's own meals resolve; anything else fails validation.
+        meals = Meal.objects.filter(user=request.user).in_bulk(meal_ids)
+        serializer = FoodComponentSerializer(
+            data=request.data, many=True, context={"meals": meals}
+        )
+        if not serializer.is_valid():
+            logger.debug(
+                "%s.%s: Bulk food component creation failed with errors: %s.",
+                self.__class__.__name__,
+                self.bulk_add_food_components.__name__,
+                serializer.errors,
             )
             return Response(
                 {
@@ -176,25 +485,46 @@ class FoodComponentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        food_components = FoodComponent.bulk_create_with_totals(
+            [FoodComponent(**item) for item in serializer.validated_data]
+        )
+        logger.debug(
+            "%s.%s: Created %s food components and updated meal totals.",
+            self.__class__.__name__,
+            self.bulk_add_food_components.__name__,
+            len(food_components),
+        )
+        return Response(
+            FoodComponentSerializer(food_components, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
     @action(detail=True, methods=["put"])
     def edit_food_component(self, request, pk=None):
         logger.debug(
-            f"{self.__class__.__name__}.{self.edit_food_component.__name__}: Editing food component with ID: {pk}."
+            "%s.%s: Editing food component with ID: %s.",
+            self.__class__.__name__,
+            self.edit_food_component.__name__,
+            pk,
         )
         food_component = self.get_object()
         serializer = FoodComponentSerializer(
             food_component, data=request.data, partial=True
         )
         if serializer.is_valid():
-            food_component = serializer.save()
-            food_component.meal.recalculate_macros()
+            serializer.save()
             logger.debug(
-                f"{self.__class__.__name__}.{self.edit_food_component.__name__}: Food component updated and macros recalculated."
+                "%s.%s: Food component updated and meal totals updated.",
+                self.__class__.__name__,
+                self.edit_food_component.__name__,
             )
             return Response(serializer.data)
         else:
             logger.debug(
-                f"{self.__class__.__name__}.{self.edit_food_component.__name__}: Food component update failed with errors: {serializer.errors}."
+                "%s.%s: Food component update failed with errors: %s.",
+                self.__class__.__name__,
+                self.edit_food_component.__name__,
+                serializer.errors,
             )
             return Response(
                 {
@@ -208,26 +538,50 @@ class FoodComponentViewSet(viewsets.ModelViewSet):
 class HistoricalMealViewSet(viewsets.ModelViewSet):
     serializer_class = HistoricalMealSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = HistoricalMealCursorPagination
 
     def get_queryset(self):
         return HistoricalMeal.objects.filter(user=self.request.user)
 
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            # An identical meal was stored after validation checked.
+            raise ValidationError(
+                {"non_field_errors": [HistoricalMealSerializer.DUPLICATE_MESSAGE]}
+            )
+
     def create(self, request, *args, **kwargs):
         logger.debug(
-            f"{self.__class__.__name__}.{self.create.__name__}: Creating a new historical meal."
+            "%s.%s: Creating a new historical meal.",
+            self.__class__.__name__,
+            self.create.__name__,
         )
         data = request.data.copy()
         data["user"] = request.user.user_id
         serializer = self.get_serializer(data=data)
         if serializer.is_valid():
-            serializer.save()
+            historical_meal, created = HistoricalMeal.upsert(
+                **serializer.validated_data
+            )
             logger.debug(
-                f"{self.__class__.__name__}.{self.create.__name__}: Historical meal created successfully."
+                "%s.%s: Historical meal %s.",
+                self.__class__.__name__,
+                self.create.__name__,
+                "created successfully" if created else "already stored; counted a use",
+            )
+            return Response(
+                HistoricalMealSerializer(historical_meal).data,
+                status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
             )
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
             logger.debug(
-                f"{self.__class__.__name__}.{self.create.__name__}: Historical meal creation failed with errors: {serializer.errors}."
+                "%s.%s: Historical meal creation failed with errors: %s.",
+                self.__class__.__name__,
+                self.create.__name__,
+                serializer.errors,
             )
             return Response(
                 {
@@ -240,37 +594,100 @@ class HistoricalMealViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["post"])
     def add_historical_meal(self, request):
         logger.debug(
-            f"{self.__class__.__name__}.{self.add_historical_meal.__name__}: Adding a historical meal."
+            "%s.%s: Adding a historical meal.",
+            self.__class__.__name__,
+            self.add_historical_meal.__name__,
         )
         return self.create(request)
 
     @action(detail=False, methods=["get"])
+    @cache_per_user
     def list_historical_meals(self, request):
         logger.debug(
-            f"{self.__class__.__name__}.{self.list_historical_meals.__name__}: Listing historical meals."
+            "%s.%s: Listing historical meals.",
+            self.__class__.__name__,
+            self.list_historical_meals.__name__,
         )
-        historical_meals = self.get_queryset()
+        historical_meals = self.paginate_queryset(self.get_queryset())
         serializer = HistoricalMealSerializer(historical_meals, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+
+    RANKED_LIMIT = 10
+    MAX_RANKED_LIMIT = 50
+
+    def ranked(self, request, ordering):
+        try:
+            limit = int(request.query_params.get("limit", self.RANKED_LIMIT))
+        except ValueError:
+            raise ValidationError({"limit": "Expected an integer."})
+        limit = max(1, min(limit, self.MAX_RANKED_LIMIT))
+        historical_meals = self.get_queryset().order_by(*ordering)[:limit]
+        return Response(HistoricalMealSerializer(historical_meals, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    @cache_per_user
+    def frequent(self, request):
+        """The most used historical meals, read off the (user, use_count,
+        last_used) index."""
+        logger.debug(
+            "%s.%s: Listing frequent historical meals.",
+            self.__class__.__name__,
+            self.frequent.__name__,
+        )
+        return self.ranked(request, ("-use_count", "-last_used"))
+
+    @action(detail=False, methods=["get"])
+    @cache_per_user
+    def recent(self, request):
+        """The most recently used historical meals, read off the (user,
+        last_used) index."""
+        logger.debug(
+            "%s.%s: Listing recent historical meals.",
+            self.__class__.__name__,
+            self.recent.__name__,
+        )
+        return self.ranked(request, ("-last_used",))
 
     @action(detail=True, methods=["put"])
     def edit_historical_meal(self, request, pk=None):
         logger.debug(
-            f"{self.__class__.__name__}.{self.edit_historical_meal.__name__}: Editing historical meal with ID: {pk}."
+            "%s.%s: Editing historical meal with ID: %s.",
+            self.__class__.__name__,
+            self.edit_historical_meal.__name__,
+            pk,
         )
         historical_meal = self.get_object()
         serializer = HistoricalMealSerializer(
             historical_meal, data=request.data, partial=True
         )
         if serializer.is_valid():
-            serializer.save()
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except IntegrityError:
+                return Response(
+                    {
+                        "message": "Historical meal update failed due to invalid data.",
+                        "errors": {
+                            "non_field_errors": [
+                                HistoricalMealSerializer.DUPLICATE_MESSAGE
+                            ]
+                        },
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
             logger.debug(
-                f"{self.__class__.__name__}.{self.edit_historical_meal.__name__}: Historical meal updated successfully."
+                "%s.%s: Historical meal updated successfully.",
+                self.__class__.__name__,
+                self.edit_historical_meal.__name__,
             )
             return Response(serializer.data)
         else:
             logger.debug(
-                f"{self.__class__.__name__}.{self.edit_historical_meal.__name__}: Historical meal update failed with errors: {serializer.errors}."
+                "%s.%s: Historical meal update failed with errors: %s.",
+                self.__class__.__name__,
+                self.edit_historical_meal.__name__,
+                serializer.errors,
             )
             return Response(
                 {
@@ -280,6 +697,60 @@ class HistoricalMealViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+    @action(detail=True, methods=["post"])
+    def log(self, request, pk=None):
+        """Log the historical meal as a new meal with all its components in
+        one request, optionally scaled by ``scale``."""
+        logger.debug(
+            "%s.%s: Logging historical meal with ID: %s.",
+            self.__class__.__name__,
+            self.log.__name__,
+            pk,
+        )
+        historical_meal = self.get_object()
+        options = HistoricalMealLogSerializer(data=request.data)
+        if not options.is_valid():
+            return Response(
+                {
+                    "message": "Logging the historical meal failed due to invalid data.",
+                    "errors": options.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        options = dict(options.validated_data)
+        scale = options.pop("scale")
+        components = FoodComponentImportSerializer(
+            data=historical_meal.scaled_components(scale), many=True
+        )
+        if not components.is_valid():
+            logger.debug(
+                "%s.%s: Historical meal has invalid components: %s.",
+                self.__class__.__name__,
+                self.log.__name__,
+                components.errors,
+            )
+            return Response(
+                {
+                    "message": "The historical meal's food components are invalid.",
+                    "errors": components.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        options.setdefault("meal_name", historical_meal.meal_name)
+        meal = Meal.create_with_components(
+            Meal(user=request.user, **options),
+            [FoodComponent(**data) for data in components.validated_data],
+        )
+        historical_meal.mark_used()
+        logger.debug(
+            "%s.%s: Logged meal %s with %d food components.",
+            self.__class__.__name__,
+            self.log.__name__,
+            meal.pk,
+            len(components.validated_data),
+        )
+        return Response(MealSerializer(meal).data, status=status.HTTP_201_CREATED)
+
 
 class UserGoalsViewSet(viewsets.ModelViewSet):
     serializer_class = UserGoalsSerializer
@@ -288,18 +759,17 @@ class UserGoalsViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return UserGoals.objects.filter(user=self.request.user)
 
+    @cache_per_user
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         logger.debug(
-            f"{self.__class__.__name__}.{self.create.__name__}: Creating user goals."
+            "%s.%s: Creating user goals.", self.__class__.__name__, self.create.__name__
         )
         goals_input = request.data.get("goals_input", "")
         goals_data = self.parse_goals(
-            goals_input,
-            (
-                self.request.user.goals.summary
-                if hasattr(self.request.user, "goals")
-                else ""
-            ),
+            goals_input, UserGoals.objects.filter(user=request.user).first()
         )
 
         goals_data["user"] = request.user.user_id
@@ -308,11 +778,16 @@ class UserGoalsViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             serializer.save(user=request.user)
             logger.debug(
-                f"{self.__class__.__name__}.{self.create.__name__}: User goals created successfully."
+                "%s.%s: User goals created successfully.",
+                self.__class__.__name__,
+                self.create.__name__,
             )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         logger.debug(
-            f"{self.__class__.__name__}.{self.create.__name__}: User goals creation failed with errors: {serializer.errors}."
+            "%s.%s: User goals creation failed with errors: %s.",
+            self.__class__.__name__,
+            self.create.__name__,
+            serializer.errors,
         )
         return Response(
             {
@@ -324,7 +799,7 @@ class UserGoalsViewSet(viewsets.ModelViewSet):
 
     def update(self, request, *args, **kwargs):
         logger.debug(
-            f"{self.__class__.__name__}.{self.update.__name__}: Updating user goals."
+            "%s.%s: Updating user goals.", self.__class__.__name__, self.update.__name__
         )
         partial = kwargs.pop("partial", False)
         try:
@@ -335,17 +810,22 @@ class UserGoalsViewSet(viewsets.ModelViewSet):
             )
 
         goals_input = request.data.get("goals_input", "")
-        goals_data = self.parse_goals(goals_input, instance.summary)
+        goals_data = self.parse_goals(goals_input, instance)
 
         serializer = self.get_serializer(instance, data=goals_data, partial=partial)
         if serializer.is_valid():
             self.perform_update(serializer)
             logger.debug(
-                f"{self.__class__.__name__}.{self.update.__name__}: User goals updated successfully."
+                "%s.%s: User goals updated successfully.",
+                self.__class__.__name__,
+                self.update.__name__,
             )
             return Response(serializer.data)
         logger.debug(
-            f"{self.__class__.__name__}.{self.update.__name__}: User goals update failed with errors: {serializer.errors}."
+            "%s.%s: User goals update failed with errors: %s.",
+            self.__class__.__name__,
+            self.update.__name__,
+            serializer.errors,
         )
         return Response(
             {
@@ -358,27 +838,246 @@ class UserGoalsViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["delete"])
     def delete_goals(self, request):
         logger.debug(
-            f"{self.__class__.__name__}.{self.delete_goals.__name__}: Deleting user goals."
+            "%s.%s: Deleting user goals.",
+            self.__class__.__name__,
+            self.delete_goals.__name__,
         )
-        UserGoals.objects.filter(user=self.request.user).delete()
+        # One at a time, so the deletion is recorded for sync.
+        for goals in UserGoals.objects.filter(user=self.request.user):
+            goals.delete()
+        bump_user_cache_version(request.user.pk)
         return Response(
             {"message": "User goals deleted successfully."},
             status=status.HTTP_204_NO_CONTENT,
         )
 
-    def parse_goals(self, input_text, current_summary):
+    @action(detail=False, methods=["post"], url_path="parse")
+    def parse_in_background(self, request):
         logger.debug(
-            f"{self.__class__.__name__}.{self.parse_goals.__name__}: Parsing goals input."
+            "%s.%s: Queueing goals parsing.",
+            self.__class__.__name__,
+            self.parse_in_background.__name__,
         )
-        # Simulating a call to an LLM to parse natural language input
-        new_summary = (
-            current_summary + " " + input_text if current_summary else input_text
+        goals_input = request.data.get("goals_input", "")
+        return job_accepted(
+            Job.enqueue(
+                "parse_goals",
+                {"user_id": str(request.user.pk), "goals_input": goals_input},
+                user=request.user,
+            )
         )
-        return {
-            "summary": new_summary,
-            "fat_goal": 42,
-            "carb_goal": 42,
-            "protein_goal": 42,
-            "calorie_goal": 42,
-            "weight_goal": 42,
+
+    def parse_goals(self, input_text, goals):
+        logger.debug(
+            "%s.%s: Parsing goals input.",
+            self.__class__.__name__,
+            self.parse_goals.__name__,
+        )
+        return parse_goals(input_text, goals)
+
+
+class DailyNutritionSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = DailyNutritionSummarySerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = DailyNutritionSummary.objects.filter(user=self.request.user)
+        date_from = parse_date_param(self.request, "from")
+        date_to = parse_date_param(self.request, "to")
+        if date_from:
+            queryset = queryset.filter(date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(date__lte=date_to)
+        return queryset
+
+    @action(detail=False, methods=["get"])
+    def weekly(self, request):
+        logger.debug(
+            "%s.%s: Listing weekly summaries.",
+            self.__class__.__name__,
+            self.weekly.__name__,
+        )
+        return Response(list(DailyNutritionSummary.weekly(self.get_queryset())))
+
+    @action(detail=False, methods=["post"])
+    def rebuild(self, request):
+        logger.debug(
+            "%s.%s: Queueing a daily summary rebuild.",
+            self.__class__.__name__,
+            self.rebuild.__name__,
+        )
+        return job_accepted(
+            Job.enqueue(
+                "rebuild_daily_summaries",
+                {"user_id": str(request.user.pk)},
+                user=request.user,
+            )
+        )
+
+
+class FoodViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = FoodSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Food.objects.filter(user=self.request.user)
+
+    SEARCH_LIMIT = 10
+    MAX_SEARCH_LIMIT = 50
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        query = request.query_params.get("q", "")
+        logger.debug(
+            "%s.%s: Searching foods for '%s'.",
+            self.__class__.__name__,
+            self.search.__name__,
+            query,
+        )
+        try:
+            limit = int(request.query_params.get("limit", self.SEARCH_LIMIT))
+        except ValueError:
+            raise ValidationError({"limit": "Expected an integer."})
+        limit = max(1, min(limit, self.MAX_SEARCH_LIMIT))
+        results = food_index.search(
+            request.user.pk,
+            query,
+            brand_weights=HistoricalMeal.brand_weights(request.user),
+            limit=limit,
+        )
+        return Response(results)
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user).order_by("-created_at")
+
+
+class AnalyticsViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    @cache_per_user(vary_on=today)
+    def list(self, request):
+        logger.debug(
+            "%s.%s: Building the nutrition report.",
+            self.__class__.__name__,
+            self.list.__name__,
+        )
+        date_to = parse_date_param(request, "to") or timezone.localdate()
+        date_from = parse_date_param(request, "from") or date_to - timedelta(days=89)
+        if date_from > date_to:
+            raise ValidationError({"from": "Must not be after 'to'."})
+        if (date_to - date_from).days >= MAX_RANGE_DAYS:
+            raise ValidationError(
+                {"from": f"Ranges are limited to {MAX_RANGE_DAYS} days."}
+            )
+        windows = request.query_params.get("windows")
+        try:
+            windows = (
+                sorted({int(window) for window in windows.split(",")})
+                if windows
+                else DEFAULT_WINDOWS
+            )
+        except ValueError:
+            windows = None
+        if not windows or not 1 <= windows[0] <= windows[-1] <= MAX_WINDOW:
+            raise ValidationError(
+                {
+                    "windows": f"Expected comma-separated day counts from 1 to {MAX_WINDOW}."
+                }
+            )
+        return Response(nutrition_report(request.user, date_from, date_to, windows))
+
+
+class NutrientViewSet(viewsets.ViewSet):
+    """Micronutrient aggregates over ``ComponentNutrient``, computed by the
+    database. ``from``/``to`` bound the days and ``nutrient`` takes a
+    comma-separated list of codes."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        nutrients = self.request.query_params.get("nutrient")
+        return ComponentNutrient.for_user(
+            self.request.user,
+            parse_date_param(self.request, "from"),
+            parse_date_param(self.request, "to"),
+            nutrients and nutrients.split(","),
+        )
+
+    @cache_per_user
+    def list(self, request):
+        logger.debug(
+            "%s.%s: Totalling micronutrients.",
+            self.__class__.__name__,
+            self.list.__name__,
+        )
+        return Response(list(ComponentNutrient.totals(self.get_queryset())))
+
+    @action(detail=False, methods=["get"])
+    @cache_per_user
+    def daily(self, request):
+        """Daily amounts, optionally only days ``above`` or ``below`` an
+        amount, e.g. ``?nutrient=sodium&above=2300``."""
+        logger.debug(
+            "%s.%s: Listing daily micronutrients.",
+            self.__class__.__name__,
+            self.daily.__name__,
+        )
+        rows = ComponentNutrient.daily(self.get_queryset())
+        above = parse_float_param(request, "above")
+        below = parse_float_param(request, "below")
+        if above is not None:
+            rows = rows.filter(amount__gt=above)
+        if below is not None:
+            rows = rows.filter(amount__lt=below)
+        return Response(list(rows))
+
+
+class DashboardViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    @cache_per_user(vary_on=today)
+    def list(self, request):
+        """One day's meals with their components, the day's totals, the
+        user's goals and what is left of each, in three queries: the meals,
+        their components and the goals. The totals are summed from the
+        meals' stored totals."""
+        day = parse_date_param(request, "date") or timezone.localdate()
+        logger.debug(
+            "%s.%s: Building the dashboard for %s.",
+            self.__class__.__name__,
+            self.list.__name__,
+            day,
+        )
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        meals = list(
+            Meal.objects.filter(
+                user=request.user,
+                time_of_consumption__gte=start,
+                time_of_consumption__lt=start + timedelta(days=1),
+            )
+            .prefetch_related("foodcomponent_set")
+            .order_by("time_of_consumption")
+        )
+        totals = {
+            total: sum(getattr(meal, total) for meal in meals)
+            for total in Meal.MACRO_FIELDS
         }
+        goals = UserGoals.objects.filter(user=request.user).first()
+        remaining = {}
+        for total, field in GOAL_FIELDS.items():
+            goal = getattr(goals, field, 0)
+            remaining[field] = goal - totals[total] if goal else None
+        return Response(
+            {
+                "date": day,
+                "meals": MealSerializer(meals, many=True).data,
+                "totals": {"meal_count": len(meals), **totals},
+                "goals": goals and UserGoalsSerializer(goals).data,
+                "remaining": remaining,
+            }
+        )
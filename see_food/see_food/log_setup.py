@@ -0,0 +1,47 @@
+import atexit
+import logging.config
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+_listeners = []
+
+
+def configure_logging(logging_settings):
+    """Apply ``LOGGING``, then put each configured logger's handlers behind a
+    queue when ``LOG_ASYNC`` is on.
+
+    Used as ``LOGGING_CONFIG``. With the queue in place a log call costs
+    formatting the message and a queue put; a ``QueueListener`` thread per
+    logger does the file and console writes.
+    """
+    stop_listeners()
+    logging.config.dictConfig(logging_settings)
+    if not getattr(settings, "LOG_ASYNC", False):
+        return
+    for name in logging_settings.get("loggers", {}):
+        logger = logging.getLogger(name)
+        handlers = [
+            handler
+            for handler in logger.handlers
+            if not isinstance(handler, QueueHandler)
+        ]
+        if not handlers:
+            continue
+        records = queue.SimpleQueue()
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(QueueHandler(records))
+        listener = QueueListener(records, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners.append(listener)
+
+
+def stop_listeners():
+    """Flush queued records and stop the writer threads."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(stop_listeners)
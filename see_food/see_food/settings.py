@@ -10,10 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import importlib.util
 import os
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -25,7 +28,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = "django-insecure-x3)+5gaimx==bb0#h+t4a)cz2t*wb^i=s77n8nc8g6fxles%#9"
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv("DEBUG", "True").lower() in ("1", "true", "yes")
 
 ALLOWED_HOSTS = []
 
@@ -49,6 +52,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.metrics.RequestMetricsMiddleware",
+    "core.compression.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -90,12 +95,59 @@ WSGI_APPLICATION = "see_food.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DJANGO_DB_PROFILE picks one of:
+#   sqlite        - the default single-file development database.
+#   sqlite-tuned  - SQLite in WAL mode with synchronous=NORMAL and a busy
+#                   timeout, for single-node installs (see core/db.py).
+#   postgres      - PostgreSQL, configured from the POSTGRES_* variables, with
+#                   either persistent connections or a psycopg pool.
+DB_PROFILE = os.getenv("DJANGO_DB_PROFILE", "sqlite")
+
+if DB_PROFILE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("POSTGRES_DB", "see_food"),
+            "USER": os.getenv("POSTGRES_USER", "see_food"),
+            "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+            "HOST": os.getenv("POSTGRES_HOST", "localhost"),
+            "PORT": os.getenv("POSTGRES_PORT", "5432"),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {},
+        }
     }
-}
+    if os.getenv("POSTGRES_POOL", "") == "1":
+        # psycopg 3 pool (Django 5.1+). Pooled connections are returned to
+        # the pool after each request, so CONN_MAX_AGE must stay at 0.
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("POSTGRES_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("POSTGRES_POOL_MAX_SIZE", "10")),
+            "timeout": int(os.getenv("POSTGRES_POOL_TIMEOUT", "10")),
+        }
+    else:
+        DATABASES["default"]["CONN_MAX_AGE"] = int(
+            os.getenv("POSTGRES_CONN_MAX_AGE", "60")
+        )
+elif DB_PROFILE in ("sqlite", "sqlite-tuned"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+        }
+    }
+    if DB_PROFILE == "sqlite-tuned":
+        # Seconds a writer waits for the lock before "database is locked".
+        DATABASES["default"]["OPTIONS"] = {
+            "timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "20"))
+        }
+        SQLITE_PRAGMAS = {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "20")) * 1000,
+        }
+else:
+    raise ImproperlyConfigured(f"Unknown DJANGO_DB_PROFILE: {DB_PROFILE!r}")
 
 
 # Password validation
@@ -117,6 +169,51 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# DJANGO_PASSWORD_HASHER picks the hasher for new passwords:
+#   pbkdf2  - PBKDF2-SHA256 with PASSWORD_PBKDF2_ITERATIONS iterations.
+#   argon2  - Argon2id with ARGON2_TIME_COST passes over ARGON2_MEMORY_COST
+#             KiB on ARGON2_PARALLELISM lanes; needs argon2-cffi.
+#   fast    - salted MD5, only for tests and benchmarks.
+# The other hashers stay listed so existing hashes still verify. A password
+# stored with another hasher or other parameters is rehashed with the
+# preferred one on the user's next successful login.
+PASSWORD_HASHER = os.getenv("DJANGO_PASSWORD_HASHER", "pbkdf2")
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "1000000"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "102400"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "8"))
+
+_HASHERS = {
+    "pbkdf2": "core.hashers.PBKDF2PasswordHasher",
+    "argon2": "core.hashers.Argon2PasswordHasher",
+    "fast": "django.contrib.auth.hashers.MD5PasswordHasher",
+}
+if PASSWORD_HASHER not in _HASHERS:
+    raise ImproperlyConfigured(f"Unknown DJANGO_PASSWORD_HASHER: {PASSWORD_HASHER!r}")
+if PASSWORD_HASHER == "argon2" and importlib.util.find_spec("argon2") is None:
+    raise ImproperlyConfigured("DJANGO_PASSWORD_HASHER=argon2 needs argon2-cffi.")
+PASSWORD_HASHERS = [_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _HASHERS.items() if name not in (PASSWORD_HASHER, "fast")
+]
+# The test runner (core/testing.py) and the benchmark harness hash with these
+# instead, so creating users costs next to nothing, unless
+# DJANGO_PASSWORD_HASHER asks for a particular hasher.
+TEST_PASSWORD_HASHERS = (
+    PASSWORD_HASHERS
+    if "DJANGO_PASSWORD_HASHER" in os.environ
+    else [_HASHERS["fast"], *PASSWORD_HASHERS]
+)
+TEST_RUNNER = "core.testing.TestRunner"
+
+# Token buckets for POST /api/login/ (see core/throttling.py): "N/period"
+# allows a burst of N attempts, refilled evenly over the period.
+LOGIN_THROTTLE_CACHE_ALIAS = "default"
+LOGIN_THROTTLE_RATES = {
+    "login_ip": os.getenv("LOGIN_THROTTLE_IP_RATE", "30/min") or None,
+    "login_username": os.getenv("LOGIN_THROTTLE_USERNAME_RATE", "10/min") or None,
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -139,9 +236,80 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Local memory by default; point DJANGO_CACHE_BACKEND/DJANGO_CACHE_LOCATION at
+# a shared backend (e.g. Redis or Memcached) when running several processes.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", "see-food"),
+    }
+}
+
+# Per-user cache for read-heavy API responses (see core/cache.py).
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300"))
+
+# Per-user food search indexes (see core/search.py) are reloaded this often,
+# or sooner when another process changes the catalog and the cache is shared.
+FOOD_INDEX_TTL = int(os.getenv("FOOD_INDEX_TTL", "300"))
+FOOD_INDEX_MAX_USERS = int(os.getenv("FOOD_INDEX_MAX_USERS", "1000"))
+
+# Natural-language goal parsing (see core/goals.py). Blocking backends run on
+# a worker pool and fall back to the rule-based parser after the timeout.
+GOAL_PARSER = os.getenv("GOAL_PARSER", "core.goals.RuleBasedGoalParser")
+GOAL_PARSER_TIMEOUT = float(os.getenv("GOAL_PARSER_TIMEOUT", "5"))
+GOAL_PARSER_WORKERS = int(os.getenv("GOAL_PARSER_WORKERS", "4"))
+GOAL_PARSER_CACHE_SIZE = 1024
+GOAL_PARSER_CACHE_TTL = 3600
+
+# Worker threads for `manage.py run_workers`; defaults to the CPU count.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "0")) or os.cpu_count() or 1
+# A running job not finished within this many seconds is assumed lost with
+# its worker and retried (or failed after its last attempt).
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+
+# Requests over either budget are logged as warnings by the metrics middleware.
+REQUEST_QUERY_BUDGET = int(os.getenv("REQUEST_QUERY_BUDGET", "30"))
+REQUEST_LATENCY_BUDGET_MS = int(os.getenv("REQUEST_LATENCY_BUDGET_MS", "500"))
+
+# /api/sync/ re-sends changes from this many seconds before the client's
+# token, to cover writes that committed after the previous sync read.
+SYNC_OVERLAP_SECONDS = int(os.getenv("SYNC_OVERLAP_SECONDS", "5"))
+# Deletions are kept this long; older tokens get a full snapshot.
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "90"))
+
+# Authenticated users are cached this many seconds (see core/authentication.py).
+# Saving or deleting a user evicts it; use a shared cache alias when running
+# several processes.
+JWT_USER_CACHE_ALIAS = "default"
+JWT_USER_CACHE_TTL = int(os.getenv("JWT_USER_CACHE_TTL", "60"))
+# Trust the access token alone on GET/HEAD/OPTIONS: no user lookup, but a
+# deactivated user keeps read access until the token expires.
+JWT_STATELESS_READS = os.getenv("JWT_STATELESS_READS", "0") == "1"
+
+# Responses of at least this many bytes are compressed with Brotli (when the
+# brotli package is installed) or gzip, as the client's Accept-Encoding allows.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# JSON is rendered and parsed with orjson when it is installed (see
+# core/renderers.py and core/parsers.py). The renderers also time themselves
+# for the request metrics.
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+    "DEFAULT_AUTHENTICATION_CLASSES": ("core.authentication.CachedJWTAuthentication",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.FastJSONRenderer",
+        "core.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ),
 }
 
@@ -153,6 +321,18 @@ SIMPLE_JWT = {
 }
 
 
+# Logging
+# Records are written by background QueueListener threads unless
+# DJANGO_LOG_ASYNC=0 (see see_food/log_setup.py). The level defaults to DEBUG
+# in development and INFO otherwise.
+
+LOGGING_CONFIG = "see_food.log_setup.configure_logging"
+LOG_ASYNC = os.getenv("DJANGO_LOG_ASYNC", "1") == "1"
+LOG_LEVEL = os.getenv("DJANGO_LOG_LEVEL", "DEBUG" if DEBUG else "INFO")
+LOG_DIR = os.getenv("DJANGO_LOG_DIR", BASE_DIR)
+LOG_MAX_BYTES = int(os.getenv("DJANGO_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("DJANGO_LOG_BACKUP_COUNT", "5"))
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -168,19 +348,23 @@ LOGGING = {
     },
     "handlers": {
         "django_file": {
-            "level": "DEBUG",
-            "class": "logging.FileHandler",
-            "filename": os.path.join(BASE_DIR, "django_debug.log"),
+            "level": LOG_LEVEL,
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": os.path.join(LOG_DIR, "django_debug.log"),
+            "maxBytes": LOG_MAX_BYTES,
+            "backupCount": LOG_BACKUP_COUNT,
             "formatter": "verbose",
         },
         "custom_file": {
-            "level": "DEBUG",
-            "class": "logging.FileHandler",
-            "filename": os.path.join(BASE_DIR, "custom_debug.log"),
+            "level": LOG_LEVEL,
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": os.path.join(LOG_DIR, "custom_debug.log"),
+            "maxBytes": LOG_MAX_BYTES,
+            "backupCount": LOG_BACKUP_COUNT,
             "formatter": "verbose",
         },
         "console": {
-            "level": "DEBUG",
+            "level": LOG_LEVEL,
             "class": "logging.StreamHandler",
             "formatter": "simple",
         },
@@ -188,12 +372,12 @@ LOGGING = {
     "loggers": {
         "django": {
             "handlers": ["django_file"],
-            "level": os.getenv("DJANGO_LOG_LEVEL", "DEBUG"),
+            "level": LOG_LEVEL,
             "propagate": True,
         },
         "see_food": {
             "handlers": ["custom_file", "console"],
-            "level": os.getenv("DJANGO_LOG_LEVEL", "DEBUG"),
+            "level": LOG_LEVEL,
             "propagate": False,
         },
     },
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from core.async_views import AsyncFoodComponentView, AsyncMealView, AsyncUserGoalsView
 from core.views import (
     UserViewSet,
     MealViewSet,
@@ -10,6 +11,14 @@ from core.views import (
     register,
     login,
     UserGoalsViewSet,
+    DailyNutritionSummaryViewSet,
+    FoodViewSet,
+    JobViewSet,
+    AnalyticsViewSet,
+    NutrientViewSet,
+    DashboardViewSet,
+    metrics,
+    sync,
 )
 
 router = DefaultRouter()
@@ -18,10 +27,25 @@ router.register(r"meals", MealViewSet, basename="meal")
 router.register(r"foodcomponents", FoodComponentViewSet, basename="foodcomponent")
 router.register(r"historicalmeals", HistoricalMealViewSet, basename="historicalmeal")
 router.register(r"usergoals", UserGoalsViewSet, basename="user-goals")
+router.register(r"summaries", DailyNutritionSummaryViewSet, basename="summary")
+router.register(r"foods", FoodViewSet, basename="food")
+router.register(r"jobs", JobViewSet, basename="job")
+router.register(r"analytics", AnalyticsViewSet, basename="analytics")
+router.register(r"nutrients", NutrientViewSet, basename="nutrient")
+router.register(r"dashboard", DashboardViewSet, basename="dashboard")
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include(router.urls)),
     path("api/register/", register, name="register"),
     path("api/login/", login, name="login"),
+    path("api/_metrics", metrics, name="metrics"),
+    path("api/sync/", sync, name="sync"),
+    path("api/async/meals/", AsyncMealView.as_view(), name="async-meal-list"),
+    path(
+        "api/async/foodcomponents/",
+        AsyncFoodComponentView.as_view(),
+        name="async-foodcomponent-list",
+    ),
+    path("api/async/usergoals/", AsyncUserGoalsView.as_view(), name="async-user-goals"),
 ]